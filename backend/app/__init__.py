@@ -3,13 +3,27 @@ import warnings
 from datetime import date
 from flask import Flask, jsonify, request, current_app
 from flask_smorest import Api
-from flask_jwt_extended import JWTManager, create_access_token, get_jwt, get_jwt_identity
+from flask_jwt_extended import JWTManager
 from werkzeug.exceptions import NotFound, UnprocessableEntity
 from flask_cors import CORS
 from werkzeug.utils import secure_filename
 
 from .config import config_by_name
 from .db import db, migrate
+from .db_pool import apply_pool_profile, init_pool_stats
+from .replicas import init_replicas
+from .revocation import init_revocation
+from .menu_cache import init_menu_snapshot
+from .availability import init_availability
+from .events import init_event_hub
+from .outbox import init_outbox
+from .hashing import init_password_hasher
+from .dev_token import init_dev_token
+from .roles import init_role_cache
+from .images import init_image_pipeline
+from .compression import init_compression
+from .points import init_points_ledger
+from .background import init_background
 from .models import (
     Zakaznik, VernostniUcet, Rezervace, Stul, Salonek,
     PodnikovaAkce, Objednavka, PolozkaObjednavky, Platba,
@@ -41,7 +55,7 @@ def create_app(config_name=None, config_override=None):
     app.config.setdefault("JSON_AS_ASCII", False)
 
     # složka pro upload obrázků
-    upload_folder = os.path.join(app.root_path, 'static', 'images')
+    upload_folder = app.config.get('UPLOAD_FOLDER') or os.path.join(app.root_path, 'static', 'images')
     app.config['UPLOAD_FOLDER'] = upload_folder
     os.makedirs(upload_folder, exist_ok=True)
 
@@ -52,29 +66,53 @@ def create_app(config_name=None, config_override=None):
         supports_credentials=True
     )
 
-    # DB + migrace
+    # DB + migrace (engine/pool podle DB_POOL_PROFILE)
+    apply_pool_profile(app)
     db.init_app(app)
     migrate.init_app(app, db)
+    pool_stats = init_pool_stats(app, db)
+
+    # snapshot veřejného menu
+    init_menu_snapshot(app)
+
+    # paměťový index obsazenosti pro hledání volných termínů rezervací
+    init_availability(app)
+
+    # varianty nahraných obrázků (náhledy, WebP) na pozadí
+    init_image_pipeline(app)
+
+    # pub/sub pro SSE (/api/events)
+    init_event_hub(app)
+
+    # outbox notifikací + dispečer na pozadí
+    init_outbox(app)
+
+    # cache rolí (tabulka role + role jednotlivých uživatelů)
+    init_role_cache(app)
+
+    # pool pro ověřování hesel při přihlášení
+    init_password_hasher(app)
+
+    # kompakce knihy věrnostních bodů (POINTS_COMPACT_*)
+    init_points_ledger(app)
+
+    # smyčky výše se spustí až v obslužném procesu (gunicorn worker / první request), ne v CLI
+    init_background(app)
 
     # JWT
     jwt = JWTManager(app)
+    revocation = init_revocation(app)
 
     @jwt.token_in_blocklist_loader
     def check_if_token_revoked(jwt_header, jwt_payload):
-        jti = jwt_payload["jti"]
-        return db.session.query(TokenBlacklist).filter_by(jti=jti).first() is not None
+        return revocation.is_revoked(jwt_payload["jti"])
 
-    # dev‐mode token injector
+    # dev‐mode token injector (token se počítá jednou, viz app/dev_token.py)
     if config_name == "development":
         dev_email = os.getenv("DEV_USER_EMAIL")
         dev_password = os.getenv("DEV_USER_PASSWORD")
-        @app.before_request
-        def _inject_dev_token():
-            if not request.headers.get("Authorization") and dev_email and dev_password:
-                user = db.session.query(Zakaznik).filter_by(email=dev_email).first()
-                if user and user.check_password(dev_password):
-                    token = create_access_token(identity=str(user.id_zakaznika))
-                    request.environ["HTTP_AUTHORIZATION"] = f"Bearer {token}"
+        if dev_email and dev_password:
+            init_dev_token(app, dev_email, dev_password)
 
     # SSE token z query param
     @app.before_request
@@ -84,6 +122,12 @@ def create_app(config_name=None, config_override=None):
             if token:
                 request.environ["HTTP_AUTHORIZATION"] = f"Bearer {token}"
 
+    # read-repliky pro GET requesty (SQLALCHEMY_REPLICA_URIS), až po vložení tokenu výše
+    init_replicas(app, pool_stats)
+
+    # gzip/brotli komprese odpovědí (COMPRESS_*)
+    init_compression(app)
+
     # Blueprinty
     api = Api(app)
     from .api import api_bp
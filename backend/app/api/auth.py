@@ -1,5 +1,9 @@
+from datetime import datetime
+
+from flask import current_app
 from flask.views import MethodView
 from flask_smorest import Blueprint, abort
+from sqlalchemy.orm import joinedload
 from flask_jwt_extended import (
     create_access_token,
     create_refresh_token,
@@ -11,6 +15,8 @@ from flask_jwt_extended import (
 from ..db import db
 from ..models import Zakaznik, TokenBlacklist
 from ..schemas import LoginSchema
+from ..roles import get_role_cache
+from ..hashing import HasherSaturated, HasherUnavailable, password_method
 
 auth_bp = Blueprint("auth", __name__, url_prefix="/api/auth")
 
@@ -21,16 +27,35 @@ class LoginResource(MethodView):
     POST /api/auth/login
     - @arguments(LoginSchema): validuje email, password
     - Ověříme uživatele a heslo, abort(401) při chybě
+    - heslo se ověřuje v poolu procesů (app/hashing.py):
+      plná fronta → 429 s Retry-After, nedostupný pool → 503
+    - hash uložený se starými parametry se po úspěšném ověření přepíše novým
+    - zákazník i role jedním dotazem (JOIN), role se uloží do cache rolí
     - Vytvoříme access i refresh token s rolemi
     - Vrací { "access_token": ..., "refresh_token": ... }
     """
     @auth_bp.arguments(LoginSchema)
     def post(self, data):
-        user = db.session.query(Zakaznik).filter_by(
-            email=data["email"]).first()
-        if not user or not user.check_password(data["password"]):
+        user = db.session.execute(
+            db.select(Zakaznik).options(joinedload(Zakaznik.roles))
+              .where(Zakaznik.email == data["email"])
+        ).unique().scalar_one_or_none()
+        if not user:
             abort(401, message="Neplatné přihlašovací údaje.")
-        roles = [r.name for r in user.roles]
+        hasher = current_app.extensions["password_hasher"]
+        try:
+            ok, new_hash = hasher.verify(user._password, data["password"], password_method())
+        except HasherSaturated:
+            abort(429, message="Příliš mnoho přihlášení najednou, zkuste to za chvíli.",
+                  headers={"Retry-After": "1"})
+        except HasherUnavailable:
+            abort(503, message="Přihlášení je dočasně nedostupné.", headers={"Retry-After": "5"})
+        if not ok:
+            abort(401, message="Neplatné přihlašovací údaje.")
+        if new_hash:
+            user._password = new_hash
+            db.session.commit()
+        roles = sorted(get_role_cache().remember(user.id_zakaznika, (r.name for r in user.roles)))
         access_token = create_access_token(
             identity=str(user.id_zakaznika),
             additional_claims={"roles": roles}
@@ -45,12 +70,13 @@ class MeResource(MethodView):
     GET /api/auth/me
     - @jwt_required(): vyžaduje platný access token
     - Vrací základní informace o přihlášeném uživateli včetně rolí
+    - role z cache rolí → jeden dotaz do DB
     """
     @jwt_required()
     @auth_bp.response(200)
     def get(self):
         user_id = get_jwt_identity()
-        user = db.session.get(Zakaznik, int(user_id))
+        user, roles = get_role_cache().load_user(int(user_id))
         if not user:
             abort(404, message="Uživatel nenalezen.")
         return {
@@ -58,7 +84,7 @@ class MeResource(MethodView):
             "email":    user.email,
             "jmeno":    user.jmeno,
             "prijmeni": user.prijmeni,
-            "roles":    [r.name for r in user.roles]
+            "roles":    sorted(roles)
         }
 
 
@@ -67,15 +93,15 @@ class RefreshResource(MethodView):
     """
     POST /api/auth/refresh
     - @jwt_required(refresh=True): vyžaduje validní refresh token
-    - Vygeneruje nový access token se stejnými rolemi
+    - Vygeneruje nový access token s aktuálními rolemi (z cache rolí, nanejvýš jeden dotaz)
     """
     @jwt_required(refresh=True)
     def post(self):
         user_id = get_jwt_identity()
-        user = db.session.get(Zakaznik, int(user_id))
-        if not user:
+        roles = get_role_cache().user_roles(int(user_id))
+        if roles is None:
             abort(404, message="Uživatel nenalezen.")
-        roles = [r.name for r in user.roles]
+        roles = sorted(roles)
         access_token = create_access_token(
             identity=str(user_id),
             additional_claims={"roles": roles}
@@ -88,10 +114,14 @@ class LogoutResource(MethodView):
     """
     POST /api/auth/logout
     - @jwt_required(): přidá aktuální access token do blacklistu
+    - záznam nese expiraci tokenu, po ní se z blacklistu smaže
     """
     @jwt_required()
     def post(self):
-        jti = get_jwt()["jti"]
-        db.session.add(TokenBlacklist(jti=jti))
+        claims     = get_jwt()
+        jti        = claims["jti"]
+        expires_at = datetime.utcfromtimestamp(claims["exp"]) if "exp" in claims else None
+        db.session.add(TokenBlacklist(jti=jti, expires_at=expires_at))
         db.session.commit()
+        current_app.extensions["token_revocation"].add(jti, expires_at)
         return {"msg": "Token zablokován, jste odhlášeni."}, 200
@@ -1,23 +1,31 @@
-import os
 from functools import wraps
 from datetime import datetime, date, timedelta
 
 from flask.views import MethodView
-from flask import request, current_app, jsonify, url_for
+from flask import request, current_app, jsonify, url_for, Response
 from flask_smorest import abort
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import selectinload
-from sqlalchemy import func
+from sqlalchemy import case, and_, not_
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
-from werkzeug.utils import secure_filename
 
 from ..db import db
+from ..menu_cache import bump_menu_version, menu_response
+from .. import occupancy, points, outbox, inbox
+from ..availability import TYPY as TYPY_TERMINU, Zmena, invalidate_availability, prirad_stul, volne_terminy
+from ..pagination import paginate
+from ..fieldsets import FieldSet
+from ..images import save_upload
+from ..streaming import stream_format, stream_response
+from ..bulk import bulk_mode, bulk_items, bulk_create, bulk_update, bulk_delete
+from ..roles import get_role_cache
+from ..events import get_hub, sse_stream, TooManyConnections
 from ..models import (
     Zakaznik, VernostniUcet, Stul, Salonek, PodnikovaAkce,
     Workshop, Rezervace, Notifikace,
     Objednavka, PolozkaObjednavky, Platba, Hodnoceni,
     PolozkaMenu, PolozkaMenuAlergen, JidelniPlan,
-    PolozkaJidelnihoPlanu, Alergen, Role
+    PolozkaJidelnihoPlanu, Alergen, user_roles, BodovyPohyb
 )
 from ..schemas import (
     ZakaznikSchema, ZakaznikCreateSchema,
@@ -30,30 +38,33 @@ from ..schemas import (
     PolozkaObjednavkySchema, PolozkaObjednavkyCreateSchema,
     PlatbaSchema, PlatbaCreateSchema,
     HodnoceniSchema, HodnoceniCreateSchema,
-    PolozkaMenuSchema, PolozkaMenuCreateSchema,
+    PolozkaMenuSchema, PolozkaMenuCreateSchema, PolozkaMenuAlergenCreateSchema,
     JidelniPlanSchema, JidelniPlanCreateSchema,
     PolozkaJidelnihoPlanuSchema, PolozkaJidelnihoPlanuCreateSchema,
     AlergenSchema, AlergenCreateSchema,
-    NotifikaceSchema, NotifikaceCreateSchema,
+    NotifikaceSchema, NotifikaceCreateSchema, NotifikacePrectenoSchema,
     RezervaceSchema, RezervaceCreateSchema,
-    RedeemSchema
+    RedeemSchema, BodovyPohybSchema
 )
 from . import api_bp
 
 # ──────────────────────────────────────────────────────────────────────────────
 # HELPER: Kontrola dostupnosti stolu
 # ──────────────────────────────────────────────────────────────────────────────
-def is_table_available(table_id, dt, persons):
+def is_table_available(table_id, dt, persons, delka_minut=None):
     table = db.session.get(Stul, table_id)
     if not table:
         abort(404, message="Stůl nenalezen.")
-    occupied = db.session.query(
-        func.coalesce(func.sum(Rezervace.pocet_osob), 0)
-    ).filter_by(
-        id_stul=table_id,
-        datum_cas=dt
-    ).scalar()
-    return (occupied + persons) <= table.kapacita
+    return (occupancy.obsazeno("stul", table_id, dt, delka_minut) + persons) <= table.kapacita
+
+# ──────────────────────────────────────────────────────────────────────────────
+# HELPER: Obrázek z formuláře (salonek, akce, workshop, položka menu)
+# ──────────────────────────────────────────────────────────────────────────────
+def attach_uploaded_image(obj):
+    """Uloží request.files['obrazek'] (viz app/images.py) a nastaví obj.obrazek_filename."""
+    filename = save_upload(request.files.get('obrazek'))
+    if filename:
+        obj.obrazek_filename = filename
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Dekorátory pro omezení přístupu
@@ -63,10 +74,12 @@ def must_be_self_or_admin(param_name="id_zakaznika"):
         @wraps(fn)
         def wrapper(*args, **kwargs):
             current_id = int(get_jwt_identity())
-            roles      = set(get_jwt().get("roles", []))
             target_id  = int(kwargs.get(param_name))
-            if current_id != target_id and not roles.intersection({"staff","admin"}):
-                abort(403, message="Nemáte oprávnění.")
+            if current_id != target_id:
+                # aktuální role z cache rolí (ne z claimů tokenu) → odebraná role platí hned
+                roles = get_role_cache().user_roles(current_id) or set()
+                if not roles.intersection({"staff","admin"}):
+                    abort(403, message="Nemáte oprávnění.")
             return fn(*args, **kwargs)
         return wrapper
     return decorator
@@ -96,10 +109,17 @@ class ZakaznikList(MethodView):
         if not roles.intersection({"staff","admin"}):
             abort(403, message="Nemáte oprávnění zobrazit všechny zákazníky.")
         role_filter = request.args.get("role")
-        stmt        = db.select(Zakaznik)
+        fs          = FieldSet(Zakaznik, ZakaznikSchema, many=True)
+        stmt        = fs.apply(db.select(Zakaznik), Zakaznik.prijmeni, Zakaznik.email)
         if role_filter:
-            stmt = stmt.join(Zakaznik.roles).where(Role.name == role_filter)
-        return db.session.scalars(stmt).all()
+            # id role z cache rolí → stačí JOIN na user_roles bez tabulky role
+            stmt = stmt.join(user_roles, user_roles.c.zakaznik_id == Zakaznik.id_zakaznika) \
+                       .where(user_roles.c.role_id == get_role_cache().role_id(role_filter))
+        if stream_format():
+            return stream_response(stmt.order_by(Zakaznik.id_zakaznika), fs.dump_one)
+        rows = paginate(stmt, Zakaznik.id_zakaznika,
+                        sorts={"prijmeni": Zakaznik.prijmeni, "email": Zakaznik.email})
+        return jsonify(fs.dump(rows)), 200
 
     @jwt_required()
     @api_bp.arguments(ZakaznikCreateSchema)
@@ -108,12 +128,14 @@ class ZakaznikList(MethodView):
         roles = set(get_jwt().get("roles", []))
         if not roles.intersection({"staff","admin"}):
             abort(403, message="Nemáte oprávnění vytvářet zákazníky.")
-        zak       = Zakaznik(**new_data)
-        user_role = db.session.query(Role).filter_by(name="user").one()
-        zak.roles.append(user_role)
+        zak          = Zakaznik(**new_data)
+        user_role_id = get_role_cache().role_id("user")
+        if user_role_id is None:
+            abort(500, message="Chybí role 'user'.")
         try:
             db.session.add(zak)
             db.session.flush()
+            db.session.execute(user_roles.insert().values(zakaznik_id=zak.id_zakaznika, role_id=user_role_id))
             ucet = VernostniUcet(body=0, datum_zalozeni=date.today(), zakaznik=zak)
             db.session.add(ucet)
             db.session.commit()
@@ -131,10 +153,11 @@ class ZakaznikItem(MethodView):
         roles      = set(get_jwt().get("roles", []))
         if current_id != id_zakaznika and not roles.intersection({"staff","admin"}):
             abort(403, message="Nemáte oprávnění zobrazit tohoto zákazníka.")
-        zak = db.session.get(Zakaznik, id_zakaznika)
+        fs  = FieldSet(Zakaznik, ZakaznikSchema)
+        zak = fs.get(id_zakaznika)
         if not zak:
             abort(404, message="Zákazník nenalezen.")
-        return zak
+        return jsonify(fs.dump(zak)), 200
 
     @jwt_required()
     @must_be_self_or_admin("id_zakaznika")
@@ -167,20 +190,29 @@ def register_crud(
     route_base, model, schema_cls, create_schema_cls, pk_name,
     roles_list=("staff","admin"), roles_create=("staff","admin"),
     roles_item_get=("staff","admin"), roles_update=("staff","admin"),
-    roles_delete=("staff","admin")
+    roles_delete=("staff","admin"), after_write=None
 ):
     def check_roles(allowed):
         roles = set(get_jwt().get("roles", []))
         if not roles.intersection(allowed):
             abort(403, message="Nemáte oprávnění.")
 
+    def notify_write():
+        if after_write:
+            after_write()
+
     @api_bp.route(f"/{route_base}")
     class ListView(MethodView):
         @jwt_required()
         @api_bp.response(200, schema_cls(many=True))
         def get(self):
             check_roles(roles_list)
-            return db.session.scalars(db.select(model)).all()
+            fs   = FieldSet(model, schema_cls, many=True)
+            pk   = getattr(model, pk_name)
+            if stream_format():
+                return stream_response(fs.apply(db.select(model)).order_by(pk), fs.dump_one)
+            rows = paginate(fs.apply(db.select(model)), pk)
+            return jsonify(fs.dump(rows)), 200
 
         @jwt_required()
         @api_bp.arguments(create_schema_cls)
@@ -194,6 +226,7 @@ def register_crud(
             except IntegrityError:
                 db.session.rollback()
                 abort(409, message="Duplicitní nebo neplatný záznam.")
+            notify_write()
             return obj
 
     @api_bp.route(f"/{route_base}/<int:{pk_name}>")
@@ -202,10 +235,11 @@ def register_crud(
         @api_bp.response(200, schema_cls)
         def get(self, **kwargs):
             check_roles(roles_item_get)
-            obj = db.session.get(model, kwargs[pk_name])
+            fs  = FieldSet(model, schema_cls)
+            obj = fs.get(kwargs[pk_name])
             if not obj:
                 abort(404, message=f"{model.__tablename__.capitalize()} nenalezen.")
-            return obj
+            return jsonify(fs.dump(obj)), 200
 
         @jwt_required()
         @api_bp.arguments(schema_cls(partial=True))
@@ -218,6 +252,7 @@ def register_crud(
             for k, v in data.items():
                 setattr(obj, k, v)
             db.session.commit()
+            notify_write()
             return obj
 
         @jwt_required()
@@ -229,19 +264,75 @@ def register_crud(
                 abort(404, message=f"{model.__tablename__.capitalize()} nenalezen.")
             db.session.delete(obj)
             db.session.commit()
+            notify_write()
             return ""
 
+    register_bulk(route_base, model, create_schema_cls, (pk_name,), update_schema_cls=schema_cls,
+                  roles_create=roles_create, roles_update=roles_update, roles_delete=roles_delete,
+                  after_write=after_write)
+
+def register_bulk(
+    route_base, model, create_schema_cls, pk_names, update_schema_cls=None,
+    roles_create=("staff","admin"), roles_update=("staff","admin"),
+    roles_delete=("staff","admin"), after_write=None
+):
+    """
+    POST/PUT/DELETE /{route_base}/bulk – hromadné zápisy (viz app/bulk.py).
+    Bez update_schema_cls se PUT neregistruje (např. vazební tabulky).
+    """
+    label = model.__tablename__.capitalize()
+
+    def check_roles(allowed):
+        roles = set(get_jwt().get("roles", []))
+        if not roles.intersection(allowed):
+            abort(403, message="Nemáte oprávnění.")
+
+    def finish(writer, ok_status):
+        body, status = writer.response(ok_status)
+        if status < 300 or status == 207:
+            db.session.commit()
+            if body["ok"] and after_write:
+                after_write()                 # jednou za dávku, ne za položku
+        else:
+            db.session.rollback()
+        return jsonify(body), status
+
+    @jwt_required()
+    def post(self):
+        check_roles(roles_create)
+        mode, items = bulk_mode(), bulk_items()
+        return finish(bulk_create(model, pk_names, create_schema_cls(), items, mode), 201)
+
+    @jwt_required()
+    def put(self):
+        check_roles(roles_update)
+        mode, items = bulk_mode(), bulk_items()
+        schema = update_schema_cls(partial=True)
+        return finish(bulk_update(model, pk_names, schema, items, mode, label), 200)
+
+    @jwt_required()
+    def delete(self):
+        check_roles(roles_delete)
+        mode, items = bulk_mode(), bulk_items()
+        return finish(bulk_delete(model, pk_names, items, mode, label), 200)
+
+    methods = {"post": post, "delete": delete}
+    if update_schema_cls is not None:
+        methods["put"] = put
+    # MethodView zjišťuje metody při vytvoření třídy → sestavit ji až se známou sadou
+    BulkView = type(f"{route_base.title().replace('-', '')}Bulk", (MethodView,), methods)
+    api_bp.route(f"/{route_base}/bulk")(BulkView)
+
 # ──────────────────────────────────────────────────────────────────────────────
 # CRUD pro základní entity
 # ──────────────────────────────────────────────────────────────────────────────
-for base, model, sc, cc, pk in [
-    ('ucet',      VernostniUcet,       VernostniUcetSchema,      VernostniUcetCreateSchema,      'id_ucet'),
-    ('stul',      Stul,                 StulSchema,                StulCreateSchema,                'id_stul'),
-    ('menu',      PolozkaMenu,          PolozkaMenuSchema,         PolozkaMenuCreateSchema,         'id_menu_polozka'),
-    ('alergen',   Alergen,              AlergenSchema,             AlergenCreateSchema,             'id_alergenu'),
-    ('meal-plans',JidelniPlan,          JidelniPlanSchema,         JidelniPlanCreateSchema,         'id_plan'),
+for base, model, sc, cc, pk, hook in [
+    ('ucet',      VernostniUcet,       VernostniUcetSchema,      VernostniUcetCreateSchema,      'id_ucet',         None),
+    ('stul',      Stul,                 StulSchema,                StulCreateSchema,                'id_stul',         invalidate_availability),
+    ('alergen',   Alergen,              AlergenSchema,             AlergenCreateSchema,             'id_alergenu',     bump_menu_version),
+    ('meal-plans',JidelniPlan,          JidelniPlanSchema,         JidelniPlanCreateSchema,         'id_plan',         None),
 ]:
-    register_crud(base, model, sc, cc, pk)
+    register_crud(base, model, sc, cc, pk, after_write=hook)
 
 # ──────────────────────────────────────────────────────────────────────────────
 # SALONEK endpoints (s obrázkem)
@@ -251,29 +342,26 @@ class SalonekList(MethodView):
     @jwt_required()
     @api_bp.response(200, SalonekSchema(many=True))
     def get(self):
-        return db.session.scalars(db.select(Salonek)).all()
+        fs   = FieldSet(Salonek, SalonekSchema, many=True)
+        rows = paginate(fs.apply(db.select(Salonek)), Salonek.id_salonek)
+        return jsonify(fs.dump(rows)), 200
 
     @jwt_required()
     @api_bp.arguments(SalonekCreateSchema, location="form")
     @api_bp.response(201, SalonekSchema)
     def post(self, new_data):
-        file = request.files.get('obrazek')
-        obj  = Salonek(**new_data)
-        if file:
-            filename = secure_filename(file.filename)
-            dest     = os.path.join(current_app.root_path, 'static', 'images')
-            os.makedirs(dest, exist_ok=True)
-            file.save(os.path.join(dest, filename))
-            obj.obrazek_filename = filename
         roles = set(get_jwt().get("roles", []))
         if not roles.intersection({"staff","admin"}):
             abort(403, message="Nemáte oprávnění vytvářet salonek.")
+        obj = Salonek(**new_data)
+        attach_uploaded_image(obj)
         try:
             db.session.add(obj)
             db.session.commit()
         except IntegrityError:
             db.session.rollback()
             abort(409, message="Duplicitní nebo neplatný záznam.")
+        invalidate_availability()
         return obj
 
 @api_bp.route("/salonek/<int:id_salonek>")
@@ -281,10 +369,11 @@ class SalonekItem(MethodView):
     @jwt_required()
     @api_bp.response(200, SalonekSchema)
     def get(self, id_salonek):
-        obj = db.session.get(Salonek, id_salonek)
+        fs  = FieldSet(Salonek, SalonekSchema)
+        obj = fs.get(id_salonek)
         if not obj:
             abort(404, message="Salonek nenalezen.")
-        return obj
+        return jsonify(fs.dump(obj)), 200
 
     @jwt_required()
     @api_bp.arguments(SalonekCreateSchema(partial=True), location="form")
@@ -293,16 +382,11 @@ class SalonekItem(MethodView):
         obj = db.session.get(Salonek, id_salonek)
         if not obj:
             abort(404, message="Salonek nenalezen.")
-        file = request.files.get('obrazek')
-        if file:
-            filename = secure_filename(file.filename)
-            dest     = os.path.join(current_app.root_path, 'static', 'images')
-            os.makedirs(dest, exist_ok=True)
-            file.save(os.path.join(dest, filename))
-            obj.obrazek_filename = filename
+        attach_uploaded_image(obj)
         for k, v in data.items():
             setattr(obj, k, v)
         db.session.commit()
+        invalidate_availability()
         return obj
 
     @jwt_required()
@@ -313,6 +397,7 @@ class SalonekItem(MethodView):
             abort(404, message="Salonek nenalezen.")
         db.session.delete(obj)
         db.session.commit()
+        invalidate_availability()
         return ""
 
 # ──────────────────────────────────────────────────────────────────────────────
@@ -323,23 +408,20 @@ class AkceList(MethodView):
     @jwt_required()
     @api_bp.response(200, PodnikovaAkceSchema(many=True))
     def get(self):
-        return db.session.scalars(db.select(PodnikovaAkce)).all()
+        fs   = FieldSet(PodnikovaAkce, PodnikovaAkceSchema, many=True)
+        rows = paginate(fs.apply(db.select(PodnikovaAkce), PodnikovaAkce.datum),
+                        PodnikovaAkce.id_akce, sorts={"datum": PodnikovaAkce.datum})
+        return jsonify(fs.dump(rows)), 200
 
     @jwt_required()
     @api_bp.arguments(PodnikovaAkceCreateSchema, location="form")
     @api_bp.response(201, PodnikovaAkceSchema)
     def post(self, new_data):
-        file = request.files.get('obrazek')
-        obj  = PodnikovaAkce(**new_data)
-        if file:
-            filename = secure_filename(file.filename)
-            dest     = os.path.join(current_app.root_path, 'static', 'images')
-            os.makedirs(dest, exist_ok=True)
-            file.save(os.path.join(dest, filename))
-            obj.obrazek_filename = filename
         roles = set(get_jwt().get("roles", []))
         if not roles.intersection({"staff","admin"}):
             abort(403, message="Nemáte oprávnění vytvářet akce.")
+        obj = PodnikovaAkce(**new_data)
+        attach_uploaded_image(obj)
         try:
             db.session.add(obj)
             db.session.commit()
@@ -353,10 +435,11 @@ class AkceItem(MethodView):
     @jwt_required()
     @api_bp.response(200, PodnikovaAkceSchema)
     def get(self, id_akce):
-        obj = db.session.get(PodnikovaAkce, id_akce)
+        fs  = FieldSet(PodnikovaAkce, PodnikovaAkceSchema)
+        obj = fs.get(id_akce)
         if not obj:
             abort(404, message="Akce nenalezena.")
-        return obj
+        return jsonify(fs.dump(obj)), 200
 
     @jwt_required()
     @api_bp.arguments(PodnikovaAkceCreateSchema(partial=True), location="form")
@@ -365,13 +448,7 @@ class AkceItem(MethodView):
         obj = db.session.get(PodnikovaAkce, id_akce)
         if not obj:
             abort(404, message="Akce nenalezena.")
-        file = request.files.get('obrazek')
-        if file:
-            filename = secure_filename(file.filename)
-            dest     = os.path.join(current_app.root_path, 'static', 'images')
-            os.makedirs(dest, exist_ok=True)
-            file.save(os.path.join(dest, filename))
-            obj.obrazek_filename = filename
+        attach_uploaded_image(obj)
         for k, v in data.items():
             setattr(obj, k, v)
         db.session.commit()
@@ -395,23 +472,20 @@ class WorkshopList(MethodView):
     @jwt_required()
     @api_bp.response(200, WorkshopSchema(many=True))
     def get(self):
-        return db.session.scalars(db.select(Workshop)).all()
+        fs   = FieldSet(Workshop, WorkshopSchema, many=True)
+        rows = paginate(fs.apply(db.select(Workshop), Workshop.cas_konani),
+                        Workshop.id_workshop, sorts={"cas_konani": Workshop.cas_konani})
+        return jsonify(fs.dump(rows)), 200
 
     @jwt_required()
     @api_bp.arguments(WorkshopCreateSchema, location="form")
     @api_bp.response(201, WorkshopSchema)
     def post(self, new_data):
-        file = request.files.get('obrazek')
-        obj  = Workshop(**new_data)
-        if file:
-            filename = secure_filename(file.filename)
-            dest     = os.path.join(current_app.root_path, 'static', 'images')
-            os.makedirs(dest, exist_ok=True)
-            file.save(os.path.join(dest, filename))
-            obj.obrazek_filename = filename
         roles = set(get_jwt().get("roles", []))
         if not roles.intersection({"staff","admin"}):
             abort(403, message="Nemáte oprávnění vytvářet workshopy.")
+        obj = Workshop(**new_data)
+        attach_uploaded_image(obj)
         try:
             db.session.add(obj)
             db.session.commit()
@@ -425,10 +499,11 @@ class WorkshopItem(MethodView):
     @jwt_required()
     @api_bp.response(200, WorkshopSchema)
     def get(self, id_workshop):
-        obj = db.session.get(Workshop, id_workshop)
+        fs  = FieldSet(Workshop, WorkshopSchema)
+        obj = fs.get(id_workshop)
         if not obj:
             abort(404, message="Workshop nenalezena.")
-        return obj
+        return jsonify(fs.dump(obj)), 200
 
     @jwt_required()
     @api_bp.arguments(WorkshopCreateSchema(partial=True), location="form")
@@ -437,13 +512,7 @@ class WorkshopItem(MethodView):
         obj = db.session.get(Workshop, id_workshop)
         if not obj:
             abort(404, message="Workshop nenalezena.")
-        file = request.files.get('obrazek')
-        if file:
-            filename = secure_filename(file.filename)
-            dest     = os.path.join(current_app.root_path, 'static', 'images')
-            os.makedirs(dest, exist_ok=True)
-            file.save(os.path.join(dest, filename))
-            obj.obrazek_filename = filename
+        attach_uploaded_image(obj)
         for k, v in data.items():
             setattr(obj, k, v)
         db.session.commit()
@@ -467,41 +536,90 @@ class ObjednavkyResource(MethodView):
     @jwt_required()
     @api_bp.response(200, ObjednavkaSchema(many=True))
     def get(self):
+        """
+        GET /api/objednavky
+        - staff/admin vidí všechny objednávky, ostatní jen své
+        - stav ("Čeká na platbu" / "Ve zpracování" / "Hotovo") se počítá v SQL
+          přes EXISTS nad platbou → celá stránka = jeden dotaz
+        - ?stav=<stav>             filtr podle spočítaného stavu
+        - stránkování kurzorem (viz pagination.paginate)
+        - Accept: application/x-ndjson nebo ?stream=1 → všechny objednávky
+          streamem bez stránkování (viz app/streaming.py)
+        """
         user_id = int(get_jwt_identity())
         roles   = set(get_jwt().get("roles", []))
-        if roles.intersection({"staff","admin"}):
-            objednavky = db.session.scalars(db.select(Objednavka)).all()
-        else:
-            objednavky = db.session.scalars(
-                db.select(Objednavka).where(Objednavka.id_zakaznika == user_id)
-            ).all()
-
-        now    = datetime.utcnow()
-        result = []
-        for o in objednavky:
-            paid = db.session.query(Platba).filter_by(id_objednavky=o.id_objednavky).first()
-            stav = (
-                "Čeká na platbu" if not paid else
-                ("Ve zpracování" if (o.cas_pripravy and now < o.cas_pripravy) else "Hotovo")
-            )
-            result.append({
-                "id_objednavky":  o.id_objednavky,
-                "stav":           stav,
-                "celkova_castka": float(o.celkova_castka),
-                "body_ziskane":   o.body_ziskane,
-                "cas_pripravy":   o.cas_pripravy.isoformat() if o.cas_pripravy else None
-            })
-        return jsonify(result), 200
+        now     = datetime.utcnow()
+
+        zaplaceno = (
+            db.select(Platba.id_platba)
+              .where(Platba.id_objednavky == Objednavka.id_objednavky)
+              .exists()
+        )
+        ve_zpracovani = and_(
+            Objednavka.cas_pripravy.is_not(None),
+            Objednavka.cas_pripravy > now
+        )
+        stav_podminky = {
+            "Čeká na platbu": ~zaplaceno,
+            "Ve zpracování":  and_(zaplaceno, ve_zpracovani),
+            "Hotovo":         and_(zaplaceno, not_(ve_zpracovani)),
+        }
+        stav_expr = case(
+            (~zaplaceno, "Čeká na platbu"),
+            (ve_zpracovani, "Ve zpracování"),
+            else_="Hotovo"
+        )
+
+        stmt = db.select(
+            Objednavka.id_objednavky,
+            Objednavka.datum_cas,
+            Objednavka.celkova_castka,
+            Objednavka.body_ziskane,
+            Objednavka.cas_pripravy,
+            stav_expr.label("stav")
+        )
+        if not roles.intersection({"staff","admin"}):
+            stmt = stmt.where(Objednavka.id_zakaznika == user_id)
+
+        stav_filter = request.args.get("stav")
+        if stav_filter:
+            if stav_filter not in stav_podminky:
+                abort(400, message="Neznámý stav objednávky.")
+            stmt = stmt.where(stav_podminky[stav_filter])
+
+        def radek(r):
+            return {
+                "id_objednavky":  r.id_objednavky,
+                "stav":           r.stav,
+                "celkova_castka": float(r.celkova_castka) if r.celkova_castka is not None else None,
+                "body_ziskane":   r.body_ziskane,
+                "cas_pripravy":   r.cas_pripravy.isoformat() if r.cas_pripravy else None
+            }
+
+        if stream_format():
+            return stream_response(stmt.order_by(Objednavka.id_objednavky), radek, scalars=False)
+
+        rows = paginate(stmt, Objednavka.id_objednavky,
+                        sorts={"datum_cas": Objednavka.datum_cas})
+        return jsonify([radek(r) for r in rows]), 200
 
     @jwt_required()
     @api_bp.arguments(ObjednavkaUserCreateSchema, location="json")
     @api_bp.response(201, ObjednavkaSchema)
     def post(self, order_data):
+        """
+        POST /api/objednavky
+        - vše v jedné transakci: objednávka, položky (jeden hromadný INSERT),
+          notifikace i změna bodů → jeden commit
+        - body se mění atomickým UPDATE (body = body ± n) místo SELECT … FOR UPDATE;
+          zámek na řádku věrnostního účtu se drží jen od tohoto UPDATE do commitu
+        - počet SQL příkazů nezávisí na počtu položek
+        """
         user_id        = int(get_jwt_identity())
         items          = order_data["items"]
         apply_discount = order_data.get("apply_discount", False)
 
-        menu_ids = [it["id_menu_polozka"] for it in items]
+        menu_ids = {it["id_menu_polozka"] for it in items}
         menu_items = {
             m.id_menu_polozka: m
             for m in db.session.query(PolozkaMenu)
@@ -526,53 +644,45 @@ class ObjednavkyResource(MethodView):
 
         prep_minutes = max_prep_time * max_prep_count if max_prep_time and max_prep_count else 0
 
-        account = (db.session.query(VernostniUcet)
-                         .filter_by(id_zakaznika=user_id)
-                         .with_for_update()
-                         .one_or_none())
-        if not account:
-            account = VernostniUcet(body=0, datum_zalozeni=date.today(), zakaznik_id=user_id)
-            db.session.add(account)
-            db.session.flush()
-
+        # sleva: podmíněný odečet bodů (viz app/points.py), o výsledku rozhodne rowcount
         discount_amount = 0
-        if apply_discount and account.body >= 400:
+        if apply_discount and points.redeem(user_id, 400, typ=points.SLEVA):
             discount_amount = 200
-            account.body   -= 400
 
         objednavka = Objednavka(
-            id_zakaznika   = user_id,
-            cas_pripravy   = datetime.utcnow() + timedelta(minutes=prep_minutes),
-            body_ziskane   = (total_points if not apply_discount else 0),
-            celkova_castka = total_price - discount_amount
+            id_zakaznika    = user_id,
+            cas_pripravy    = datetime.utcnow() + timedelta(minutes=prep_minutes),
+            body_ziskane    = (total_points if not apply_discount else 0),
+            discount_amount = discount_amount,
+            celkova_castka  = total_price - discount_amount
         )
         db.session.add(objednavka)
         db.session.flush()
 
-        for it in items:
-            polo = menu_items[it["id_menu_polozka"]]
-            pi   = PolozkaObjednavky(
-                mnozstvi     = it.get("mnozstvi", 1),
-                cena         = polo.cena,
-                objednavka   = objednavka,
-                menu_polozka = polo
-            )
-            db.session.add(pi)
-
-        if not apply_discount:
-            account.body += total_points
-        db.session.add(account)
-        db.session.commit()
+        db.session.execute(
+            db.insert(PolozkaObjednavky),
+            [
+                {
+                    "mnozstvi":        it.get("mnozstvi", 1),
+                    "cena":            menu_items[it["id_menu_polozka"]].cena,
+                    "id_objednavky":   objednavka.id_objednavky,
+                    "id_menu_polozka": it["id_menu_polozka"],
+                }
+                for it in items
+            ]
+        )
 
-        notif = Notifikace(
-            typ="OBJEDNAVKA_VYTVOŘENA",
-            datum_cas=datetime.utcnow(),
-            text=f"Objednávka č. {objednavka.id_objednavky} byla vytvořena.",
-            id_objednavky=objednavka.id_objednavky,
-            id_zakaznika=user_id
+        outbox.notifikace(
+            user_id, "OBJEDNAVKA_VYTVOŘENA",
+            f"Objednávka č. {objednavka.id_objednavky} byla vytvořena.",
+            id_objednavky=objednavka.id_objednavky
         )
-        db.session.add(notif)
+
+        # připsání bodů = nový pohyb v knize, řádek účtu se nezamyká
+        if not apply_discount and total_points:
+            points.earn(user_id, total_points, id_objednavky=objednavka.id_objednavky)
         db.session.commit()
+        outbox.wake()
 
         return objednavka
 
@@ -581,38 +691,35 @@ class ObjednavkyResource(MethodView):
 # ──────────────────────────────────────────────────────────────────────────────
 @api_bp.route("/menu")
 class PolozkaMenuList(MethodView):
+    """
+    GET /api/menu (veřejné)
+    - odpovídá z předrenderovaného snapshotu (viz menu_cache), bez dotazu do DB
+    - ?kategorie= / ?den= filtrují nad snapshotem
+    - silný ETag, If-None-Match → 304, gzip podle Accept-Encoding
+    """
     @api_bp.response(200, PolozkaMenuSchema(many=True))
     def get(self):
-        stmt = (
-            db.select(PolozkaMenu)
-              .options(
-                selectinload(PolozkaMenu.alergeny)
-                  .selectinload(PolozkaMenuAlergen.alergen)
-              )
+        return menu_response(
+            kategorie=request.args.get("kategorie"),
+            den=request.args.get("den")
         )
-        return db.session.scalars(stmt).all()
 
     @jwt_required()
     @api_bp.arguments(PolozkaMenuCreateSchema, location="form")
     @api_bp.response(201, PolozkaMenuSchema)
     def post(self, new_data):
-        file = request.files.get('obrazek')
-        obj  = PolozkaMenu(**new_data)
-        if file:
-            filename = secure_filename(file.filename)
-            dest     = os.path.join(current_app.root_path, 'static', 'images')
-            os.makedirs(dest, exist_ok=True)
-            file.save(os.path.join(dest, filename))
-            obj.obrazek_filename = filename
         roles = set(get_jwt().get("roles", []))
         if not roles.intersection({"staff","admin"}):
             abort(403, message="Nemáte oprávnění vytvářet položky menu.")
+        obj = PolozkaMenu(**new_data)
+        attach_uploaded_image(obj)
         try:
             db.session.add(obj)
             db.session.commit()
         except IntegrityError:
             db.session.rollback()
             abort(409, message="Duplicitní nebo neplatný záznam.")
+        bump_menu_version()
         return obj
 
 @api_bp.route("/menu/<int:id_menu_polozka>")
@@ -639,19 +746,14 @@ class PolozkaMenuItem(MethodView):
         obj = db.session.get(PolozkaMenu, id_menu_polozka)
         if not obj:
             abort(404, message="Položka menu nenalezena.")
-        file = request.files.get('obrazek')
-        if file:
-            filename = secure_filename(file.filename)
-            dest     = os.path.join(current_app.root_path, 'static', 'images')
-            os.makedirs(dest, exist_ok=True)
-            file.save(os.path.join(dest, filename))
-            obj.obrazek_filename = filename
         roles = set(get_jwt().get("roles", []))
         if not roles.intersection({"staff","admin"}):
             abort(403, message="Nemáte oprávnění upravovat položky menu.")
+        attach_uploaded_image(obj)
         for k, v in data.items():
             setattr(obj, k, v)
         db.session.commit()
+        bump_menu_version()
         return obj
 
     @jwt_required()
@@ -665,8 +767,18 @@ class PolozkaMenuItem(MethodView):
             abort(404, message="Položka menu nenalezena.")
         db.session.delete(obj)
         db.session.commit()
+        bump_menu_version()
         return ""
 
+# generický CRUD pro menu až po vlastních endpointech výše, aby jejich pravidla
+# (veřejný GET /api/menu, upload obrázku) nebyla překryta generickým ListView/ItemView
+register_crud('menu', PolozkaMenu, PolozkaMenuSchema, PolozkaMenuCreateSchema, 'id_menu_polozka',
+              after_write=bump_menu_version)
+
+# vazby položka menu ↔ alergen: jen hromadně (nový týden menu = desítky vazeb najednou)
+register_bulk('menu-alergeny', PolozkaMenuAlergen, PolozkaMenuAlergenCreateSchema,
+              ('id_menu_polozka', 'id_alergenu'), after_write=bump_menu_version)
+
 # ──────────────────────────────────────────────────────────────────────────────
 # MEAL-PLANS endpoints
 # ──────────────────────────────────────────────────────────────────────────────
@@ -681,7 +793,7 @@ class MealPlansList(MethodView):
               .where(JidelniPlan.platny_od <= today)
               .where((JidelniPlan.platny_do.is_(None)) | (JidelniPlan.platny_do >= today))
         )
-        return db.session.scalars(stmt).all()
+        return paginate(stmt, JidelniPlan.id_plan, sorts={"platny_od": JidelniPlan.platny_od})
 
 @api_bp.route("/meal-plans/<int:id_plan>")
 class MealPlanItem(MethodView):
@@ -696,6 +808,13 @@ class MealPlanItem(MethodView):
 # ──────────────────────────────────────────────────────────────────────────────
 # REZERVACE endpoints
 # ──────────────────────────────────────────────────────────────────────────────
+KAPACITA_HLASKY = {
+    "stul":     "Vybraný stůl není dostupný.",
+    "salonek":  "Salonek nemá dostatečnou kapacitu.",
+    "akce":     "Akce nemá dostatečnou kapacitu.",
+    "workshop": "Workshop nemá dostatečnou kapacitu.",
+}
+
 @api_bp.route("/rezervace")
 class RezervaceList(MethodView):
     @jwt_required()
@@ -703,16 +822,13 @@ class RezervaceList(MethodView):
     def get(self):
         current_id = int(get_jwt_identity())
         roles      = set(get_jwt().get("roles", []))
-        base_stmt = (
-            db.select(Rezervace)
-            if roles.intersection({"staff","admin"})
-            else db.select(Rezervace).where(Rezervace.id_zakaznika == current_id)
-        )
-        # pagination
-        page     = request.args.get("page", 1, type=int)
-        per_page = request.args.get("per_page", 20, type=int)
-        stmt = base_stmt.limit(per_page).offset((page - 1) * per_page)
-        return db.session.scalars(stmt).all()
+        fs         = FieldSet(Rezervace, RezervaceSchema, many=True)
+        base_stmt = fs.apply(db.select(Rezervace), Rezervace.datum_cas)
+        if not roles.intersection({"staff","admin"}):
+            base_stmt = base_stmt.where(Rezervace.id_zakaznika == current_id)
+        rows = paginate(base_stmt, Rezervace.id_rezervace,
+                        sorts={"datum_cas": Rezervace.datum_cas})
+        return jsonify(fs.dump(rows)), 200
 
     @jwt_required()
     @api_bp.arguments(RezervaceCreateSchema)
@@ -725,93 +841,111 @@ class RezervaceList(MethodView):
 
         current_id = int(get_jwt_identity())
         new_data["id_zakaznika"] = current_id
-
-        # Kontrola dostupnosti stolu
-        if new_data.get("id_stul"):
-            if not is_table_available(
-                new_data["id_stul"],
-                new_data["datum_cas"],
-                new_data["pocet_osob"]
-            ):
-                abort(409, message="Vybraný stůl není dostupný.")
-
-        # Kontrola dostupnosti workshopu
-        if new_data.get("id_workshop"):
-            ws_id  = new_data["id_workshop"]
-            dt     = new_data["datum_cas"]
-            ppl    = new_data["pocet_osob"]
-            existing = db.session.query(
-                func.coalesce(func.sum(Rezervace.pocet_osob), 0)
-            ).filter_by(
-                id_workshop=ws_id,
-                datum_cas=dt
-            ).scalar()
-            workshop = db.session.get(Workshop, ws_id)
-            if not workshop:
-                abort(404, message="Workshop nenalezen.")
-            if existing + ppl > workshop.kapacita:
-                abort(409, message="Workshop nemá dostatečnou kapacitu.")
-
-        # Kontrola dostupnosti salonku
-        if new_data.get("id_salonek"):
-            sal_id = new_data["id_salonek"]
-            dt     = new_data["datum_cas"]
-            ppl    = new_data["pocet_osob"]
-            existing = db.session.query(
-                func.coalesce(func.sum(Rezervace.pocet_osob), 0)
-            ).filter_by(
-                id_salonek=sal_id,
-                datum_cas=dt
-            ).scalar()
-            salonek = db.session.get(Salonek, sal_id)
-            if not salonek:
-                abort(404, message="Salonek nenalezen.")
-            if existing + ppl > salonek.kapacita:
-                abort(409, message="Salonek nemá dostatečnou kapacitu.")
-
-        # Kontrola dostupnosti firemní akce
-        if new_data.get("id_akce"):
-            ak_id = new_data["id_akce"]
-            dt    = new_data["datum_cas"]
-            ppl   = new_data["pocet_osob"]
-            existing = db.session.query(
-                func.coalesce(func.sum(Rezervace.pocet_osob), 0)
-            ).filter_by(
-                id_akce=ak_id,
-                datum_cas=dt
-            ).scalar()
-            akce = db.session.get(PodnikovaAkce, ak_id)
-            if not akce:
-                abort(404, message="Akce nenalezena.")
-            if existing + ppl > akce.kapacita:
-                abort(409, message="Akce nemá dostatečnou kapacitu.")
+        new_data["delka_minut"]  = occupancy.delka_rezervace(new_data)
+        zmena = Zmena()
+
+        # Kontrola a zabrání kapacity: podmíněný UPDATE přes sloty intervalu
+        # pro každý zdroj rezervace (stůl / salonek / akce / workshop)
+        zdroje = occupancy.zdroje_rezervace(new_data)
+        for typ, id_zdroje in zdroje:
+            if not occupancy.reserve(typ, id_zdroje, new_data["datum_cas"], new_data["pocet_osob"],
+                                     new_data["delka_minut"]):
+                db.session.rollback()
+                abort(409, message=KAPACITA_HLASKY[typ])
+        if not zdroje:
+            # jen čas a počet osob → stůl vybere a zabere server (app/availability.py)
+            new_data["id_stul"] = prirad_stul(new_data["datum_cas"], new_data["pocet_osob"],
+                                              new_data["delka_minut"])
+            if new_data["id_stul"] is None:
+                db.session.rollback()
+                abort(409, message="V tomto čase není volný žádný stůl pro daný počet osob.")
+            new_data["stul_prirazen"] = True
 
         rez = Rezervace(**new_data)
         try:
             db.session.add(rez)
+            db.session.flush()
+            # notifikace jde přes outbox ve stejné transakci (jeden commit)
+            outbox.notifikace(
+                current_id, "REZERVACE_VYTVOŘENA",
+                f"Rezervace č. {rez.id_rezervace} byla vytvořena.",
+                id_rezervace=rez.id_rezervace
+            )
             db.session.commit()
         except IntegrityError:
             db.session.rollback()
             abort(409, message="Duplicitní nebo neplatný záznam.")
-
-        notif = Notifikace(
-            typ="REZERVACE_VYTVOŘENA",
-            datum_cas=datetime.utcnow(),
-            text=f"Rezervace č. {rez.id_rezervace} byla vytvořena.",
-            id_rezervace=rez.id_rezervace,
-            id_zakaznika=current_id
-        )
-        db.session.add(notif)
-        db.session.commit()
+        zmena.hotovo(new_data)
+        outbox.wake()
         return rez
 
+@api_bp.route("/rezervace/volne")
+class VolneZdroje(MethodView):
+    """
+    GET /api/rezervace/volne?datum_cas=<ISO>&pocet_osob=N[&delka_minut=M][&typ=stul&typ=salonek]
+    - vrátí všechny stoly/salonky/akce/workshopy, kam se po celou dobu rezervace vejde N osob
+    - jeden dotaz do DB nad indexem obsazenosti
+    """
+    @jwt_required()
+    @api_bp.response(200)
+    def get(self):
+        try:
+            dt = datetime.fromisoformat(request.args["datum_cas"])
+        except (KeyError, ValueError):
+            abort(400, message="Chybí nebo je neplatný parametr 'datum_cas'.")
+        persons = request.args.get("pocet_osob", 1, type=int)
+        delka   = request.args.get("delka_minut", type=int)
+        typy    = request.args.getlist("typ") or None
+        return [
+            {"typ": r.typ, "id": r.id, "kapacita": r.kapacita, "volno": r.volno}
+            for r in occupancy.volne_zdroje(dt, persons, typy, delka)
+        ]
+
+@api_bp.route("/rezervace/availability")
+class DostupneTerminy(MethodView):
+    """
+    GET /api/rezervace/availability?pocet_osob=N[&od=<ISO>][&do=<ISO>][&delka_minut=M][&typ=stul][&limit=K]
+    - nejbližší volné termíny pro N osob přes všechny stoly a salonky, seřazené podle času
+    - od = nejdřívější začátek (výchozí teď), do = nejpozdější začátek
+      (výchozí a nejvýš REZERVACE_HLEDANI_DNI dní od `od`)
+    - odpovídá paměťový index obsazenosti (app/availability.py), bez dotazu do DB;
+      termín je jen nabídka, POST /api/rezervace ho potvrdí, nebo vrátí 409
+    """
+    @jwt_required()
+    @api_bp.response(200)
+    def get(self):
+        cfg     = current_app.config
+        persons = request.args.get("pocet_osob", type=int)
+        delka   = request.args.get("delka_minut", occupancy.vychozi_delka(), type=int)
+        limit   = request.args.get("limit", 10, type=int)
+        typy    = request.args.getlist("typ") or None
+        if not persons or persons < 1:
+            abort(400, message="Chybí nebo je neplatný parametr 'pocet_osob'.")
+        if not 1 <= delka <= 24 * 60:
+            abort(400, message="Parametr 'delka_minut' musí být 1–1440.")
+        if not 1 <= limit <= 100:
+            abort(400, message="Parametr 'limit' musí být 1–100.")
+        if typy and not set(typy) <= set(TYPY_TERMINU):
+            abort(400, message=f"Parametr 'typ' může být jen {', '.join(TYPY_TERMINU)}.")
+        try:
+            od = datetime.fromisoformat(request.args["od"]) if "od" in request.args else None
+            do = datetime.fromisoformat(request.args["do"]) if "do" in request.args else None
+        except ValueError:
+            abort(400, message="Neplatný parametr 'od' nebo 'do'.")
+
+        od  = max(od or datetime.utcnow(), datetime.utcnow())
+        nej = od + timedelta(days=cfg.get("REZERVACE_HLEDANI_DNI", 14))
+        do  = min(do or nej, nej)
+        return volne_terminy(od, do, persons, delka, typy, limit)
+
 @api_bp.route("/rezervace/<int:id_rezervace>")
 class RezervaceItem(MethodView):
     @jwt_required()
     @must_own_reservation_or_admin
     @api_bp.response(200, RezervaceSchema)
     def get(self, id_rezervace):
-        return db.session.get(Rezervace, id_rezervace)
+        fs = FieldSet(Rezervace, RezervaceSchema)
+        return jsonify(fs.dump(fs.get(id_rezervace))), 200
 
     @jwt_required()
     @must_own_reservation_or_admin
@@ -819,9 +953,22 @@ class RezervaceItem(MethodView):
     @api_bp.response(200, RezervaceSchema)
     def put(self, data, id_rezervace):
         rez = db.session.get(Rezervace, id_rezervace)
+        zmena      = Zmena(rez)
+        puvodni    = (rez.datum_cas, rez.pocet_osob, occupancy.delka_rezervace(rez))
+        novy       = (data.get("datum_cas", rez.datum_cas), data.get("pocet_osob", rez.pocet_osob),
+                      data.get("delka_minut") or puvodni[2])
+        if novy != puvodni:
+            # přesun v obsazenosti: uvolnit původní interval, zabrat nový
+            # (přidělený stůl zůstává výhradní i v novém intervalu)
+            for typ, id_zdroje in occupancy.zdroje_rezervace(rez):
+                occupancy.release(typ, id_zdroje, *puvodni)
+                if not occupancy.reserve(typ, id_zdroje, *novy, vyhradne=rez.stul_prirazen):
+                    db.session.rollback()
+                    abort(409, message=KAPACITA_HLASKY[typ])
         for k, v in data.items():
             setattr(rez, k, v)
         db.session.commit()
+        zmena.hotovo(rez)
         return rez
 
     @jwt_required()
@@ -829,8 +976,12 @@ class RezervaceItem(MethodView):
     @api_bp.response(204)
     def delete(self, id_rezervace):
         rez = db.session.get(Rezervace, id_rezervace)
+        zmena = Zmena(rez)
+        for typ, id_zdroje in occupancy.zdroje_rezervace(rez):
+            occupancy.release(typ, id_zdroje, rez.datum_cas, rez.pocet_osob, occupancy.delka_rezervace(rez))
         db.session.delete(rez)
         db.session.commit()
+        zmena.hotovo()
         return ""
 
 # ──────────────────────────────────────────────────────────────────────────────
@@ -853,15 +1004,9 @@ def create_platba_with_points(args):
     db.session.flush()
     zprava = f"Platba #{platba.id_platba} za {args['castka']} Kč úspěšná."
     objed  = db.session.get(Objednavka, platba.id_objednavky)
-    note   = Notifikace(
-        typ="PLATBA",
-        datum_cas=datetime.utcnow(),
-        text=zprava,
-        id_objednavky=platba.id_platba,
-        id_zakaznika = objed.id_zakaznika
-    )
-    db.session.add(note)
+    outbox.notifikace(objed.id_zakaznika, "PLATBA", zprava, id_objednavky=platba.id_objednavky)
     db.session.commit()
+    outbox.wake()
     return platba
 
 # ──────────────────────────────────────────────────────────────────────────────
@@ -869,17 +1014,83 @@ def create_platba_with_points(args):
 # ──────────────────────────────────────────────────────────────────────────────
 @api_bp.route("/users/me/notifications")
 class MyNotifications(MethodView):
+    """
+    GET /api/users/me/notifications – schránka, nejnovější první (kurzor jako ostatní seznamy)
+    - ?since=<id_notifikace>  jen novější než naposledy viděná (dotažení po připojení)
+    - ?unread=1               jen nepřečtené
+    Stránka je rozsah indexu ix_notifikace_schranka → stejná cena při 10 i 10 000 notifikacích.
+    """
     @jwt_required()
     @api_bp.response(200, NotifikaceSchema(many=True))
     def get(self):
         zak_id = int(get_jwt_identity())
-        notifs = (
-            db.session.query(Notifikace)
-              .filter_by(id_zakaznika=zak_id)
-              .order_by(Notifikace.datum_cas.desc())
-              .all()
-        )
-        return notifs
+        fs     = FieldSet(Notifikace, NotifikaceSchema, many=True)
+        stmt   = fs.apply(db.select(Notifikace), Notifikace.datum_cas).where(Notifikace.id_zakaznika == zak_id)
+        since  = request.args.get("since", type=int)
+        if since is not None:
+            stmt = stmt.where(Notifikace.id_notifikace > since)
+        if request.args.get("unread", "").lower() in ("1", "true"):
+            stmt = stmt.where(Notifikace.precteno.is_(False))
+        rows   = paginate(stmt, Notifikace.id_notifikace,
+                          sorts={"datum_cas": Notifikace.datum_cas}, default_sort="-datum_cas")
+        resp   = jsonify(fs.dump(rows))
+        resp.headers["X-Unread-Count"] = str(inbox.unread_count(zak_id))
+        return resp, 200
+
+@api_bp.route("/users/me/notifications/unread-count")
+class MyUnreadCount(MethodView):
+    @jwt_required()
+    @api_bp.response(200)
+    def get(self):
+        return {"neprectene": inbox.unread_count(int(get_jwt_identity()))}
+
+@api_bp.route("/users/me/notifications/read")
+class MarkNotificationsRead(MethodView):
+    """POST {"ids": [..]} nebo {"until_id": N} – hromadné označení jako přečtené."""
+    @jwt_required()
+    @api_bp.arguments(NotifikacePrectenoSchema)
+    @api_bp.response(200)
+    def post(self, data):
+        zak_id  = int(get_jwt_identity())
+        changed = inbox.mark_read(zak_id, ids=data.get("ids"), until_id=data.get("until_id"))
+        db.session.commit()
+        return {"oznaceno": changed, "neprectene": inbox.unread_count(zak_id)}
+
+# ──────────────────────────────────────────────────────────────────────────────
+# EVENTS (Server-Sent Events) endpoint
+# ──────────────────────────────────────────────────────────────────────────────
+@api_bp.route("/events")
+class EventStream(MethodView):
+    """
+    GET /api/events (text/event-stream)
+    - token lze poslat i jako ?token= (EventSource neumí hlavičky)
+    - události `notifikace` z kanálu přihlášeného uživatele, id = id_notifikace
+    - Last-Event-ID (hlavička nebo ?last_event_id=) → dočtení zmeškaných z DB
+    - heartbeat komentářem, omezený počet spojení na uživatele (jinak 429)
+    - spojení čeká na frontě bez DB session; gunicorn.conf.py spouští gevent
+      workery, takže nečinný odběratel drží greenlet, ne vlákno
+    """
+    @jwt_required()
+    def get(self):
+        user_id = int(get_jwt_identity())
+        last_id = request.headers.get("Last-Event-ID") or request.args.get("last_event_id") or 0
+        try:
+            last_id = int(last_id)
+        except ValueError:
+            abort(400, message="Neplatné Last-Event-ID.")
+
+        hub = get_hub()
+        try:
+            sub = hub.subscribe(user_id)
+        except TooManyConnections:
+            abort(429, message="Příliš mnoho otevřených spojení.")
+
+        app  = current_app._get_current_object()
+        resp = Response(sse_stream(app, sub, last_id), mimetype="text/event-stream")
+        resp.headers["Cache-Control"]     = "no-cache"
+        resp.headers["X-Accel-Buffering"] = "no"
+        resp.call_on_close(lambda: hub.unsubscribe(sub))
+        return resp
 
 # ──────────────────────────────────────────────────────────────────────────────
 # ME/POINTS endpoint
@@ -889,11 +1100,19 @@ class MyPoints(MethodView):
     @jwt_required()
     @api_bp.response(200, VernostniUcetSchema)
     def get(self):
-        zak_id = int(get_jwt_identity())
-        ucet   = db.session.query(VernostniUcet).filter_by(id_zakaznika=zak_id).one_or_none()
-        if not ucet:
+        stav = points.balance(int(get_jwt_identity()))
+        if stav is None:
             abort(404, message="Účet nenalezen.")
-        return ucet
+        return stav
+
+@api_bp.route("/users/me/points/history")
+class MyPointsHistory(MethodView):
+    @jwt_required()
+    @api_bp.response(200, BodovyPohybSchema(many=True))
+    def get(self):
+        zak_id = int(get_jwt_identity())
+        stmt   = db.select(BodovyPohyb).where(BodovyPohyb.id_zakaznika == zak_id)
+        return paginate(stmt, BodovyPohyb.id_pohybu)
 
 # ──────────────────────────────────────────────────────────────────────────────
 # ME/REDEEM endpoint
@@ -905,20 +1124,34 @@ class RedeemPoints(MethodView):
     @api_bp.response(200, VernostniUcetSchema)
     def post(self, data):
         zak_id = int(get_jwt_identity())
-        ucet   = db.session.query(VernostniUcet).filter_by(id_zakaznika=zak_id).with_for_update().one_or_none()
-        if not ucet:
-            abort(404, message="Účet nenalezen.")
-        points = data.get("points", 0)
-        if ucet.body < points:
+        amount = data["points"]
+        if not points.redeem(zak_id, amount):
+            db.session.rollback()
+            if points.balance(zak_id) is None:
+                abort(404, message="Účet nenalezen.")
             abort(400, message="Nedostatek bodů.")
-        ucet.body -= points
-        note = Notifikace(
-            typ="REDEEM",
-            datum_cas=datetime.utcnow(),
-            text=f"Uplatněno {points} bodů.",
-            id_zakaznika=zak_id
-        )
-        db.session.add(note)
-        db.session.add(ucet)
+        outbox.notifikace(zak_id, "REDEEM", f"Uplatněno {amount} bodů.")
         db.session.commit()
-        return ucet
+        outbox.wake()
+        return points.balance(zak_id)
+
+# ──────────────────────────────────────────────────────────────────────────────
+# INTERNÍ: statistiky connection poolu
+# ──────────────────────────────────────────────────────────────────────────────
+@api_bp.route("/_internal/pool")
+class PoolStatsView(MethodView):
+    """
+    GET /api/_internal/pool  (jen admin)
+    - profil poolu (DB_POOL_PROFILE) a pro každý engine: velikost, půjčená spojení,
+      přetečení nad pool_size, čekání na spojení (ms), timeouty, nová spojení
+    - jen čte čítače v paměti workeru, do DB nesahá
+    """
+    @jwt_required()
+    @api_bp.response(200)
+    def get(self):
+        if "admin" not in get_jwt().get("roles", []):
+            abort(403, message="Nemáte oprávnění.")
+        return {
+            "profile": current_app.config.get("DB_POOL_PROFILE"),
+            "engines": {name: s.snapshot() for name, s in current_app.extensions["pool_stats"].items()},
+        }
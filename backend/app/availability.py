@@ -0,0 +1,255 @@
+# app/availability.py
+
+"""
+Paměťový index obsazenosti stolů a salonků pro hledání volných termínů.
+
+Pro každý zdroj a den drží pole obsazenosti po slotech (REZERVACE_SLOT_MINUT),
+takže nejbližší volné termíny pro N osob přes všechny zdroje najde jeden průchod
+posuvným oknem v paměti, bez dotazu do DB a bez zkoušení časů jeden po druhém.
+  - index se postaví z tabulky rezervace při prvním hledání a pak po
+    REZERVACE_INDEX_MAX_AGE sekundách (rezervace z jiných workerů)
+  - vlastní zápisy workeru se do něj promítnou hned po commitu (Zmena)
+  - kapacity zdrojů mění invalidate() (CRUD stolů a salonků)
+Stejný index vybírá stůl pro rezervace bez id_stul (prirad_stul): stoly
+seřazené podle kapacity, první vhodná kapacita a v ní stůl, jehož volná mezera
+kolem rezervace je nejkratší – delší volné úseky zůstanou pro další hosty.
+Přidělený stůl se v indexu počítá jako plný (drží ho výhradně, viz occupancy).
+Autoritou zůstává tabulka obsazenost (app/occupancy.py): nalezený termín je
+jen nabídka, POST /api/rezervace ho potvrdí, nebo vrátí 409.
+Akce a workshopy mají pevný termín, jejich volná místa vrací /rezervace/volne.
+"""
+
+import heapq
+import threading
+from bisect import bisect_left
+import time
+from array import array
+from datetime import datetime, timedelta
+from itertools import islice
+from math import ceil
+
+from flask import current_app
+
+from .db import db
+from .models import Rezervace
+from . import occupancy
+from .occupancy import ZDROJE, casove_sloty, delka_rezervace, vyhradne_rezervace, zdroje_rezervace
+
+TYPY = ("stul", "salonek")
+
+
+class IndexObsazenosti:
+    def __init__(self, app):
+        self.slot      = app.config.get("REZERVACE_SLOT_MINUT", 15)
+        self.max_age   = app.config.get("REZERVACE_INDEX_MAX_AGE", 30)
+        otevreno, zavreno = app.config.get("REZERVACE_OTEVIRACI_DOBA", (0, 24))
+        self.za_den    = 24 * 60 // self.slot
+        self.otevreno  = otevreno * 60 // self.slot
+        self.zavreno   = zavreno * 60 // self.slot
+        self.verze     = 0       # zvyšuje každé přestavění (viz Zmena)
+        self._lock     = threading.Lock()
+        self._kapacity = {}      # (typ, id) -> kapacita
+        self._dny      = {}      # (typ, id) -> {číslo dne: array obsazenosti slotů}
+        self._stoly    = []      # [(kapacita, id_stul)] vzestupně – pro best-fit přidělení
+        self._built_at = None
+
+    # ── čas ↔ číslo slotu ─────────────────────────────────────────────
+    def cislo_slotu(self, dt):
+        return (dt.toordinal() * 1440 + dt.hour * 60 + dt.minute) // self.slot
+
+    def cas_slotu(self, cislo):
+        den, minuta = divmod(cislo * self.slot, 1440)
+        return datetime.fromordinal(den) + timedelta(minutes=minuta)
+
+    # ── údržba ────────────────────────────────────────────────────────
+    def invalidate(self):
+        with self._lock:
+            self._built_at = None
+
+    def _expired(self):
+        return self._built_at is None or time.monotonic() - self._built_at > self.max_age
+
+    def _rebuild(self):
+        self.verze    += 1
+        self._kapacity = {}
+        self._dny      = {}
+        # rezervace z předchozího dne mohou zasahovat do dneška
+        od = datetime.combine(datetime.utcnow().date() - timedelta(days=1), datetime.min.time())
+        for typ in TYPY:
+            model, pk, fk, _ = ZDROJE[typ]
+            for id_zdroje, kapacita in db.session.execute(db.select(pk, model.kapacita)):
+                self._kapacity[typ, id_zdroje] = kapacita
+            rows = db.session.execute(
+                db.select(fk, Rezervace.datum_cas, Rezervace.delka_minut, Rezervace.pocet_osob,
+                          Rezervace.stul_prirazen)
+                  .where(fk.is_not(None), Rezervace.datum_cas >= od)
+            )
+            for id_zdroje, dt, delka, osob, prirazen in rows:
+                self._pricist((typ, id_zdroje, dt, delka, osob, prirazen), 1)
+        self._stoly    = sorted((k, id_zdroje) for (typ, id_zdroje), k in self._kapacity.items() if typ == "stul")
+        self._built_at = time.monotonic()
+
+    def _pricist(self, zaznam, znamenko):
+        typ, id_zdroje, dt, delka, osob, vyhradne = zaznam
+        if vyhradne:
+            osob = self._kapacity.get((typ, id_zdroje), osob)
+        dny   = self._dny.setdefault((typ, id_zdroje), {})
+        sloty = casove_sloty(dt, delka)
+        prvni = self.cislo_slotu(sloty[0])
+        for cislo in range(prvni, prvni + len(sloty)):
+            den, i = divmod(cislo, self.za_den)
+            pole = dny.get(den)
+            if pole is None:
+                pole = dny[den] = array("i", bytes(4 * self.za_den))
+            pole[i] += znamenko * osob
+
+    def promitnout(self, pred, po, verze):
+        """Promítne změnu rezervace po commitu; index přestavěný mezitím se raději zahodí."""
+        with self._lock:
+            if self._built_at is None:
+                return
+            if verze != self.verze:
+                # přestavění mohlo, ale nemuselo změnu vidět → přestavět znovu
+                self._built_at = None
+                return
+            for zaznam in pred:
+                self._pricist(zaznam, -1)
+            for zaznam in po:
+                self._pricist(zaznam, 1)
+
+    # ── hledání ───────────────────────────────────────────────────────
+    def _plno(self, dny, cislo, persons, kapacita):
+        pole = dny.get(cislo // self.za_den)
+        return pole is not None and pole[cislo % self.za_den] + persons > kapacita
+
+    def _terminy(self, klic, kapacita, persons, prvni, posledni, delka):
+        """Začátky (číslo slotu, klíč) všech volných oken o `delka` slotech, vzestupně."""
+        dny = self._dny.get(klic, {})
+        blokovano = sum(self._plno(dny, j, persons, kapacita) for j in range(prvni, prvni + delka))
+        for i in range(prvni, posledni + 1):
+            v_den = i % self.za_den
+            if not blokovano and self.otevreno <= v_den and v_den + delka <= self.zavreno:
+                yield i, klic
+            blokovano += (self._plno(dny, i + delka, persons, kapacita)
+                          - self._plno(dny, i, persons, kapacita))
+
+    def _obsazeno(self, dny, cislo):
+        pole = dny.get(cislo // self.za_den)
+        return pole is not None and pole[cislo % self.za_den] > 0
+
+    def _mezera(self, dny, prvni, delka):
+        """Kolik volných slotů sousedí s oknem [prvni, prvni + delka) v rámci otevírací doby."""
+        den  = prvni // self.za_den * self.za_den
+        pred = prvni
+        while pred > den + self.otevreno and not self._obsazeno(dny, pred - 1):
+            pred -= 1
+        po   = prvni + delka
+        while po < den + self.zavreno and not self._obsazeno(dny, po):
+            po += 1
+        return (prvni - pred) + (po - prvni - delka)
+
+    def nejlepsi_stoly(self, dt, persons, delka_minut, pocet=5):
+        """
+        Stoly, které jsou po celý interval prázdné, v pořadí best-fit: nejmenší stačící
+        kapacita, v ní nejkratší volná mezera kolem rezervace.
+        """
+        sloty = casove_sloty(dt, delka_minut)
+        prvni = self.cislo_slotu(sloty[0])
+        with self._lock:
+            if self._expired():
+                self._rebuild()
+            kandidati = []
+            for kapacita, id_stul in self._stoly[bisect_left(self._stoly, (persons,)):]:
+                if len(kandidati) >= pocet and kapacita > kandidati[pocet - 1][0]:
+                    break                         # větší stoly už by jen plýtvaly místy
+                dny = self._dny.get(("stul", id_stul), {})
+                if any(self._obsazeno(dny, j) for j in range(prvni, prvni + len(sloty))):
+                    continue
+                kandidati.append((kapacita, self._mezera(dny, prvni, len(sloty)), id_stul))
+                kandidati.sort()
+        return [id_stul for _, _, id_stul in kandidati[:pocet]]
+
+    def hledat(self, od, do, persons, delka_minut, typy=None, limit=10):
+        """Nejbližší volné termíny pro `persons` osob přes všechny zdroje, seřazené podle času."""
+        prvni = self.cislo_slotu(od)
+        if self.cas_slotu(prvni) < od:
+            prvni += 1                      # začátky jen na hranách slotů
+        posledni = self.cislo_slotu(do)
+        delka    = ceil(delka_minut / self.slot)
+        with self._lock:
+            if self._expired():
+                self._rebuild()
+            proudy = [
+                self._terminy(klic, kapacita, persons, prvni, posledni, delka)
+                for klic, kapacita in sorted(self._kapacity.items())
+                if kapacita >= persons and (not typy or klic[0] in typy)
+            ]
+            terminy = list(islice(heapq.merge(*proudy), limit))
+        return [
+            {
+                "typ":      typ,
+                "id":       id_zdroje,
+                "kapacita": self._kapacity[typ, id_zdroje],
+                "od":       self.cas_slotu(cislo).isoformat(),
+                "do":       (self.cas_slotu(cislo) + timedelta(minutes=delka_minut)).isoformat(),
+            }
+            for cislo, (typ, id_zdroje) in terminy
+        ]
+
+
+def zaznamy(rez):
+    """Záznamy indexu (typ, id, datum_cas, délka, osob, výhradně) pro rezervaci (dict i objekt Rezervace)."""
+    if rez is None:
+        return []
+    get = rez.get if isinstance(rez, dict) else lambda k: getattr(rez, k)
+    return [
+        (typ, id_zdroje, get("datum_cas"), delka_rezervace(rez), get("pocet_osob"), vyhradne_rezervace(rez))
+        for typ, id_zdroje in zdroje_rezervace(rez)
+        if typ in TYPY
+    ]
+
+
+class Zmena:
+    """
+    Změna rezervace pro paměťový index: vzniká před commitem (stav „před“ a verze
+    indexu), hotovo() se volá po commitu se stavem „po“.
+    """
+
+    def __init__(self, pred=None):
+        self.index = current_app.extensions["availability"]
+        self.verze = self.index.verze
+        self.pred  = zaznamy(pred)
+
+    def hotovo(self, po=None):
+        self.index.promitnout(self.pred, zaznamy(po), self.verze)
+
+
+def prirad_stul(dt, persons, delka_minut):
+    """
+    Vybere nejvhodnější volný stůl a zabere ho v tabulce obsazenost (výhradně).
+    Kandidáty dává paměťový index; když ho jiný worker předběhl, zkusí se další.
+    Když neprojde žádný z kandidátů, index se přestaví a hledá se ještě jednou.
+    Vrací id_stul, nebo None.
+    """
+    index = current_app.extensions["availability"]
+    for _ in range(2):
+        kandidati = index.nejlepsi_stoly(dt, persons, delka_minut)
+        for id_stul in kandidati:
+            if occupancy.reserve("stul", id_stul, dt, persons, delka_minut, vyhradne=True):
+                return id_stul
+        if not kandidati:
+            return None
+        index.invalidate()
+    return None
+
+
+def init_availability(app):
+    app.extensions["availability"] = IndexObsazenosti(app)
+
+
+def invalidate_availability():
+    current_app.extensions["availability"].invalidate()
+
+
+def volne_terminy(*args, **kwargs):
+    return current_app.extensions["availability"].hledat(*args, **kwargs)
@@ -0,0 +1,47 @@
+# app/background.py
+
+"""
+Smyčky na pozadí: dispečer outboxu, dorovnání SSE, čištění token_blacklist,
+kompakce věrnostních bodů.
+
+init_xxx(app) je jen zaregistruje (register); vlákna vzniknou až v procesu,
+který obsluhuje requesty:
+  - gunicorn: hook post_worker_init v gunicorn.conf.py, v každém workeru po forku
+  - jiný server (flask run, python run.py): první request
+CLI příkazy (flask seed-db, create-indexes, …) requesty neobsluhují, takže
+v nich žádné vlákno nevznikne. BACKGROUND_JOBS = False (nebo TESTING) je
+vypne úplně – např. pro instanci, kde úlohy běží jinde.
+"""
+
+import os
+import threading
+
+_lock = threading.Lock()
+
+
+def register(app, name, target, *args):
+    """Zaregistruje smyčku target(*args), kterou start_background() pustí ve vlákně."""
+    app.extensions.setdefault("background_jobs", []).append((name, target, args))
+
+
+def start_background(app):
+    """Spustí zaregistrované smyčky; v každém procesu nejvýš jednou (i po forku). Vrací, zda je spustil."""
+    if app.testing or not app.config.get("BACKGROUND_JOBS", True):
+        return False
+    pid = os.getpid()
+    if app.extensions.get("background_pid") == pid:
+        return False
+    with _lock:
+        if app.extensions.get("background_pid") == pid:
+            return False
+        app.extensions["background_pid"] = pid
+        for name, target, args in app.extensions.get("background_jobs", ()):
+            threading.Thread(target=target, args=args, name=name, daemon=True).start()
+    return True
+
+
+def init_background(app):
+    @app.before_request
+    def _start_background():
+        # levná kontrola pid; vlákna se spustí jen při prvním requestu procesu
+        start_background(app)
@@ -0,0 +1,237 @@
+# app/bulk.py
+
+"""
+Hromadné zápisy pro endpointy <entita>/bulk (viz register_crud v api/routes.py).
+
+Tělo requestu je JSON pole; ?mode= určuje chování při chybě:
+  - atomic (výchozí)  → vše, nebo nic; jediná chybná položka vrátí 422/409
+                        a nic se neuloží (ostatní položky mají status 424)
+  - best_effort       → uloží se vše, co projde; odpověď 207 se stavem každé položky
+Validace celého pole proběhne jedním schema.load(many=True); platné položky
+se zapíšou jedním příkazem (INSERT … RETURNING / UPDATE / DELETE … IN přes
+executemany) v jedné transakci. Když příkaz narazí na IntegrityError,
+položky se zkusí po jedné, aby šlo říct, která je špatně.
+
+Odpověď: {"results": [{"index", "status", "id" | "errors"}…], "ok": n, "failed": m}
+"""
+
+from flask import current_app, request
+from flask_smorest import abort
+from marshmallow import ValidationError
+from sqlalchemy import delete, insert, tuple_, update
+from sqlalchemy.exc import IntegrityError
+
+from .db import db
+
+ATOMIC      = "atomic"
+BEST_EFFORT = "best_effort"
+
+FAILED_DEPENDENCY = 424     # položka je v pořádku, ale neuložila se kvůli jiné (atomic)
+
+
+def bulk_mode():
+    mode = request.args.get("mode", ATOMIC)
+    if mode not in (ATOMIC, BEST_EFFORT):
+        abort(400, message=f"Neznámý režim '{mode}' (atomic / best_effort).")
+    return mode
+
+
+def bulk_items():
+    items = request.get_json(silent=True)
+    if not isinstance(items, list) or not items:
+        abort(400, message="Očekává se neprázdné JSON pole položek.")
+    limit = current_app.config.get("BULK_MAX_ITEMS", 1000)
+    if len(items) > limit:
+        abort(400, message=f"Najednou lze zpracovat nejvýš {limit} položek.")
+    return items
+
+
+def load_items(schema, items):
+    """Validace celého pole najednou → ({index: data}, {index: chyby})."""
+    try:
+        return dict(enumerate(schema.load(items, many=True))), {}
+    except ValidationError as err:
+        errors = {i: msgs for i, msgs in err.messages.items() if isinstance(i, int)}
+        valid  = err.valid_data if isinstance(err.valid_data, list) else []
+        return {i: valid[i] for i in range(len(items)) if i not in errors and i < len(valid)}, errors
+
+
+class BulkWriter:
+    """Provede jednu hromadnou operaci a sestaví výsledky po položkách."""
+
+    def __init__(self, model, pk_names, mode, count):
+        self.model    = model
+        self.count    = count
+        self.pk_names = tuple(pk_names)
+        self.pk_cols  = [getattr(model, n) for n in self.pk_names]
+        self.mode     = mode
+        self.results  = {}
+
+    # ── klíče ─────────────────────────────────────────────────────────
+    def ident(self, row):
+        values = tuple(row[n] for n in self.pk_names)
+        return values[0] if len(values) == 1 else list(values)
+
+    def _pk_filter(self, keys):
+        if len(self.pk_cols) == 1:
+            return self.pk_cols[0].in_([k[0] for k in keys])
+        return tuple_(*self.pk_cols).in_(keys)
+
+    def existing(self, keys):
+        if not keys:
+            return set()
+        rows = db.session.execute(db.select(*self.pk_cols).where(self._pk_filter(list(keys)))).all()
+        return {tuple(r) for r in rows}
+
+    # ── výsledky ──────────────────────────────────────────────────────
+    def fail(self, index, status, errors):
+        self.results[index] = {"index": index, "status": status, "errors": errors}
+
+    def ok(self, index, status, ident):
+        self.results[index] = {"index": index, "status": status, "id": ident}
+
+    @property
+    def failed(self):
+        return [r for r in self.results.values() if r["status"] >= 400]
+
+    def response(self, ok_status):
+        """(tělo, HTTP status); v režimu atomic dostane status celé odpovědi první chybná položka."""
+        failed = sorted(self.failed, key=lambda r: r["index"])
+        if failed and self.mode == ATOMIC:
+            status = failed[0]["status"]
+            for index in range(self.count):
+                r = self.results.get(index)
+                if r is None or r["status"] < 400:
+                    self.results[index] = {"index": index, "status": FAILED_DEPENDENCY}
+        else:
+            status = 207 if failed else ok_status
+        results = [self.results[i] for i in sorted(self.results)]
+        n_ok    = sum(r["status"] < 400 for r in results)
+        return {"results": results, "ok": n_ok, "failed": len(results) - n_ok}, status
+
+    # ── zápis ─────────────────────────────────────────────────────────
+    def _run(self, work, batch, ok_status):
+        """
+        work(batch) zapíše {index: data} jedním příkazem a vrátí {index: id}.
+        Při IntegrityError se položky zkusí po jedné (každá ve vlastní transakci),
+        aby se chyba dala přiřadit konkrétní položce.
+        """
+        if not batch:
+            return
+        try:
+            done = work(batch)
+            db.session.flush()
+        except IntegrityError:
+            db.session.rollback()
+            done = {}
+            for index, row in batch.items():
+                try:
+                    done.update(work({index: row}))
+                    db.session.flush()
+                except IntegrityError as err:
+                    db.session.rollback()
+                    self.fail(index, 409, {"_schema": [f"Porušení integrity: {err.orig}"]})
+                    continue
+                if self.mode == BEST_EFFORT:
+                    db.session.commit()
+                else:
+                    db.session.rollback()     # atomic: jen zjišťujeme, které položky selžou
+            if self.mode == ATOMIC:
+                if not self.failed:
+                    # jednotlivě projdou, dohromady ne (např. duplicita uvnitř dávky)
+                    for index in batch:
+                        self.fail(index, 409, {"_schema": ["Položky dávky jsou ve vzájemném konfliktu."]})
+                return                        # nic z dávky se neuloží
+        for index, ident in done.items():
+            self.ok(index, ok_status, ident)
+
+    def insert(self, batch):
+        """INSERT … RETURNING pk přes executemany; pořadí id odpovídá pořadí položek."""
+        def work(rows):
+            stmt    = insert(self.model).returning(*self.pk_cols, sort_by_parameter_order=True)
+            created = db.session.execute(stmt, list(rows.values())).all()
+            return {i: self.ident(r._mapping) for i, r in zip(rows, created)}
+        self._run(work, batch, 201)
+
+    def update(self, batch):
+        """ORM bulk UPDATE podle primárního klíče (data položek obsahují i pk)."""
+        def work(rows):
+            db.session.execute(update(self.model), list(rows.values()))
+            return {i: self.ident(row) for i, row in rows.items()}
+        self._run(work, batch, 200)
+
+    def delete(self, batch):
+        """Jeden DELETE … WHERE pk IN (…)."""
+        def work(rows):
+            keys = [tuple(row[n] for n in self.pk_names) for row in rows.values()]
+            db.session.execute(delete(self.model).where(self._pk_filter(keys)))
+            return {i: self.ident(row) for i, row in rows.items()}
+        self._run(work, batch, 200)
+
+    def split_keys(self, items, with_data):
+        """
+        Oddělí primární klíč od dat položky ({pk…, ostatní pole} nebo u DELETE
+        s jednoduchým klíčem i holé id) → ({index: (klíč, data)}, chyby do results).
+        """
+        keyed = {}
+        for index, item in enumerate(items):
+            if not with_data and not isinstance(item, dict) and len(self.pk_names) == 1:
+                item = {self.pk_names[0]: item}
+            if not isinstance(item, dict):
+                self.fail(index, 422, {"_schema": ["Položka musí být objekt."]})
+                continue
+            data = dict(item)
+            key  = tuple(data.pop(n, None) for n in self.pk_names)
+            if any(not isinstance(k, int) or isinstance(k, bool) for k in key):
+                self.fail(index, 422, {n: ["Chybí nebo není celé číslo."] for n in self.pk_names})
+                continue
+            keyed[index] = (key, data)
+        return keyed
+
+    def drop_missing(self, keyed, label):
+        """Položky s neexistujícím klíčem → 404; jeden SELECT … IN pro celou dávku."""
+        found = self.existing({key for key, _ in keyed.values()})
+        for index, (key, _) in list(keyed.items()):
+            if key not in found:
+                self.fail(index, 404, {"_schema": [f"{label} nenalezen."]})
+                del keyed[index]
+        return keyed
+
+
+def bulk_create(model, pk_names, schema, items, mode):
+    writer        = BulkWriter(model, pk_names, mode, len(items))
+    valid, errors = load_items(schema, items)
+    for index, msgs in errors.items():
+        writer.fail(index, 422, msgs)
+    if not (errors and mode == ATOMIC):
+        writer.insert(valid)
+    return writer
+
+
+def bulk_update(model, pk_names, schema, items, mode, label):
+    writer = BulkWriter(model, pk_names, mode, len(items))
+    keyed  = writer.split_keys(items, with_data=True)
+    indexes = list(keyed)
+    valid, errors = load_items(schema, [keyed[i][1] for i in indexes])
+    for pos, msgs in errors.items():
+        writer.fail(indexes[pos], 422, msgs)
+    keyed = {indexes[pos]: (keyed[indexes[pos]][0], data) for pos, data in valid.items()}
+    keyed = writer.drop_missing(keyed, label)
+    if writer.failed and mode == ATOMIC:
+        return writer
+    batch = {}
+    for index, (key, data) in keyed.items():
+        if data:
+            batch[index] = {**dict(zip(pk_names, key)), **data}
+        else:
+            writer.ok(index, 200, writer.ident(dict(zip(pk_names, key))))    # nic ke změně
+    writer.update(batch)
+    return writer
+
+
+def bulk_delete(model, pk_names, items, mode, label):
+    writer = BulkWriter(model, pk_names, mode, len(items))
+    keyed  = writer.drop_missing(writer.split_keys(items, with_data=False), label)
+    if not (writer.failed and mode == ATOMIC):
+        writer.delete({i: dict(zip(pk_names, key)) for i, (key, _) in keyed.items()})
+    return writer
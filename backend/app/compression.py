@@ -0,0 +1,190 @@
+# app/compression.py
+
+"""
+Komprese odpovědí (gzip, případně brotli) podle Accept-Encoding.
+
+Komprimuje se jen odpověď, která:
+  - má status 200, není streamovaná (SSE, /img/…) a ještě nemá Content-Encoding
+    (snapshot menu posílá vlastní předpočítaný gzip)
+  - má typ z COMPRESS_MIMETYPES a aspoň COMPRESS_MIN_SIZE bajtů
+
+Úroveň: COMPRESS_LEVEL (gzip), COMPRESS_BR_QUALITY (brotli, jen s balíčkem
+Brotli; bez něj se nabízí jen gzip).
+
+CPU rozpočet: komprese smí za každou sekundu spotřebovat nejvýš
+COMPRESS_CPU_BUDGET sekund CPU (počítáno na worker); po vyčerpání se do konce
+okna posílá nekomprimovaná odpověď. Chrání worker při náporu velkých seznamů.
+
+Výsledky komprese GET odpovědí se drží v LRU cache (COMPRESS_CACHE_BYTES)
+podle otisku těla a kódování – opakované stažení stejného seznamu se
+nekomprimuje znovu.
+"""
+
+import gzip
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - Brotli je volitelný
+    brotli = None
+
+DEFAULT_MIMETYPES = (
+    "application/json", "application/x-ndjson", "application/javascript",
+    "text/html", "text/plain", "text/css", "text/csv", "image/svg+xml",
+)
+
+
+class CompressionCache:
+    """LRU (otisk těla, kódování) → komprimované bajty, omezená součtem velikostí."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._lock     = threading.Lock()
+        self._items    = OrderedDict()
+        self._size     = 0
+
+    def get(self, key):
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._size -= len(old)
+            self._items[key] = value
+            self._size += len(value)
+            while self._size > self.max_bytes:
+                _, dropped = self._items.popitem(last=False)
+                self._size -= len(dropped)
+
+
+class Compressor:
+    def __init__(self, level=6, br_quality=4, min_size=1024, mimetypes=DEFAULT_MIMETYPES,
+                 cpu_budget=0.25, cache_bytes=8 * 1024 * 1024):
+        self.level      = level
+        self.br_quality = br_quality
+        self.min_size   = min_size
+        self.mimetypes  = frozenset(mimetypes)
+        self.cpu_budget = cpu_budget
+        self.cache      = CompressionCache(cache_bytes) if cache_bytes else None
+        self._lock      = threading.Lock()
+        self._window    = 0          # int(time.monotonic()) aktuálního okna
+        self._spent     = 0.0        # CPU sekund spotřebovaných v okně
+        self.stats      = {"compressed": 0, "cache_hits": 0, "over_budget": 0,
+                           "bytes_in": 0, "bytes_out": 0, "cpu_seconds": 0.0}
+
+    # ── vyjednání ─────────────────────────────────────────────────────
+    def choose_encoding(self, accept_encodings):
+        if brotli is not None and accept_encodings["br"]:
+            return "br"
+        if accept_encodings["gzip"]:
+            return "gzip"
+        return None
+
+    # ── CPU rozpočet ──────────────────────────────────────────────────
+    def _within_budget(self):
+        if not self.cpu_budget:
+            return True
+        window = int(time.monotonic())
+        with self._lock:
+            if window != self._window:
+                self._window, self._spent = window, 0.0
+            return self._spent < self.cpu_budget
+
+    def _charge(self, seconds, size_in, size_out):
+        with self._lock:
+            self._spent += seconds
+            self.stats["compressed"]  += 1
+            self.stats["cpu_seconds"] += seconds
+            self.stats["bytes_in"]    += size_in
+            self.stats["bytes_out"]   += size_out
+
+    # ── komprese ──────────────────────────────────────────────────────
+    def compress(self, body, encoding, cacheable=False):
+        """Komprimované bajty, nebo None (vyčerpaný CPU rozpočet)."""
+        key = None
+        if cacheable and self.cache is not None:
+            key    = (hashlib.blake2b(body, digest_size=16).digest(), encoding)
+            cached = self.cache.get(key)
+            if cached is not None:
+                with self._lock:
+                    self.stats["cache_hits"] += 1
+                return cached
+
+        if not self._within_budget():
+            with self._lock:
+                self.stats["over_budget"] += 1
+            return None
+
+        t0 = time.thread_time()
+        if encoding == "br":
+            out = brotli.compress(body, quality=self.br_quality)
+        else:
+            out = gzip.compress(body, compresslevel=self.level, mtime=0)
+        self._charge(time.thread_time() - t0, len(body), len(out))
+
+        if key is not None:
+            self.cache.put(key, out)
+        return out
+
+    def should_compress(self, response):
+        return (
+            response.status_code == 200
+            and not response.direct_passthrough
+            and not response.is_streamed
+            and "Content-Encoding" not in response.headers
+            and response.mimetype in self.mimetypes
+            and (response.content_length is None or response.content_length >= self.min_size)
+        )
+
+    def process(self, response):
+        if not self.should_compress(response):
+            return response
+        response.vary.add("Accept-Encoding")
+        encoding = self.choose_encoding(request.accept_encodings)
+        if encoding is None:
+            return response
+        body = response.get_data()
+        if len(body) < self.min_size:
+            return response
+
+        out = self.compress(body, encoding, cacheable=request.method == "GET")
+        if out is None or len(out) >= len(body):
+            return response
+        response.set_data(out)
+        response.headers["Content-Encoding"] = encoding
+        # jiné bajty → ETag (je-li) už nesmí být silný
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+
+def init_compression(app):
+    compressor = Compressor(
+        level=app.config.get("COMPRESS_LEVEL", 6),
+        br_quality=app.config.get("COMPRESS_BR_QUALITY", 4),
+        min_size=app.config.get("COMPRESS_MIN_SIZE", 1024),
+        mimetypes=app.config.get("COMPRESS_MIMETYPES", DEFAULT_MIMETYPES),
+        cpu_budget=app.config.get("COMPRESS_CPU_BUDGET", 0.25),
+        cache_bytes=app.config.get("COMPRESS_CACHE_BYTES", 8 * 1024 * 1024),
+    )
+    app.extensions["compressor"] = compressor
+
+    if app.config.get("COMPRESS_ENABLED", True):
+        @app.after_request
+        def _compress_response(response):
+            return compressor.process(response)
+
+    return compressor
@@ -1,10 +1,32 @@
 # app/db.py
 
+from flask import has_request_context, request
 from flask_sqlalchemy import SQLAlchemy    # importuje SQLAlchemy ORM pro Flask
+from flask_sqlalchemy.session import Session
+from sqlalchemy.sql import Select
 # importuje Migrate pro správu databázových migrací
 from flask_migrate import Migrate
 
+# klíč v request.environ, pod kterým app/replicas.py ukládá engine repliky pro daný request
+REPLICA_ENVIRON_KEY = "app.db_replica"
+
+
+class RoutingSession(Session):
+    """
+    Session, která čtecí dotazy (SELECT bez FOR UPDATE) v read-only requestu
+    posílá na repliku vybranou v app/replicas.py. Zápisy, flush, SELECT … FOR UPDATE
+    a vše mimo request jdou vždy na primární DB.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and has_request_context():
+            replica = request.environ.get(REPLICA_ENVIRON_KEY)
+            if replica is not None and isinstance(clause, Select) and clause._for_update_arg is None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
 # vytvoří instanci ORM, kterou budeme registrovat v create_app
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 # vytvoří instanci migrací, také registrovanou v create_app
 migrate = Migrate()
@@ -0,0 +1,209 @@
+# app/db_pool.py
+
+"""
+Profily DB enginu / connection poolu a telemetrie poolu.
+
+Profil se vybírá v configu (DB_POOL_PROFILE), případně proměnnou prostředí
+DB_POOL_PROFILE; jednotlivé hodnoty jdou přepsat proměnnými DB_POOL_SIZE,
+DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_STATEMENT_TIMEOUT_MS,
+DB_PREPARE_THRESHOLD. Výsledek se zapíše do SQLALCHEMY_ENGINE_OPTIONS;
+co je v SQLALCHEMY_ENGINE_OPTIONS nastaveno explicitně, má přednost.
+
+  pool_size / max_overflow / pool_timeout / pool_recycle / pool_pre_ping
+        → parametry SQLAlchemy QueuePool (u SQLite se velikost poolu neřeší)
+  statement_timeout_ms → PostgreSQL `-c statement_timeout=…` při připojení
+  prepare_threshold    → psycopg 3: po kolika provedeních se dotaz připraví na serveru
+                         (None = nikdy, vhodné za PgBouncerem v transaction módu)
+
+PoolStats počítá z událostí poolu půjčená spojení, čekání na volné spojení,
+přetečení nad pool_size a timeouty – vrací je GET /api/_internal/pool.
+"""
+
+import os
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+
+POOL_PROFILES = {
+    # vývoj na notebooku: málo spojení, rychle odhalit zapomenuté transakce
+    "small": {
+        "pool_size": 5, "max_overflow": 5, "pool_timeout": 10,
+        "pool_recycle": 1800, "pool_pre_ping": True,
+        "statement_timeout_ms": 15000, "prepare_threshold": 5,
+    },
+    # webový worker (gunicorn): pool_size ≈ počet vláken workeru
+    "web": {
+        "pool_size": 10, "max_overflow": 10, "pool_timeout": 5,
+        "pool_recycle": 1800, "pool_pre_ping": True,
+        "statement_timeout_ms": 5000, "prepare_threshold": 5,
+    },
+    # za PgBouncerem (transaction pooling): malý pool, bez server-side prepared statements
+    "pgbouncer": {
+        "pool_size": 5, "max_overflow": 0, "pool_timeout": 5,
+        "pool_recycle": 600, "pool_pre_ping": False,
+        "statement_timeout_ms": 5000, "prepare_threshold": None,
+    },
+    # CLI / dávkové úlohy (seed-db, přepočty): jedno spojení, dlouhé dotazy
+    "batch": {
+        "pool_size": 1, "max_overflow": 0, "pool_timeout": 30,
+        "pool_recycle": 3600, "pool_pre_ping": True,
+        "statement_timeout_ms": 300000, "prepare_threshold": 5,
+    },
+}
+
+_ENV_OVERRIDES = {
+    "pool_size":            ("DB_POOL_SIZE", int),
+    "max_overflow":         ("DB_MAX_OVERFLOW", int),
+    "pool_timeout":         ("DB_POOL_TIMEOUT", float),
+    "pool_recycle":         ("DB_POOL_RECYCLE", int),
+    "statement_timeout_ms": ("DB_STATEMENT_TIMEOUT_MS", int),
+    "prepare_threshold":    ("DB_PREPARE_THRESHOLD", lambda v: None if v.lower() == "none" else int(v)),
+}
+
+
+def resolve_profile(config):
+    """Název a parametry profilu podle configu a proměnných prostředí (None = bez profilu)."""
+    name = os.environ.get("DB_POOL_PROFILE", config.get("DB_POOL_PROFILE"))
+    if not name:
+        return None, {}
+    if name not in POOL_PROFILES:
+        raise ValueError(f"Neznámý DB_POOL_PROFILE '{name}' (možnosti: {', '.join(POOL_PROFILES)})")
+    params = dict(POOL_PROFILES[name])
+    for key, (var, convert) in _ENV_OVERRIDES.items():
+        if os.environ.get(var):
+            params[key] = convert(os.environ[var])
+    return name, params
+
+
+def engine_options(url, params):
+    """SQLALCHEMY_ENGINE_OPTIONS pro dané URI a parametry profilu."""
+    url = str(url)
+    options = {"pool_pre_ping": params.get("pool_pre_ping", True)}
+    if url.startswith("sqlite"):
+        return options
+
+    for key in ("pool_size", "max_overflow", "pool_timeout", "pool_recycle"):
+        if key in params:
+            options[key] = params[key]
+
+    connect_args = {}
+    if url.startswith("postgresql"):
+        if params.get("statement_timeout_ms"):
+            connect_args["options"] = f"-c statement_timeout={params['statement_timeout_ms']}"
+        # prepare_threshold zná jen psycopg 3 (postgresql+psycopg://)
+        if url.startswith("postgresql+psycopg:") or url.startswith("postgresql+psycopg_async:"):
+            connect_args["prepare_threshold"] = params.get("prepare_threshold")
+    if connect_args:
+        options["connect_args"] = connect_args
+    return options
+
+
+def apply_pool_profile(app):
+    """Doplní SQLALCHEMY_ENGINE_OPTIONS podle profilu (explicitní nastavení má přednost)."""
+    name, params = resolve_profile(app.config)
+    app.config["DB_POOL_PROFILE"] = name
+    if name is None:
+        return
+    options = engine_options(app.config.get("SQLALCHEMY_DATABASE_URI", ""), params)
+    explicit = app.config.get("SQLALCHEMY_ENGINE_OPTIONS") or {}
+    if "connect_args" in explicit and "connect_args" in options:
+        explicit = {**explicit, "connect_args": {**options["connect_args"], **explicit["connect_args"]}}
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {**options, **explicit}
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Telemetrie
+# ──────────────────────────────────────────────────────────────────────────────
+class PoolStats:
+    """Čítače nad jedním enginem (pool eventy + měření čekání v QueuePool._do_get)."""
+
+    def __init__(self, engine):
+        self.engine          = engine
+        self._lock           = threading.Lock()
+        self.checkouts       = 0
+        self.max_checked_out = 0
+        self.overflow_events = 0
+        self.timeouts        = 0
+        self.connects        = 0
+        self.invalidations   = 0
+        self.wait_total      = 0.0
+        self.wait_max        = 0.0
+
+    # ── události poolu ─────────────────────────────────────────────────
+    def _on_connect(self, dbapi_conn, record):
+        with self._lock:
+            self.connects += 1
+
+    def _on_checkout(self, dbapi_conn, record, proxy):
+        pool = self.engine.pool
+        checked_out = pool.checkedout() if hasattr(pool, "checkedout") else 0
+        overflow    = pool.overflow() if hasattr(pool, "overflow") else 0
+        with self._lock:
+            self.checkouts += 1
+            self.max_checked_out = max(self.max_checked_out, checked_out)
+            if overflow > 0:
+                self.overflow_events += 1
+
+    def _on_invalidate(self, dbapi_conn, record, exception):
+        with self._lock:
+            self.invalidations += 1
+
+    def _timed_get(self, original):
+        # čekání na volné spojení se jinak neměří – obalíme získání spojení z fronty
+        def do_get():
+            t0 = time.perf_counter()
+            try:
+                return original()
+            except PoolTimeout:
+                with self._lock:
+                    self.timeouts += 1
+                raise
+            finally:
+                waited = time.perf_counter() - t0
+                with self._lock:
+                    self.wait_total += waited
+                    self.wait_max    = max(self.wait_max, waited)
+        return do_get
+
+    def attach(self):
+        pool = self.engine.pool
+        event.listen(pool, "connect", self._on_connect)
+        event.listen(pool, "checkout", self._on_checkout)
+        event.listen(pool, "invalidate", self._on_invalidate)
+        if hasattr(pool, "_do_get"):
+            pool._do_get = self._timed_get(pool._do_get)
+        return self
+
+    # ── výstup ─────────────────────────────────────────────────────────
+    def snapshot(self):
+        pool = self.engine.pool
+        data = {
+            "pool_class":      type(pool).__name__,
+            "size":            pool.size() if hasattr(pool, "size") else None,
+            "checked_out":     pool.checkedout() if hasattr(pool, "checkedout") else None,
+            "checked_in":      pool.checkedin() if hasattr(pool, "checkedin") else None,
+            "overflow":        pool.overflow() if hasattr(pool, "overflow") else None,
+            "max_overflow":    getattr(pool, "_max_overflow", None),
+        }
+        with self._lock:
+            data.update({
+                "checkouts":       self.checkouts,
+                "max_checked_out": self.max_checked_out,
+                "overflow_events": self.overflow_events,
+                "timeouts":        self.timeouts,
+                "connects":        self.connects,
+                "invalidations":   self.invalidations,
+                "wait_ms_total":   round(self.wait_total * 1000, 3),
+                "wait_ms_avg":     round(self.wait_total * 1000 / self.checkouts, 3) if self.checkouts else 0.0,
+                "wait_ms_max":     round(self.wait_max * 1000, 3),
+            })
+        return data
+
+
+def init_pool_stats(app, db):
+    with app.app_context():
+        stats = {"primary": PoolStats(db.engine).attach()}
+    app.extensions["pool_stats"] = stats
+    return stats
@@ -0,0 +1,119 @@
+# app/dev_token.py
+
+"""
+Automatické přihlášení vývojového uživatele (DEV_USER_EMAIL / DEV_USER_PASSWORD).
+
+Request bez hlavičky Authorization dostane access token vývojového uživatele.
+Token se počítá jednou (dotaz + ověření hesla + podpis JWT) a používá se, dokud
+mu nezbývá méně než DEV_TOKEN_REFRESH_MARGIN sekund platnosti – pak se na pozadí
+spočítá nový, requesty mezitím dostávají ten stávající.
+
+Cache se zahodí, když:
+  - se uživateli změní heslo nebo role (ORM události, po commitu)
+  - token byl mezitím odhlášen (je v blacklistu)
+"""
+
+import threading
+import time
+
+from flask import request
+from flask_jwt_extended import create_access_token, decode_token
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from .db import db
+from .models import Zakaznik
+
+
+class DevTokenCache:
+    def __init__(self, app, email, password):
+        self.app      = app
+        self.email    = email
+        self.password = password
+        self.margin   = app.config.get("DEV_TOKEN_REFRESH_MARGIN", 60)
+        self._lock    = threading.Lock()
+        self._token   = None     # (token, jti, expires_at v time.time())
+        self._version = 0        # zvýší se při změně hesla / rolí
+        self._refreshing = False
+
+    # ── výpočet tokenu ────────────────────────────────────────────────
+    def _compute(self):
+        user = db.session.query(Zakaznik).filter_by(email=self.email).first()
+        if not user or not user.check_password(self.password):
+            return None
+        token  = create_access_token(
+            identity=str(user.id_zakaznika),
+            additional_claims={"roles": [r.name for r in user.roles]}
+        )
+        claims = decode_token(token, allow_expired=True)
+        return token, claims["jti"], claims.get("exp", float("inf"))
+
+    def _store(self, version, value):
+        with self._lock:
+            if version == self._version:
+                self._token = value
+
+    def _refresh_in_background(self, version):
+        def run():
+            try:
+                with self.app.app_context():
+                    self._store(version, self._compute())
+            finally:
+                self._refreshing = False
+        threading.Thread(target=run, name="dev-token-refresh", daemon=True).start()
+
+    def invalidate(self):
+        with self._lock:
+            self._version += 1
+            self._token    = None
+
+    def token(self):
+        cached, version = self._token, self._version
+        now = time.time()
+        if cached is not None:
+            token, jti, expires_at = cached
+            if now < expires_at and not self.app.extensions["token_revocation"].is_revoked(jti):
+                if now >= expires_at - self.margin:
+                    with self._lock:
+                        start, self._refreshing = not self._refreshing, True
+                    if start:
+                        self._refresh_in_background(version)
+                return token
+        value = self._compute()
+        self._store(version, value)
+        return value[0] if value else None
+
+    # ── invalidace při změně hesla / rolí ───────────────────────────────
+    def _user_changed(self, target, *args):
+        if target.email != self.email:
+            return
+        session = object_session(target)
+        if session is None:
+            self.invalidate()
+        else:
+            session.info["dev_token_stale"] = True
+
+    def _after_commit(self, session):
+        if session.info.pop("dev_token_stale", False):
+            self.invalidate()
+
+    def listen(self):
+        event.listen(Zakaznik._password, "set", self._user_changed)
+        event.listen(Zakaznik.roles, "append", self._user_changed)
+        event.listen(Zakaznik.roles, "remove", self._user_changed)
+        event.listen(Session, "after_commit", self._after_commit)
+
+
+def init_dev_token(app, email, password):
+    cache = DevTokenCache(app, email, password)
+    cache.listen()
+    app.extensions["dev_token"] = cache
+
+    @app.before_request
+    def _inject_dev_token():
+        if not request.headers.get("Authorization"):
+            token = cache.token()
+            if token:
+                request.environ["HTTP_AUTHORIZATION"] = f"Bearer {token}"
+
+    return cache
@@ -0,0 +1,280 @@
+# app/events.py
+
+import queue
+import threading
+import time
+from collections import deque
+
+from flask import current_app
+from sqlalchemy import func, or_
+
+from . import background
+from .db import db
+from . import serializers
+from .models import Notifikace
+from .schemas import NotifikaceSummarySchema
+
+
+class TooManyConnections(Exception):
+    pass
+
+
+def _queue_class():
+    """
+    Pod gevent workerem (gunicorn.conf.py) fronta z gevent.queue – čekání na ní
+    přepne na jiný greenlet; jinak queue.Queue (vývojový server, testy).
+    """
+    try:
+        from gevent import monkey
+    except ImportError:
+        return queue.Queue
+    if monkey.is_module_patched("threading"):
+        from gevent.queue import Queue
+        return Queue
+    return queue.Queue
+
+
+class Subscriber:
+    SEEN_IDS = 1000     # kolik posledních doručených id si spojení pamatuje kvůli duplicitám
+
+    def __init__(self, user_id, maxsize):
+        self.user_id = user_id
+        self.queue   = _queue_class()(maxsize=maxsize)
+        self.closed  = False
+        self._seen   = set()
+        self._order  = deque()
+
+    def first_seen(self, event_id):
+        """
+        True, pokud spojení událost ještě nedoručilo (a zapamatuje si ji).
+        Podle množiny, ne podle nejvyššího id – id se přidělují při INSERTu,
+        takže notifikace s nižším id může dorazit až po vyšší.
+        """
+        if event_id in self._seen:
+            return False
+        self._seen.add(event_id)
+        self._order.append(event_id)
+        if len(self._order) > self.SEEN_IDS:
+            self._seen.discard(self._order.popleft())
+        return True
+
+
+class EventHub:
+    """
+    Jednoduchý pub/sub v paměti procesu s kanálem pro každého uživatele.
+    - publish() nikdy neblokuje: plná fronta odběratele ho odpojí a klient se
+      znovu připojí s Last-Event-ID (zbytek si dočte z DB)
+    - počet současných spojení na uživatele je omezen
+    - notifikace vzniklé v jiném workeru dorovnává jeden společný dotaz workeru
+      (catch_up) pro všechny připojené uživatele, ne každé spojení zvlášť
+    """
+
+    def __init__(self, max_per_user=3, queue_size=100, overlap=60):
+        self.max_per_user = max_per_user
+        self.queue_size   = queue_size
+        self.overlap      = overlap
+        self._lock        = threading.Lock()
+        self._channels    = {}      # user_id -> set(Subscriber)
+        self._last_id     = None    # nejvyšší id_notifikace, které catch_up už prošel
+        self._gaps        = {}      # chybějící id pod _last_id -> kdy je catch_up poprvé nenašel
+
+    def subscribe(self, user_id):
+        if self._last_id is None:
+            # hranice před první registrací: novější notifikace dorovná catch_up,
+            # starší si odběratel dočte sám (Last-Event-ID)
+            top = _max_id()
+            with self._lock:
+                if self._last_id is None:
+                    self._last_id = top
+        with self._lock:
+            subs = self._channels.setdefault(user_id, set())
+            if len(subs) >= self.max_per_user:
+                raise TooManyConnections()
+            sub = Subscriber(user_id, self.queue_size)
+            subs.add(sub)
+            return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            subs = self._channels.get(sub.user_id)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._channels[sub.user_id]
+        sub.closed = True
+
+    def publish(self, user_id, event_id, event, data):
+        with self._lock:
+            subs = list(self._channels.get(user_id, ()))
+        for sub in subs:
+            try:
+                sub.queue.put_nowait((event_id, event, data))
+            except queue.Full:
+                self.unsubscribe(sub)
+
+    def connections(self, user_id):
+        with self._lock:
+            return len(self._channels.get(user_id, ()))
+
+    def catch_up(self, limit=500):
+        """
+        Pošle odběratelům notifikace, které od posledního průchodu přibyly v DB
+        (i z jiných workerů) – nejvýš dva dotazy za worker bez ohledu na počet
+        spojení. Duplicity s publish() zahodí odběratel podle id.
+
+        Id se přidělují při INSERTu, ne při commitu: souběžná transakce může
+        commitnout id N až po N+1. Díry pod kurzorem si proto hub pamatuje
+        `overlap` sekund a každý průchod je hledá znovu.
+        """
+        if self._last_id is None:
+            return 0
+        now = time.monotonic()
+        self._gaps = {i: t for i, t in self._gaps.items() if now - t < self.overlap}
+        with self._lock:
+            users = set(self._channels)
+        if not users:
+            self._last_id = _max_id()
+            self._gaps    = {}
+            return 0
+
+        # id + adresát všech nových notifikací (i cizích uživatelů) → díry v řadě id
+        found = db.session.execute(
+            db.select(Notifikace.id_notifikace, Notifikace.id_zakaznika)
+              .where(or_(Notifikace.id_notifikace > self._last_id,
+                         Notifikace.id_notifikace.in_(list(self._gaps))))
+              .order_by(Notifikace.id_notifikace)
+              .limit(limit)
+        ).all()
+        ids = {r.id_notifikace for r in found}
+        top = max(ids | {self._last_id})
+        for i in range(self._last_id + 1, top):
+            if len(self._gaps) >= limit:
+                break
+            if i not in ids:
+                self._gaps[i] = now
+        for i in ids:
+            self._gaps.pop(i, None)
+        self._last_id = top
+
+        wanted = [r.id_notifikace for r in found if r.id_zakaznika in users]
+        if not wanted:
+            return 0
+        rows = db.session.scalars(
+            db.select(Notifikace)
+              .where(Notifikace.id_notifikace.in_(wanted))
+              .order_by(Notifikace.id_notifikace)
+        ).all()
+        for n in rows:
+            self.publish(n.id_zakaznika, n.id_notifikace, "notifikace", notifikace_data(n))
+        return len(rows)
+
+
+def _max_id():
+    return db.session.scalar(db.select(func.max(Notifikace.id_notifikace))) or 0
+
+
+def _catch_up_loop(app, hub, interval):
+    while True:
+        time.sleep(interval)
+        with app.app_context():
+            try:
+                hub.catch_up()
+            except Exception:
+                db.session.rollback()
+                app.logger.exception("Dorovnání SSE notifikací z DB selhalo.")
+            finally:
+                db.session.remove()
+
+
+def init_event_hub(app):
+    hub = app.extensions["event_hub"] = EventHub(
+        max_per_user=app.config.get("SSE_MAX_CONNECTIONS_PER_USER", 3),
+        queue_size=app.config.get("SSE_QUEUE_SIZE", 100),
+        overlap=app.config.get("SSE_CATCHUP_OVERLAP_SECONDS", 60),
+    )
+    interval = app.config.get("SSE_HEARTBEAT_SECONDS", 15)
+    if app.config.get("SSE_DB_CATCHUP", True):
+        background.register(app, "sse-catch-up", _catch_up_loop, app, hub, interval)
+    return hub
+
+
+def get_hub():
+    return current_app.extensions["event_hub"]
+
+
+def notifikace_data(n):
+    data = serializers.dump(NotifikaceSummarySchema(), n)
+    data["id_rezervace"]  = n.id_rezervace
+    data["id_objednavky"] = n.id_objednavky
+    return data
+
+
+def notifikace_event(n):
+    """
+    (adresát, id, událost, data) pro publish_events(). Sestavuje se před commitem –
+    po něm jsou instance expirované a každá by se znovu načítala vlastním SELECTem.
+    """
+    return n.id_zakaznika, n.id_notifikace, "notifikace", notifikace_data(n)
+
+
+def publish_events(events):
+    """Pošle předem sestavené události (notifikace_event) živým odběratelům."""
+    hub = get_hub()
+    for user_id, event_id, event, data in events:
+        hub.publish(user_id, event_id, event, data)
+
+
+def publish_notifikace(*notifs):
+    """Pošle nově uložené (commitnuté) notifikace živým odběratelům."""
+    publish_events(notifikace_event(n) for n in notifs)
+
+
+def _missed(user_id, last_id, limit):
+    return db.session.scalars(
+        db.select(Notifikace)
+          .where(Notifikace.id_zakaznika == user_id)
+          .where(Notifikace.id_notifikace > last_id)
+          .order_by(Notifikace.id_notifikace)
+          .limit(limit)
+    ).all()
+
+
+def _format(app, event_id, event, data):
+    payload = app.json.dumps(data)
+    return f"id: {event_id}\nevent: {event}\ndata: {payload}\n\n"
+
+
+def sse_stream(app, sub, last_id):
+    """
+    Generátor SSE zpráv pro jednoho odběratele.
+    - nejdřív dorovná zmeškané notifikace z DB (Last-Event-ID)
+    - pak čeká na frontě a při nečinnosti posílá heartbeat; notifikace z jiných
+      workerů do fronty dodá společné dorovnání workeru (EventHub.catch_up)
+    Mezi zprávami nedrží request kontext ani DB session – app kontext se
+    otevírá jen na dobu dotazu, spojení se hned vrací do poolu. Pod gevent
+    workerem čeká spojení v greenletu, ne ve vlákně.
+    """
+    cfg       = app.config
+    heartbeat = cfg.get("SSE_HEARTBEAT_SECONDS", 15)
+    limit     = cfg.get("SSE_REPLAY_LIMIT", 100)
+
+    def replay():
+        out = []
+        with app.app_context():
+            for n in _missed(sub.user_id, last_id, limit):
+                if sub.first_seen(n.id_notifikace):
+                    out.append(_format(app, n.id_notifikace, "notifikace", notifikace_data(n)))
+        return out
+
+    yield f"retry: {int(heartbeat * 1000)}\n\n"
+    yield from replay()
+
+    while not sub.closed:
+        try:
+            event_id, event, data = sub.queue.get(timeout=heartbeat)
+        except queue.Empty:
+            yield ": ping\n\n"
+            continue
+        if not sub.first_seen(event_id):
+            continue
+        yield _format(app, event_id, event, data)
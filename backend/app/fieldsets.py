@@ -0,0 +1,164 @@
+# app/fieldsets.py
+
+from flask import request
+from flask_smorest import abort
+from marshmallow import fields as ma_fields
+from sqlalchemy import inspect
+from sqlalchemy.orm import selectinload, load_only
+
+from .db import db
+from . import serializers
+
+# jak hluboko se smí rozbalovat vnořená schémata (?expand=a.b.c)
+MAX_DEPTH = 3
+
+
+def _split(arg):
+    raw = request.args.get(arg)
+    if raw is None:
+        return None
+    return [p.strip() for p in raw.split(",") if p.strip()]
+
+
+def _relations(model, schema):
+    """Vnořená pole schématu, která odpovídají vazbě modelu: jméno pole → (vazba, vnořené schéma)."""
+    rels = inspect(model).relationships
+    out  = {}
+    for name, field in schema.fields.items():
+        if isinstance(field, ma_fields.Nested):
+            key = field.attribute or name
+            if key in rels:
+                out[name] = (rels[key], field.schema)
+    return out
+
+
+def _requires(schema, names):
+    """Atributy, které potřebují Method pole (metadata={"requires": [...]})."""
+    out = []
+    for name in names:
+        out += schema.fields[name].metadata.get("requires", [])
+    return out
+
+
+def _path_options(model, path):
+    """'alergeny.alergen' → selectinload(PolozkaMenu.alergeny).selectinload(PolozkaMenuAlergen.alergen)"""
+    opt, current = None, model
+    for part in path.split("."):
+        rel = inspect(current).relationships.get(part)
+        if rel is None:
+            return None
+        attr    = getattr(current, part)
+        opt     = selectinload(attr) if opt is None else opt.selectinload(attr)
+        current = rel.mapper.class_
+    return opt
+
+
+def _full_options(model, schema, depth=0):
+    """Eager loading všech vnořených vazeb schématu (výchozí výstup bez ?fields/?expand)."""
+    opts = []
+    for name, (rel, nested) in _relations(model, schema).items():
+        opt = selectinload(getattr(model, rel.key))
+        if depth + 1 < MAX_DEPTH:
+            sub = _full_options(rel.mapper.class_, nested, depth + 1)
+            if sub:
+                opt = opt.options(*sub)
+        opts.append(opt)
+    for path in _requires(schema, [n for n in schema.fields if n not in _relations(model, schema)]):
+        opt = _path_options(model, path)
+        if opt is not None:
+            opts.append(opt)
+    return opts
+
+
+class FieldSet:
+    """
+    Řídké výstupy pro endpointy postavené nad schématem:
+    - ?fields=a,b,c   která pole se vrátí (a jen pro ně se načtou sloupce – load_only)
+    - ?expand=x,y.z   které vazby se vnoří do výstupu (a eager-loadnou přes selectinload)
+    Bez parametrů zůstává původní výstup se všemi vnořenými vazbami, jen bez N+1 dotazů.
+    """
+
+    def __init__(self, model, schema_cls, many=False):
+        self.model  = model
+        proto       = schema_cls()
+        rels        = _relations(model, proto)
+        fields      = _split("fields")
+        expand      = _split("expand")
+
+        if fields is None and expand is None:
+            self.schema  = schema_cls(many=many)
+            self.options = _full_options(model, proto)
+            return
+
+        unknown = set(fields or ()) - set(proto.fields)
+        if unknown:
+            abort(400, message=f"Neznámá pole: {', '.join(sorted(unknown))}.")
+        paths = set(expand or ())
+        top   = {p.split(".")[0] for p in paths}
+        if top - set(rels):
+            abort(400, message=f"Nelze rozbalit: {', '.join(sorted(top - set(rels)))}.")
+        top |= {f for f in fields or () if f in rels}
+
+        scalar = [n for n in proto.fields if n not in rels]
+        only   = set(fields) | top if fields else set(scalar) | top
+
+        options, exclude = [], []
+        for name in top:
+            rel, nested = rels[name]
+            opt = selectinload(getattr(model, rel.key))
+            sub_model = rel.mapper.class_
+            sub_opts  = []
+            for sub_name, (sub_rel, _) in _relations(sub_model, nested).items():
+                if f"{name}.{sub_name}" in paths:
+                    sub_opts.append(selectinload(getattr(sub_model, sub_rel.key)))
+                else:
+                    exclude.append(f"{name}.{sub_name}")
+            options.append(opt.options(*sub_opts) if sub_opts else opt)
+
+        # sloupce: přímo dumpovaná pole + to, co potřebují Method pole + FK rozbalených vazeb
+        mapper  = inspect(model)
+        columns = set()
+        for name in only - top:
+            field = proto.fields[name]
+            key   = field.attribute or name
+            if key in mapper.column_attrs:
+                columns.add(key)
+        for path in _requires(proto, [n for n in only if n not in top]):
+            if path in mapper.column_attrs:
+                columns.add(path)
+            else:
+                opt = _path_options(model, path)
+                if opt is not None:
+                    options.append(opt)
+        for name in top:
+            rel = rels[name][0]
+            for col in rel.local_columns:
+                prop = mapper.get_property_by_column(col)
+                columns.add(prop.key)
+
+        self.columns = columns
+        self.schema  = schema_cls(many=many, only=tuple(only), exclude=tuple(exclude))
+        self.options = options
+
+    def apply(self, stmt, *extra_columns):
+        """Přidá do SELECTu load_only/selectinload; extra_columns = sloupce potřebné mimo výstup (řazení)."""
+        opts = list(self.options)
+        columns = getattr(self, "columns", None)
+        if columns is not None:
+            attrs = [getattr(self.model, c) for c in columns] + list(extra_columns)
+            opts.append(load_only(*attrs))
+        return stmt.options(*opts) if opts else stmt
+
+    def get(self, ident):
+        """Jeden záznam podle primárního klíče (None, pokud neexistuje)."""
+        pk = inspect(self.model).primary_key[0]
+        return db.session.execute(
+            self.apply(db.select(self.model).where(pk == ident))
+        ).scalar_one_or_none()
+
+    def dump(self, obj):
+        return serializers.dump(self.schema, obj)
+
+    def dump_one(self, obj):
+        """Jeden objekt i u FieldSet(many=True) – pro streamovaný výstup (app/streaming.py)."""
+        return serializers.dump(self.schema, obj, many=False)
@@ -0,0 +1,153 @@
+# app/hashing.py
+
+"""
+Ověřování hesel při přihlášení mimo request vlákno.
+
+PBKDF2/scrypt je záměrně drahé – při náporu přihlášení by jinak obsadilo
+všechna vlákna workeru a zdrželo i ostatní endpointy. Proto:
+  - hash se ověřuje v samostatném ProcessPoolExecutor s PASSWORD_HASH_POOL_SIZE procesy
+  - rozpracovaných (běžících + čekajících) ověření smí být nejvýš PASSWORD_HASH_MAX_PENDING;
+    další přihlášení se hned odmítne (HasherSaturated → 429)
+  - když se výsledku nedočkáme do PASSWORD_HASH_TIMEOUT nebo pool spadne
+    (HasherUnavailable → 503)
+  - pokud byl hash uložen s jinými parametry než PASSWORD_HASH_METHOD,
+    vrátí se rovnou i nový hash (rehash při přihlášení)
+
+PASSWORD_HASH_POOL_SIZE = 0 → ověření běží přímo ve vlákně requestu (testy),
+limit rozpracovaných ověření ale platí i tak.
+"""
+
+import atexit
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+from flask import current_app, has_app_context
+from werkzeug.security import generate_password_hash, check_password_hash
+
+DEFAULT_METHOD = "scrypt"
+
+# "scrypt" → "scrypt:32768:8:1" (plné parametry tak, jak je werkzeug uloží do hashe)
+_normalized      = {}
+_normalized_lock = threading.Lock()
+
+
+class HasherSaturated(Exception):
+    """Fronta ověřování hesel je plná."""
+
+
+class HasherUnavailable(Exception):
+    """Pool pro ověřování hesel neodpověděl (timeout / spadlý proces)."""
+
+
+def password_method():
+    """Metoda a parametry pro nové hashe (PASSWORD_HASH_METHOD, mimo aplikaci výchozí werkzeug)."""
+    if has_app_context():
+        return current_app.config.get("PASSWORD_HASH_METHOD", DEFAULT_METHOD)
+    return DEFAULT_METHOD
+
+
+def normalized_method(method):
+    full = _normalized.get(method)
+    if full is None:
+        full = generate_password_hash("x", method).split("$", 1)[0]
+        with _normalized_lock:
+            _normalized[method] = full
+    return full
+
+
+def verify_and_rehash(stored_hash, raw_password, method, method_full):
+    """
+    Běží v procesu poolu: (heslo sedí?, nový hash nebo None).
+    method_full = normalizovaný tvar method, aby se v procesu nemusel znovu počítat.
+    """
+    if not stored_hash or not check_password_hash(stored_hash, raw_password):
+        return False, None
+    if stored_hash.split("$", 1)[0] == method_full:
+        return True, None
+    return True, generate_password_hash(raw_password, method)
+
+
+class PasswordHasher:
+    def __init__(self, pool_size, max_pending, timeout, start_method="spawn"):
+        self.pool_size    = pool_size
+        self.max_pending  = max_pending
+        self.timeout      = timeout
+        self.start_method = start_method
+        self._pending     = 0
+        self._lock        = threading.Lock()
+        self._pool        = None
+
+    @property
+    def pending(self):
+        return self._pending
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.pool_size,
+                    mp_context=multiprocessing.get_context(self.start_method),
+                )
+            return self._pool
+
+    def _reset(self, broken):
+        with self._lock:
+            if self._pool is broken:
+                self._pool = None
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def _release(self, _future=None):
+        with self._lock:
+            self._pending -= 1
+
+    def verify(self, stored_hash, raw_password, method=DEFAULT_METHOD):
+        """(heslo sedí?, nový hash při změně parametrů nebo None)"""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise HasherSaturated()
+            self._pending += 1
+
+        args = (stored_hash, raw_password, method, normalized_method(method))
+        if not self.pool_size:
+            try:
+                return verify_and_rehash(*args)
+            finally:
+                self._release()
+
+        pool = self._executor()
+        try:
+            future = pool.submit(verify_and_rehash, *args)
+        except (BrokenProcessPool, RuntimeError):
+            self._release()
+            self._reset(pool)
+            raise HasherUnavailable()
+        # slot se uvolní, až proces ověření opravdu dokončí (i po našem timeoutu)
+        future.add_done_callback(self._release)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            raise HasherUnavailable()
+        except BrokenProcessPool:
+            self._reset(pool)
+            raise HasherUnavailable()
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+def init_password_hasher(app):
+    pool_size = app.config.get("PASSWORD_HASH_POOL_SIZE", 2)
+    hasher = PasswordHasher(
+        pool_size=pool_size,
+        max_pending=app.config.get("PASSWORD_HASH_MAX_PENDING") or max(pool_size, 1) * 4,
+        timeout=app.config.get("PASSWORD_HASH_TIMEOUT", 5),
+        start_method=app.config.get("PASSWORD_HASH_START_METHOD", "spawn"),
+    )
+    app.extensions["password_hasher"] = hasher
+    atexit.register(hasher.shutdown)
+    return hasher
@@ -0,0 +1,408 @@
+# app/images.py
+
+"""
+Upload a zpracování obrázků (salonky, akce, workshopy, položky menu).
+
+- save_upload() kopíruje upload po blocích do dočasného souboru v UPLOAD_FOLDER,
+  cestou počítá sha256 a hlídá IMAGE_MAX_UPLOAD_BYTES (→ 413); formát se pozná
+  podle prvních bajtů, ne podle jména od klienta (→ 400)
+- výsledné jméno je <sha256[:32]>.<přípona> – stejný obrázek nahraný znovu
+  se neukládá podruhé a vrátí stejné jméno
+- varianty (DEFAULT_VARIANTS: thumb, medium, webp) vyrábí ImagePipeline na pozadí
+  (IMAGE_WORKERS vláken, 0 = hned ve vlákně requestu); seznam hotových variant
+  se uloží vedle originálu jako <jméno>.variants.json
+- image_url() vrací medium variantu, pokud už existuje, jinak originál;
+  image_srcset() mapu {varianta: URL} včetně "original"
+
+Bez knihovny Pillow se varianty nevyrábějí a servíruje se originál.
+
+Servírování (GET /img/<otisk>/<jméno>):
+- ImageManifest drží pro každý soubor ve složce otisk obsahu (sha256), velikost,
+  mtime a MIME typ; předpočítaný manifest.json (flask build-image-manifest)
+  se při startu jen ověří přes stat, dopočítají se nové / změněné soubory;
+  soubor, který mezitím přibyl (upload nebo varianta z jiného workeru),
+  se do manifestu doplní při prvním dotazu (ImageManifest.lookup)
+- URL ze schémat obsahují otisk → odpověď má Cache-Control immutable na rok,
+  ETag = otisk; If-None-Match / If-Modified-Since (304) a Range (206) se řeší
+  podle manifestu bez dalšího stat()
+- starý otisk → 302 na aktuální URL; soubor mimo manifest → /static/images/<jméno>
+- IMAGE_SENDFILE = "x-accel" (nginx, interní location IMAGE_ACCEL_PREFIX)
+  nebo "x-sendfile" (Apache / lighttpd) → bajty posílá proxy, ne Python worker
+"""
+
+import hashlib
+import json
+import mimetypes
+import os
+import queue
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+from flask import Response, current_app, redirect, request, url_for
+from flask_smorest import abort
+from werkzeug.http import is_resource_modified
+from werkzeug.wsgi import wrap_file
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # pragma: no cover - Pillow je volitelná
+    Image = None
+
+CHUNK_SIZE = 64 * 1024
+
+# první bajty souboru → přípona
+_SIGNATURES = (
+    (b"\xff\xd8\xff", "jpg"),
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"GIF87a", "gif"),
+    (b"GIF89a", "gif"),
+)
+
+# varianta → (max. šířka, formát Pillow, přípona)
+DEFAULT_VARIANTS = {
+    "thumb":  (320, "JPEG", "jpg"),
+    "medium": (1024, "JPEG", "jpg"),
+    "webp":   (1024, "WEBP", "webp"),
+}
+
+MANIFEST_SUFFIX = ".variants.json"
+MANIFEST_FILE   = "manifest.json"
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+def sniff_extension(head):
+    for signature, ext in _SIGNATURES:
+        if head.startswith(signature):
+            return ext
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+def manifest_path(folder, filename):
+    return os.path.join(folder, os.path.splitext(filename)[0] + MANIFEST_SUFFIX)
+
+
+def make_variants(folder, filename, variants=DEFAULT_VARIANTS, quality=82):
+    """Vyrobí varianty jednoho obrázku a zapíše manifest; vrací {varianta: jméno souboru}."""
+    made = {}
+    if Image is not None:
+        stem = os.path.splitext(filename)[0]
+        with Image.open(os.path.join(folder, filename)) as source:
+            image = ImageOps.exif_transpose(source)
+            for name, (width, fmt, ext) in variants.items():
+                copy = image.copy()
+                copy.thumbnail((width, width * 4))          # jen zmenšuje, poměr stran zachová
+                if fmt == "JPEG" and copy.mode not in ("RGB", "L"):
+                    copy = copy.convert("RGB")
+                out = f"{stem}-{name}.{ext}"
+                tmp = os.path.join(folder, f".{out}.tmp")
+                copy.save(tmp, fmt, quality=quality, optimize=True)
+                os.replace(tmp, os.path.join(folder, out))
+                made[name] = out
+
+    path = manifest_path(folder, filename)
+    with open(path + ".tmp", "w") as fh:
+        json.dump(made, fh)
+    os.replace(path + ".tmp", path)
+    return made
+
+
+class ImageManifest:
+    """jméno souboru → {"fingerprint", "size", "mtime", "mimetype"}"""
+
+    def __init__(self, folder):
+        self.folder   = folder
+        self.entries  = {}
+        self._lock    = threading.Lock()
+
+    @staticmethod
+    def is_image(name):
+        return not name.startswith(".") and not name.endswith(".json")
+
+    def _compute(self, name, stat):
+        digest = hashlib.sha256()
+        with open(os.path.join(self.folder, name), "rb") as fh:
+            for chunk in iter(lambda: fh.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+        return {
+            "fingerprint": digest.hexdigest()[:16],
+            "size":        stat.st_size,
+            "mtime":       int(stat.st_mtime),
+            "mimetype":    mimetypes.guess_type(name)[0] or "application/octet-stream",
+        }
+
+    def add(self, name):
+        entry = self._compute(name, os.stat(os.path.join(self.folder, name)))
+        with self._lock:
+            self.entries[name] = entry
+        return entry
+
+    def get(self, name):
+        return self.entries.get(name)
+
+    def lookup(self, name):
+        """Jako get(), ale soubor, který ve složce přibyl po load(), do manifestu doplní."""
+        entry = self.entries.get(name)
+        if entry is not None or not self.is_image(name) or os.path.basename(name) != name:
+            return entry
+        try:
+            return self.add(name)
+        except OSError:
+            return None
+
+    def load(self):
+        """Načte manifest.json a dorovná ho se složkou; vrací počet přepočítaných souborů."""
+        try:
+            with open(os.path.join(self.folder, MANIFEST_FILE)) as fh:
+                stored = json.load(fh)
+        except (OSError, ValueError):
+            stored = {}
+        entries, computed = {}, 0
+        if os.path.isdir(self.folder):
+            for name in os.listdir(self.folder):
+                if not self.is_image(name):
+                    continue
+                stat = os.stat(os.path.join(self.folder, name))
+                old  = stored.get(name)
+                if old and old.get("size") == stat.st_size and old.get("mtime") == int(stat.st_mtime):
+                    entries[name] = old
+                else:
+                    entries[name] = self._compute(name, stat)
+                    computed += 1
+        with self._lock:
+            self.entries = entries
+        return computed
+
+    def save(self):
+        path = os.path.join(self.folder, MANIFEST_FILE)
+        with open(path + ".tmp", "w") as fh:
+            json.dump(self.entries, fh, indent=1, sort_keys=True)
+        os.replace(path + ".tmp", path)
+
+
+class ImagePipeline:
+    def __init__(self, folder, workers=1, queue_size=100, variants=DEFAULT_VARIANTS,
+                 quality=82, recheck_seconds=30, on_ready=None, logger=None):
+        self.folder          = folder
+        self.workers         = workers
+        self.variants        = variants
+        self.quality         = quality
+        self.recheck_seconds = recheck_seconds
+        self.on_ready        = on_ready
+        self.logger          = logger
+        self._queue          = queue.Queue(maxsize=queue_size)
+        self._threads        = []
+        self._lock           = threading.Lock()
+        self._manifests      = {}   # jméno → (varianty, platí do; None = navždy)
+        self.manifest        = ImageManifest(folder)
+
+    # ── zpracování ────────────────────────────────────────────────────
+    def process(self, filename):
+        try:
+            made = make_variants(self.folder, filename, self.variants, self.quality)
+        except Exception:
+            if self.logger:
+                self.logger.exception("Zpracování obrázku %s selhalo.", filename)
+            made = {}
+        for name in made.values():
+            self.manifest.add(name)
+        self._manifests[filename] = (made, None)
+        if self.on_ready:
+            self.on_ready(filename)
+        return made
+
+    def _run(self):
+        while True:
+            filename = self._queue.get()
+            try:
+                self.process(filename)
+            finally:
+                self._queue.task_done()
+
+    def _start(self):
+        with self._lock:
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(target=self._run, name="image-pipeline", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, filename):
+        if not self.workers:
+            self.process(filename)
+            return
+        self._start()
+        try:
+            self._queue.put_nowait(filename)
+        except queue.Full:
+            # plná fronta → zpracujeme hned (zpětný tlak na uploady místo ztracených variant)
+            self.process(filename)
+
+    def join(self):
+        """Počká, až se zpracuje vše ve frontě (testy, CLI)."""
+        self._queue.join()
+
+    # ── varianty ──────────────────────────────────────────────────────
+    def variant_names(self, filename):
+        """{"original": jméno, varianta: jméno, …} podle manifestu."""
+        entry = self._manifests.get(filename)
+        now   = time.monotonic()
+        if entry is None or (entry[1] is not None and entry[1] < now):
+            try:
+                with open(manifest_path(self.folder, filename)) as fh:
+                    entry = (json.load(fh), None)
+            except (OSError, ValueError):
+                # ještě nezpracováno (nebo starý obrázek) → znovu se podíváme za recheck_seconds
+                entry = ({}, now + self.recheck_seconds)
+            self._manifests[filename] = entry
+        return {"original": filename, **entry[0]}
+
+    def display_name(self, filename):
+        return self.variant_names(filename).get("medium", filename)
+
+    # ── upload ────────────────────────────────────────────────────────
+    def save_upload(self, file, max_bytes):
+        """Uloží upload pod jménem podle obsahu a zařadí ho ke zpracování; vrací jméno souboru."""
+        os.makedirs(self.folder, exist_ok=True)
+        digest = hashlib.sha256()
+        size   = 0
+        ext    = None
+        fd, tmp = tempfile.mkstemp(prefix=".upload-", dir=self.folder)
+        try:
+            with os.fdopen(fd, "wb") as out:
+                while True:
+                    chunk = file.stream.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    if ext is None:
+                        ext = sniff_extension(chunk)
+                        if ext is None:
+                            abort(400, message="Nepodporovaný formát obrázku (JPEG, PNG, GIF, WebP).")
+                    size += len(chunk)
+                    if size > max_bytes:
+                        abort(413, message=f"Obrázek je větší než povolených {max_bytes // 1024} kB.")
+                    digest.update(chunk)
+                    out.write(chunk)
+            if ext is None:
+                abort(400, message="Prázdný soubor s obrázkem.")
+
+            filename = f"{digest.hexdigest()[:32]}.{ext}"
+            dest     = os.path.join(self.folder, filename)
+            if os.path.exists(dest):
+                os.unlink(tmp)
+            else:
+                os.chmod(tmp, 0o644)
+                os.replace(tmp, dest)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+
+        if self.manifest.get(filename) is None:
+            self.manifest.add(filename)
+        if not os.path.exists(manifest_path(self.folder, filename)):
+            self.submit(filename)
+        return filename
+
+
+def get_image_pipeline():
+    return current_app.extensions["image_pipeline"]
+
+
+def save_upload(file):
+    """Uloží obrázek z request.files (None / prázdný = nic); vrací jméno souboru nebo None."""
+    if not file or not file.filename:
+        return None
+    return get_image_pipeline().save_upload(
+        file, current_app.config.get("IMAGE_MAX_UPLOAD_BYTES", 10 * 1024 * 1024)
+    )
+
+
+def file_url(name, external=False):
+    """URL s otiskem obsahu (/img/<otisk>/<jméno>), pro soubory mimo manifest /static/images/<jméno>."""
+    entry = get_image_pipeline().manifest.lookup(name)
+    if entry is None:
+        return url_for("static", filename=f"images/{name}", _external=external)
+    return url_for("image_file", path=f"{entry['fingerprint']}/{name}", _external=external)
+
+
+def image_url(filename, external=False):
+    if not filename:
+        return None
+    return file_url(get_image_pipeline().display_name(filename), external)
+
+
+def image_srcset(filename, external=False):
+    if not filename:
+        return None
+    return {
+        variant: file_url(name, external)
+        for variant, name in get_image_pipeline().variant_names(filename).items()
+    }
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# GET /img/<otisk>/<jméno>
+# ──────────────────────────────────────────────────────────────────────────────
+def serve_image(path):
+    fingerprint, _, name = path.partition("/")
+    pipeline = get_image_pipeline()
+    entry    = pipeline.manifest.lookup(name)
+    if entry is None:
+        abort(404, message="Obrázek nenalezen.")
+    if fingerprint != entry["fingerprint"]:
+        # obsah se změnil → aktuální verze (ta se cachuje, přesměrování ne)
+        resp = redirect(file_url(name), 302)
+        resp.headers["Cache-Control"] = "no-cache"
+        return resp
+
+    resp = Response(mimetype=entry["mimetype"])
+    resp.headers["Cache-Control"] = IMMUTABLE
+    modified = datetime.fromtimestamp(entry["mtime"], timezone.utc)
+    resp.set_etag(entry["fingerprint"])
+    resp.last_modified = modified
+
+    mode = current_app.config.get("IMAGE_SENDFILE")
+    full = os.path.join(pipeline.folder, name)
+    if mode == "x-accel":
+        resp.headers["X-Accel-Redirect"] = current_app.config.get(
+            "IMAGE_ACCEL_PREFIX", "/_protected/images").rstrip("/") + "/" + name
+        return resp.make_conditional(request.environ)
+    if mode == "x-sendfile":
+        resp.headers["X-Sendfile"] = full
+        return resp.make_conditional(request.environ)
+
+    if not is_resource_modified(request.environ, etag=entry["fingerprint"], last_modified=modified):
+        return resp.make_conditional(request.environ)       # 304 bez otevírání souboru
+    try:
+        fh = open(full, "rb")
+    except FileNotFoundError:
+        abort(404, message="Obrázek nenalezen.")
+    resp.response            = wrap_file(request.environ, fh)
+    resp.direct_passthrough  = True
+    resp.content_length      = entry["size"]
+    return resp.make_conditional(request.environ, accept_ranges=True, complete_length=entry["size"])
+
+
+def init_image_pipeline(app):
+    def on_ready(filename):
+        # snapshot menu obsahuje URL obrázků → po dokončení variant se přestaví
+        with app.app_context():
+            from .menu_cache import bump_menu_version
+            bump_menu_version()
+
+    pipeline = ImagePipeline(
+        app.config["UPLOAD_FOLDER"],
+        workers=app.config.get("IMAGE_WORKERS", 1),
+        queue_size=app.config.get("IMAGE_QUEUE_SIZE", 100),
+        quality=app.config.get("IMAGE_QUALITY", 82),
+        on_ready=on_ready,
+        logger=app.logger,
+    )
+    pipeline.manifest.load()
+    app.extensions["image_pipeline"] = pipeline
+    app.add_url_rule("/img/<path:path>", "image_file", serve_image)
+    return pipeline
@@ -0,0 +1,74 @@
+# app/inbox.py
+
+"""
+Schránka notifikací: příznak přečtení a průběžně udržovaný počet nepřečtených.
+
+Zakaznik.neprectene_notifikace se mění jen atomickými UPDATE … = x ± n:
+  - dispečer outboxu (app/outbox.py) přičte nově vložené notifikace
+  - označení jako přečtené odečte přesně rowcount UPDATE … WHERE NOT precteno,
+    takže souběžné označení téže notifikace se neodečte dvakrát
+Počet nepřečtených je pak jeden bodový dotaz podle PK, bez COUNT(*) nad historií.
+`flask rebuild-unread-counts` počítadla přepočítá z tabulky notifikace.
+"""
+
+from collections import Counter
+
+from sqlalchemy import bindparam, func
+
+from .db import db
+from .models import Notifikace, Zakaznik
+
+
+def add_unread(notifs):
+    """Přičte nově vložené (nepřečtené) notifikace k počítadlům jejich adresátů."""
+    counts = Counter(n.id_zakaznika for n in notifs if not n.precteno)
+    if not counts:
+        return
+    table = Zakaznik.__table__
+    db.session.execute(
+        table.update()
+             .where(table.c.id_zakaznika == bindparam("zak"))
+             .values(neprectene_notifikace=table.c.neprectene_notifikace + bindparam("n")),
+        [{"zak": zak, "n": n} for zak, n in counts.items()],
+    )
+
+
+def unread_count(zak_id):
+    return db.session.scalar(
+        db.select(Zakaznik.neprectene_notifikace).where(Zakaznik.id_zakaznika == zak_id)
+    ) or 0
+
+
+def mark_read(zak_id, ids=None, until_id=None):
+    """Označí notifikace uživatele jako přečtené (seznam id, nebo vše do until_id); vrací počet změněných."""
+    stmt = (
+        db.update(Notifikace)
+          .where(Notifikace.id_zakaznika == zak_id, Notifikace.precteno.is_(False))
+          .values(precteno=True)
+          .execution_options(synchronize_session=False)
+    )
+    if ids is not None:
+        stmt = stmt.where(Notifikace.id_notifikace.in_(ids))
+    else:
+        stmt = stmt.where(Notifikace.id_notifikace <= until_id)
+    changed = db.session.execute(stmt).rowcount
+    if changed:
+        db.session.execute(
+            db.update(Zakaznik)
+              .where(Zakaznik.id_zakaznika == zak_id)
+              .values(neprectene_notifikace=Zakaznik.neprectene_notifikace - changed)
+              .execution_options(synchronize_session=False)
+        )
+    return changed
+
+
+def rebuild_unread_counts():
+    """Přepočítá všechna počítadla z tabulky notifikace (po ručních zásazích do dat)."""
+    unread = (
+        db.select(func.count())
+          .where(Notifikace.id_zakaznika == Zakaznik.id_zakaznika, Notifikace.precteno.is_(False))
+          .scalar_subquery()
+    )
+    db.session.execute(
+        db.update(Zakaznik).values(neprectene_notifikace=unread).execution_options(synchronize_session=False)
+    )
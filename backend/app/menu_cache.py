@@ -0,0 +1,148 @@
+# app/menu_cache.py
+
+import gzip
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, request, Response
+from sqlalchemy.orm import selectinload
+
+from .db import db
+from . import serializers
+from .models import PolozkaMenu, PolozkaMenuAlergen
+from .schemas import PolozkaMenuSchema
+
+
+# hodnota ?kategorie= / ?den=, kterou žádná položka nemá → všechny sdílejí jednu (prázdnou) variantu
+NEZNAMA = object()
+
+
+def _prepsat_url(items, zmena):
+    """Použije zmena(url) na obrazek_url a obrazek_srcset položek (nové dicty, vstup se nemění)."""
+    out = []
+    for it in items:
+        if it.get("obrazek_url") or it.get("obrazek_srcset"):
+            it = dict(it)
+            if it.get("obrazek_url"):
+                it["obrazek_url"] = zmena(it["obrazek_url"])
+            if it.get("obrazek_srcset"):
+                it["obrazek_srcset"] = {k: zmena(v) for k, v in it["obrazek_srcset"].items()}
+        out.append(it)
+    return out
+
+
+class RenderedMenu:
+    """Hotové bajty jedné varianty menu (JSON + gzip) a jejich silné ETagy."""
+
+    def __init__(self, items):
+        self.body      = current_app.json.dumps(items).encode("utf-8")
+        self.gzip_body = gzip.compress(self.body, compresslevel=6)
+        digest         = hashlib.sha256(self.body).hexdigest()[:32]
+        self.etag      = digest
+        self.gzip_etag = f"{digest}-gzip"
+
+
+class MenuSnapshot:
+    """
+    Snapshot veřejného menu držený v paměti procesu.
+    - `version` zvyšují zápisové endpointy menu/alergenů přes invalidate()
+    - položky se serializují jednou, filtry kategorie/den se skládají z hotových dictů
+    - položky drží URL obrázků bez hosta; absolutní URL (adresa z requestu) se
+      doplní až do vyrenderované varianty
+    - neznámá kategorie/den nezakládá novou variantu a hotových variant
+      (host × kategorie × den) je nejvýš MENU_SNAPSHOT_MAX_VARIANTS (LRU)
+    - ostatní workery snapshot přestaví nejpozději po MENU_SNAPSHOT_MAX_AGE sekundách
+    """
+
+    def __init__(self, app):
+        self.max_age      = app.config.get("MENU_SNAPSHOT_MAX_AGE", 60)
+        self.max_variants = app.config.get("MENU_SNAPSHOT_MAX_VARIANTS", 64)
+        self.version      = 0
+        self._lock        = threading.Lock()
+        self._items       = None           # dumpnuté položky, URL obrázků bez hosta
+        self._hodnoty     = {}             # "kategorie" / "den" -> množina známých hodnot
+        self._rendered    = OrderedDict()  # (host_url, kategorie, den) -> RenderedMenu
+        self._built_at    = None
+
+    def invalidate(self):
+        with self._lock:
+            self.version  += 1
+            self._items    = None
+            self._rendered = OrderedDict()
+            self._built_at = None
+
+    def _expired(self):
+        return self._built_at is None or time.monotonic() - self._built_at > self.max_age
+
+    def _load_items(self):
+        stmt = (
+            db.select(PolozkaMenu)
+              .options(
+                selectinload(PolozkaMenu.alergeny)
+                  .selectinload(PolozkaMenuAlergen.alergen)
+              )
+        )
+        items = serializers.dump(PolozkaMenuSchema(many=True), db.session.scalars(stmt).all())
+        host  = request.host_url.rstrip("/")
+        return _prepsat_url(items, lambda url: url[len(host):] if url.startswith(host) else url)
+
+    def _filtr(self, pole, hodnota):
+        if hodnota is None or hodnota in self._hodnoty[pole]:
+            return hodnota
+        return NEZNAMA
+
+    def get(self, kategorie=None, den=None):
+        with self._lock:
+            if self._expired() or self._items is None:
+                self._items    = self._load_items()
+                self._hodnoty  = {pole: {it.get(pole) for it in self._items} for pole in ("kategorie", "den")}
+                self._rendered = OrderedDict()
+                self._built_at = time.monotonic()
+            host      = request.host_url.rstrip("/")
+            kategorie = self._filtr("kategorie", kategorie)
+            den       = self._filtr("den", den)
+            key       = (host, kategorie, den)
+            rendered  = self._rendered.get(key)
+            if rendered is not None:
+                self._rendered.move_to_end(key)
+                return rendered
+            selected = [
+                it for it in self._items
+                if (kategorie is None or it.get("kategorie") == kategorie)
+                and (den is None or it.get("den") == den)
+            ]
+            rendered = self._rendered[key] = RenderedMenu(_prepsat_url(selected, lambda url: host + url))
+            while len(self._rendered) > self.max_variants:
+                self._rendered.popitem(last=False)
+            return rendered
+
+
+def init_menu_snapshot(app):
+    app.extensions["menu_snapshot"] = MenuSnapshot(app)
+
+
+def bump_menu_version():
+    current_app.extensions["menu_snapshot"].invalidate()
+
+
+def menu_response(kategorie=None, den=None):
+    """Odpověď GET /api/menu ze snapshotu, včetně 304 a gzip varianty."""
+    rendered = current_app.extensions["menu_snapshot"].get(kategorie, den)
+    use_gzip = "gzip" in request.accept_encodings
+    etag     = rendered.gzip_etag if use_gzip else rendered.etag
+
+    inm = request.if_none_match
+    if inm and (inm.contains_weak(rendered.etag) or inm.contains_weak(rendered.gzip_etag)):
+        resp = Response(status=304)
+    elif use_gzip:
+        resp = Response(rendered.gzip_body, mimetype="application/json")
+        resp.headers["Content-Encoding"] = "gzip"
+    else:
+        resp = Response(rendered.body, mimetype="application/json")
+
+    resp.set_etag(etag)
+    resp.headers["Cache-Control"] = "no-cache"
+    resp.vary.add("Accept-Encoding")
+    return resp
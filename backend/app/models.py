@@ -1,7 +1,8 @@
 from .db import db                                    # db = SQLAlchemy instance
 # pro kontrolu podmínek na úrovni DB
-from sqlalchemy import CheckConstraint
+from sqlalchemy import CheckConstraint, Index
 from werkzeug.security import generate_password_hash, check_password_hash
+from .hashing import password_method
 # pro časové razítko a datum
 from datetime import datetime, date
 
@@ -12,6 +13,7 @@ user_roles = db.Table(
               db.ForeignKey("zakaznik.id_zakaznika"), primary_key=True),
     db.Column("role_id",     db.Integer,
               db.ForeignKey("role.id_role"),           primary_key=True),
+    Index("ix_user_roles_role_id", "role_id"),
 )
 
 class Zakaznik(db.Model):
@@ -22,18 +24,19 @@ class Zakaznik(db.Model):
     telefon        = db.Column(db.String(20),  nullable=True)
     email          = db.Column(db.String(100), nullable=False, unique=True)
     _password      = db.Column("password", db.String(255), nullable=False, server_default="")
+    neprectene_notifikace = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    #   průběžně udržovaný počet nepřečtených notifikací (app/inbox.py)
 
     ucet           = db.relationship("VernostniUcet", back_populates="zakaznik", uselist=False, cascade="all, delete-orphan")
-    rezervace      = db.relationship("Rezervace",    back_populates="zakaznik", lazy="dynamic")
-    objednavky     = db.relationship("Objednavka",   back_populates="zakaznik", lazy="dynamic")
-    hodnoceni      = db.relationship("Hodnoceni",    back_populates="zakaznik", lazy="dynamic")
+    rezervace      = db.relationship("Rezervace",    back_populates="zakaznik")
+    objednavky     = db.relationship("Objednavka",   back_populates="zakaznik")
+    hodnoceni      = db.relationship("Hodnoceni",    back_populates="zakaznik")
     notifikace     = db.relationship("Notifikace",   back_populates="zakaznik", lazy="dynamic")
 
     roles          = db.relationship(
                         "Role",
                         secondary=user_roles,
                         backref=db.backref("zakaznici", lazy="dynamic"),
-                        lazy="dynamic",
                      )
 
     def __repr__(self):
@@ -45,7 +48,7 @@ class Zakaznik(db.Model):
 
     @password.setter
     def password(self, raw_password: str):
-        self._password = generate_password_hash(raw_password)
+        self._password = generate_password_hash(raw_password, password_method())
 
     def check_password(self, raw_password: str) -> bool:
         return check_password_hash(self._password, raw_password)
@@ -56,7 +59,7 @@ class VernostniUcet(db.Model):
     id_ucet       = db.Column(db.Integer, primary_key=True)
     body          = db.Column(db.Integer, nullable=False, default=0)
     datum_zalozeni= db.Column(db.Date,    nullable=False, default=date.today)
-    id_zakaznika  = db.Column(db.Integer, db.ForeignKey("zakaznik.id_zakaznika", ondelete="CASCADE"), nullable=False)
+    id_zakaznika  = db.Column(db.Integer, db.ForeignKey("zakaznik.id_zakaznika", ondelete="CASCADE"), nullable=False, index=True, unique=True)
 
     zakaznik      = db.relationship("Zakaznik", back_populates="ucet", uselist=False)
 
@@ -68,6 +71,31 @@ class VernostniUcet(db.Model):
         )
 
 
+class BodovyPohyb(db.Model):
+    """
+    Append-only kniha věrnostních bodů: každý zisk/uplatnění je nový řádek, nic se nepřepisuje.
+    VernostniUcet.body = součet pohybů se zapocteno=True (průběžně dopočítává points.compact);
+    aktuální zůstatek = body + součet dosud nezapočtených pohybů.
+    """
+    __tablename__  = "bodovy_pohyb"
+    __table_args__ = (
+        # zůstatek čte jen malý „ocas“ nezapočtených pohybů zákazníka
+        Index("ix_bodovy_pohyb_nezapocteno", "id_zakaznika",
+              postgresql_where=db.text("NOT zapocteno"), sqlite_where=db.text("NOT zapocteno")),
+        Index("ix_bodovy_pohyb_zakaznik", "id_zakaznika", "id_pohybu"),
+    )
+    id_pohybu     = db.Column(db.Integer, primary_key=True)
+    id_zakaznika  = db.Column(db.Integer, db.ForeignKey("zakaznik.id_zakaznika", ondelete="CASCADE"), nullable=False)
+    zmena         = db.Column(db.Integer, nullable=False)                 # + zisk, − uplatnění
+    typ           = db.Column(db.String(20), nullable=False)
+    datum_cas     = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    id_objednavky = db.Column(db.Integer, db.ForeignKey("objednavka.id_objednavky", ondelete="SET NULL"), nullable=True, index=True)
+    zapocteno     = db.Column(db.Boolean, nullable=False, default=False)  # už je v VernostniUcet.body
+
+    def __repr__(self):
+        return f"<BodovyPohyb {self.id_pohybu} {self.typ} {self.zmena:+d}>"
+
+
 class Rezervace(db.Model):
     __tablename__  = "rezervace"
     __table_args__ = (
@@ -75,10 +103,20 @@ class Rezervace(db.Model):
             "(id_stul IS NOT NULL) OR (id_salonek IS NOT NULL) OR (id_akce IS NOT NULL) OR (id_workshop IS NOT NULL)",
             name="chk_rezervace_misto"
         ),
+        # rezervace zákazníka (seznam řazený podle času)
+        Index("ix_rezervace_zakaznik_cas", "id_zakaznika", "datum_cas"),
+        # obsazenost zdroje v čase; částečné – každá rezervace má vyplněný jen jeden zdroj
+        *(
+            Index(f"ix_rezervace_{fk}_cas", f"id_{fk}", "datum_cas",
+                  postgresql_where=db.text(f"id_{fk} IS NOT NULL"), sqlite_where=db.text(f"id_{fk} IS NOT NULL"))
+            for fk in ("stul", "salonek", "akce", "workshop")
+        ),
     )
     id_rezervace   = db.Column(db.Integer, primary_key=True)
     datum_cas      = db.Column(db.DateTime, nullable=False)
     pocet_osob     = db.Column(db.Integer,  nullable=False)
+    delka_minut    = db.Column(db.Integer,  nullable=False, default=120, server_default="120")
+    stul_prirazen  = db.Column(db.Boolean,  nullable=False, default=False, server_default=db.false())   # stůl vybral server, drží ho výhradně
     stav_rezervace = db.Column(db.String(20), nullable=False, default="čekající")
     sleva          = db.Column(db.Numeric(5, 2), nullable=True)
     id_zakaznika   = db.Column(db.Integer, db.ForeignKey("zakaznik.id_zakaznika", ondelete="CASCADE"), nullable=False)
@@ -93,12 +131,26 @@ class Rezervace(db.Model):
     salonek        = db.relationship("Salonek",   back_populates="rezervace")
     akce           = db.relationship("PodnikovaAkce", back_populates="rezervace")
     workshop       = db.relationship("Workshop",       back_populates="rezervace")
-    notifikace     = db.relationship("Notifikace", back_populates="rezervace", lazy="dynamic")
+    notifikace     = db.relationship("Notifikace", back_populates="rezervace")
 
     def __repr__(self):
         return f"<Rezervace {self.id_rezervace} {self.datum_cas.isoformat()}>"
 
 
+class Obsazenost(db.Model):
+    """Průběžně udržovaný součet osob na zdroji (stůl/salonek/akce/workshop) v daném čase."""
+    __tablename__ = "obsazenost"
+    typ_zdroje    = db.Column(db.String(20), primary_key=True)
+    id_zdroje     = db.Column(db.Integer,    primary_key=True)
+    datum_cas     = db.Column(db.DateTime,   primary_key=True)
+    obsazeno      = db.Column(db.Integer,    nullable=False, default=0)
+    vyhradne      = db.Column(db.Boolean,    nullable=False, default=False, server_default=db.false())
+    #   slot drží stůl přidělený serverem (Rezervace.stul_prirazen) – nikdo další se nepřidá
+
+    def __repr__(self):
+        return f"<Obsazenost {self.typ_zdroje}/{self.id_zdroje} {self.datum_cas.isoformat()} = {self.obsazeno}>"
+
+
 class Stul(db.Model):
     __tablename__ = "stul"
     id_stul       = db.Column(db.Integer, primary_key=True)
@@ -106,7 +158,7 @@ class Stul(db.Model):
     kapacita      = db.Column(db.Integer, nullable=False)
     popis         = db.Column(db.Text,    nullable=True)
 
-    rezervace     = db.relationship("Rezervace", back_populates="stul", lazy="dynamic")
+    rezervace     = db.relationship("Rezervace", back_populates="stul")
 
     def __repr__(self):
         return f"<Stul {self.cislo} cap={self.kapacita}>"
@@ -121,8 +173,8 @@ class Salonek(db.Model):
     kapacita            = db.Column(db.Integer,         nullable=False)
     obrazek_filename    = db.Column(db.String,          nullable=True)
 
-    rezervace           = db.relationship("Rezervace",      back_populates="salonek", lazy="dynamic")
-    akce                = db.relationship("PodnikovaAkce", back_populates="salonek", lazy="dynamic")
+    rezervace           = db.relationship("Rezervace",      back_populates="salonek")
+    akce                = db.relationship("PodnikovaAkce", back_populates="salonek")
 
     def __repr__(self):
         return f"<Salonek {self.nazev} cap={self.kapacita}>"
@@ -138,7 +190,7 @@ class PodnikovaAkce(db.Model):
     obrazek_filename    = db.Column(db.String,          nullable=True)
     datum               = db.Column(db.Date,           nullable=False)
     cas                 = db.Column(db.Time,           nullable=False)
-    id_salonek          = db.Column(db.Integer, db.ForeignKey("salonek.id_salonek"), nullable=False)
+    id_salonek          = db.Column(db.Integer, db.ForeignKey("salonek.id_salonek"), nullable=False, index=True)
 
     salonek             = db.relationship("Salonek",   back_populates="akce")
     rezervace           = db.relationship("Rezervace", back_populates="akce", lazy="dynamic")
@@ -157,7 +209,7 @@ class Workshop(db.Model):
     obrazek_filename    = db.Column(db.String,      nullable=True)
     cas_konani          = db.Column(db.DateTime,    nullable=False)
 
-    rezervace           = db.relationship("Rezervace", back_populates="workshop", lazy="dynamic")
+    rezervace           = db.relationship("Rezervace", back_populates="workshop")
 
     def __repr__(self):
         return f"<Workshop {self.nazev} @ {self.cas_konani.isoformat()}>"
@@ -165,6 +217,10 @@ class Workshop(db.Model):
 
 class Objednavka(db.Model):
     __tablename__       = "objednavka"
+    __table_args__      = (
+        # objednávky zákazníka v pořadí id (keyset stránkování seznamu)
+        Index("ix_objednavka_zakaznik", "id_zakaznika", "id_objednavky"),
+    )
     id_objednavky       = db.Column(db.Integer, primary_key=True)
     datum_cas           = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     stav                = db.Column(db.String(20), nullable=False, default="PENDING")
@@ -176,10 +232,10 @@ class Objednavka(db.Model):
     discount_amount     = db.Column(db.Integer, nullable=False, default=0)
 
     zakaznik            = db.relationship("Zakaznik", back_populates="objednavky")
-    polozky             = db.relationship("PolozkaObjednavky", back_populates="objednavka", lazy="dynamic")
-    platby              = db.relationship("Platba", back_populates="objednavka", lazy="dynamic")
-    hodnoceni           = db.relationship("Hodnoceni", back_populates="objednavka", lazy="dynamic")
-    notifikace          = db.relationship("Notifikace", back_populates="objednavka", lazy="dynamic")
+    polozky             = db.relationship("PolozkaObjednavky", back_populates="objednavka")
+    platby              = db.relationship("Platba", back_populates="objednavka")
+    hodnoceni           = db.relationship("Hodnoceni", back_populates="objednavka")
+    notifikace          = db.relationship("Notifikace", back_populates="objednavka")
 
     def __repr__(self):
         return f"<Objednavka {self.id_objednavky}>"
@@ -190,8 +246,8 @@ class PolozkaObjednavky(db.Model):
     id_polozky_obj      = db.Column(db.Integer, primary_key=True)
     mnozstvi            = db.Column(db.Integer, nullable=False)
     cena                = db.Column(db.Numeric(8,2), nullable=False)
-    id_objednavky       = db.Column(db.Integer, db.ForeignKey("objednavka.id_objednavky"), nullable=False)
-    id_menu_polozka     = db.Column(db.Integer, db.ForeignKey("polozka_menu.id_menu_polozka"), nullable=False)
+    id_objednavky       = db.Column(db.Integer, db.ForeignKey("objednavka.id_objednavky"), nullable=False, index=True)
+    id_menu_polozka     = db.Column(db.Integer, db.ForeignKey("polozka_menu.id_menu_polozka"), nullable=False, index=True)
 
     objednavka          = db.relationship("Objednavka",     back_populates="polozky")
     menu_polozka        = db.relationship("PolozkaMenu",     back_populates="objednavky")
@@ -206,7 +262,7 @@ class Platba(db.Model):
     castka              = db.Column(db.Numeric(8,2), nullable=False)
     typ_platby          = db.Column(db.String(20),    nullable=False)
     datum               = db.Column(db.DateTime,      nullable=False)
-    id_objednavky       = db.Column(db.Integer, db.ForeignKey("objednavka.id_objednavky"), nullable=False)
+    id_objednavky       = db.Column(db.Integer, db.ForeignKey("objednavka.id_objednavky"), nullable=False, index=True)
 
     objednavka          = db.relationship("Objednavka", back_populates="platby")
 
@@ -220,8 +276,8 @@ class Hodnoceni(db.Model):
     hodnoceni           = db.Column(db.SmallInteger, nullable=False)
     komentar            = db.Column(db.Text,           nullable=True)
     datum               = db.Column(db.DateTime,       nullable=False)
-    id_objednavky       = db.Column(db.Integer, db.ForeignKey("objednavka.id_objednavky"), nullable=False)
-    id_zakaznika        = db.Column(db.Integer, db.ForeignKey("zakaznik.id_zakaznika", ondelete="CASCADE"), nullable=False)
+    id_objednavky       = db.Column(db.Integer, db.ForeignKey("objednavka.id_objednavky"), nullable=False, index=True)
+    id_zakaznika        = db.Column(db.Integer, db.ForeignKey("zakaznik.id_zakaznika", ondelete="CASCADE"), nullable=False, index=True)
 
     objednavka          = db.relationship("Objednavka", back_populates="hodnoceni")
     zakaznik            = db.relationship("Zakaznik",   back_populates="hodnoceni")
@@ -266,7 +322,7 @@ class Alergen(db.Model):
 class PolozkaMenuAlergen(db.Model):
     __tablename__       = "polozka_menu_alergen"
     id_menu_polozka     = db.Column(db.Integer, db.ForeignKey("polozka_menu.id_menu_polozka"), primary_key=True)
-    id_alergenu         = db.Column(db.Integer, db.ForeignKey("alergen.id_alergenu"),           primary_key=True)
+    id_alergenu         = db.Column(db.Integer, db.ForeignKey("alergen.id_alergenu"),           primary_key=True, index=True)
 
     menu_polozka        = db.relationship("PolozkaMenu", back_populates="alergeny")
     alergen             = db.relationship("Alergen",      back_populates="polozky")
@@ -282,7 +338,7 @@ class JidelniPlan(db.Model):
     platny_od           = db.Column(db.Date,           nullable=False)
     platny_do           = db.Column(db.Date,           nullable=True)
 
-    polozky             = db.relationship("PolozkaJidelnihoPlanu", back_populates="plan", lazy="dynamic")
+    polozky             = db.relationship("PolozkaJidelnihoPlanu", back_populates="plan")
 
     def __repr__(self):
         return f"<JidelniPlan {self.nazev}>"
@@ -293,8 +349,8 @@ class PolozkaJidelnihoPlanu(db.Model):
     id_polozka_jid_pl   = db.Column(db.Integer, primary_key=True)
     den                 = db.Column(db.Date,    nullable=False)
     poradi              = db.Column(db.Integer, nullable=False)
-    id_plan             = db.Column(db.Integer, db.ForeignKey("jidelni_plan.id_plan"), nullable=False)
-    id_menu_polozka     = db.Column(db.Integer, db.ForeignKey("polozka_menu.id_menu_polozka"), nullable=False)
+    id_plan             = db.Column(db.Integer, db.ForeignKey("jidelni_plan.id_plan"), nullable=False, index=True)
+    id_menu_polozka     = db.Column(db.Integer, db.ForeignKey("polozka_menu.id_menu_polozka"), nullable=False, index=True)
 
     plan                = db.relationship("JidelniPlan", back_populates="polozky")
     menu_polozka        = db.relationship("PolozkaMenu", back_populates="plany")
@@ -305,14 +361,22 @@ class PolozkaJidelnihoPlanu(db.Model):
 
 class Notifikace(db.Model):
     __tablename__       = "notifikace"
+    __table_args__      = (
+        # schránka uživatele: WHERE id_zakaznika = ? ORDER BY datum_cas DESC, id DESC LIMIT n
+        Index("ix_notifikace_schranka", "id_zakaznika", "datum_cas", "id_notifikace",
+              postgresql_include=["precteno"]),
+        Index("ix_notifikace_neprectene", "id_zakaznika", "id_notifikace",
+              postgresql_where=db.text("NOT precteno"), sqlite_where=db.text("NOT precteno")),
+    )
     id_notifikace       = db.Column(db.Integer, primary_key=True)
     typ                 = db.Column(db.String(20), nullable=False)
     datum_cas           = db.Column(db.DateTime, nullable=False)
     text                = db.Column(db.Text,     nullable=True)
+    precteno            = db.Column(db.Boolean,  nullable=False, default=False, server_default=db.false())
 
-    id_rezervace        = db.Column(db.Integer, db.ForeignKey("rezervace.id_rezervace"), nullable=True)
-    id_objednavky       = db.Column(db.Integer, db.ForeignKey("objednavka.id_objednavky"), nullable=True)
-    id_zakaznika        = db.Column(db.Integer, db.ForeignKey("zakaznik.id_zakaznika"), nullable=False)
+    id_rezervace        = db.Column(db.Integer, db.ForeignKey("rezervace.id_rezervace"), nullable=True, index=True)
+    id_objednavky       = db.Column(db.Integer, db.ForeignKey("objednavka.id_objednavky"), nullable=True, index=True)
+    id_zakaznika        = db.Column(db.Integer, db.ForeignKey("zakaznik.id_zakaznika"), nullable=False)    # indexuje ix_notifikace_schranka
 
     rezervace           = db.relationship("Rezervace",   back_populates="notifikace")
     objednavka          = db.relationship("Objednavka",  back_populates="notifikace")
@@ -322,6 +386,28 @@ class Notifikace(db.Model):
         return f"<Notifikace {self.id_notifikace}>"
 
 
+class OutboxUdalost(db.Model):
+    """
+    Transakční outbox: událost se zapíše ve stejné transakci jako obchodní změna,
+    doručí ji až dispečer na pozadí (app/outbox.py). zpracovano IS NULL = čeká.
+    """
+    __tablename__  = "outbox"
+    __table_args__ = (
+        Index("ix_outbox_cekajici", "id_udalosti",
+              postgresql_where=db.text("zpracovano IS NULL"), sqlite_where=db.text("zpracovano IS NULL")),
+    )
+    id_udalosti   = db.Column(db.Integer, primary_key=True)
+    typ           = db.Column(db.String(40), nullable=False)
+    data          = db.Column(db.JSON, nullable=False)
+    vytvoreno     = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    zpracovano    = db.Column(db.DateTime, nullable=True)
+    pokusy        = db.Column(db.Integer, nullable=False, default=0)
+    chyba         = db.Column(db.Text, nullable=True)
+
+    def __repr__(self):
+        return f"<OutboxUdalost {self.id_udalosti} {self.typ}>"
+
+
 class Role(db.Model):
     __tablename__ = "role"
     id_role       = db.Column(db.Integer, primary_key=True)
@@ -336,7 +422,8 @@ class TokenBlacklist(db.Model):
     __tablename__ = "token_blacklist"
     id            = db.Column(db.Integer, primary_key=True)
     jti           = db.Column(db.String(36), unique=True, nullable=False)
-    created_at    = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    created_at    = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+    expires_at    = db.Column(db.DateTime, nullable=True, index=True)
 
     def __repr__(self):
         return f"<TokenBlacklist jti={self.jti}>"
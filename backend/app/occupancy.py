@@ -0,0 +1,228 @@
+# app/occupancy.py
+
+"""
+Tabulka obsazenost drží součet osob na zdroji po časových slotech
+(REZERVACE_SLOT_MINUT). Rezervace zabírá všechny sloty, které zasahuje interval
+[datum_cas, datum_cas + delka_minut) – rezervace v 19:00 a v 19:15 na stejném
+stole se tak potkají. Zabrání intervalu je jeden podmíněný UPDATE přes všechny
+jeho sloty v savepointu: buď se vejde do kapacity celý, nebo se nezmění nic.
+Stůl přidělený serverem (Rezervace.stul_prirazen) drží své sloty výhradně
+(Obsazenost.vyhradne): nepřidá se k němu ani rezervace, která stůl uvede sama.
+DB je tak autoritou i mezi workery; app/availability.py nad ní drží
+paměťový index pro hledání volných termínů.
+"""
+
+from collections import Counter
+from datetime import timedelta
+from math import ceil
+
+from flask import current_app
+from flask_smorest import abort
+from sqlalchemy import case, func, literal, union_all
+from sqlalchemy.exc import IntegrityError
+
+from .db import db
+from .models import Obsazenost, Rezervace, Stul, Salonek, PodnikovaAkce, Workshop
+
+# typ zdroje → (model, sloupec s PK zdroje, FK sloupec v rezervaci, hláška při 404)
+ZDROJE = {
+    "stul":     (Stul,          Stul.id_stul,             Rezervace.id_stul,     "Stůl nenalezen."),
+    "salonek":  (Salonek,       Salonek.id_salonek,       Rezervace.id_salonek,  "Salonek nenalezen."),
+    "akce":     (PodnikovaAkce, PodnikovaAkce.id_akce,    Rezervace.id_akce,     "Akce nenalezena."),
+    "workshop": (Workshop,      Workshop.id_workshop,     Rezervace.id_workshop, "Workshop nenalezen."),
+}
+
+
+def slot_minut():
+    return current_app.config.get("REZERVACE_SLOT_MINUT", 15)
+
+
+def vychozi_delka():
+    return current_app.config.get("REZERVACE_DELKA_MINUT", 120)
+
+
+def delka_rezervace(data):
+    """Délka rezervace v minutách (dict i objekt Rezervace), jinak REZERVACE_DELKA_MINUT."""
+    delka = data.get("delka_minut") if isinstance(data, dict) else data.delka_minut
+    return delka or vychozi_delka()
+
+
+def casove_sloty(dt, delka_minut):
+    """Začátky slotů, které interval [dt, dt + delka_minut) zasahuje."""
+    slot  = slot_minut()
+    prvni = dt.replace(minute=dt.minute - dt.minute % slot, second=0, microsecond=0)
+    pocet = ceil((dt + timedelta(minutes=delka_minut) - prvni) / timedelta(minutes=slot))
+    return [prvni + timedelta(minutes=i * slot) for i in range(max(pocet, 1))]
+
+
+def zdroje_rezervace(data):
+    """Vrátí [(typ, id_zdroje), …] pro rezervaci (dict i objekt Rezervace)."""
+    get = data.get if isinstance(data, dict) else lambda k: getattr(data, k)
+    return [
+        (typ, get(fk.key))
+        for typ, (_, _, fk, _) in ZDROJE.items()
+        if get(fk.key)
+    ]
+
+
+def vyhradne_rezervace(data):
+    """Zda rezervace (dict i objekt Rezervace) drží svůj stůl výhradně."""
+    return bool(data.get("stul_prirazen") if isinstance(data, dict) else data.stul_prirazen)
+
+
+def _kapacita(typ, id_zdroje):
+    model, pk, _, _ = ZDROJE[typ]
+    return db.select(model.kapacita).where(pk == id_zdroje).scalar_subquery()
+
+
+def _sloty(typ, id_zdroje, sloty):
+    return (
+        (Obsazenost.typ_zdroje == typ)
+        & (Obsazenost.id_zdroje == id_zdroje)
+        & (Obsazenost.datum_cas >= sloty[0])
+        & (Obsazenost.datum_cas <= sloty[-1])
+    )
+
+
+def obsazeno(typ, id_zdroje, dt, delka_minut=None):
+    """Nejvyšší obsazenost zdroje během intervalu (rozsah PK obsazenost); výhradní slot = plno."""
+    sloty = casove_sloty(dt, delka_minut or vychozi_delka())
+    obs   = case((Obsazenost.vyhradne, _kapacita(typ, id_zdroje)), else_=Obsazenost.obsazeno)
+    return db.session.scalar(
+        db.select(func.max(obs)).where(_sloty(typ, id_zdroje, sloty))
+    ) or 0
+
+
+def _zalozit_sloty(typ, id_zdroje, sloty):
+    """Založí chybějící řádky slotů s nulovou obsazeností; vrací, zda nějaký chyběl."""
+    for _ in range(3):
+        existuji = set(db.session.scalars(
+            db.select(Obsazenost.datum_cas).where(_sloty(typ, id_zdroje, sloty))
+        ))
+        chybi = [s for s in sloty if s not in existuji]
+        if not chybi:
+            return False
+        try:
+            with db.session.begin_nested():
+                db.session.add_all(
+                    Obsazenost(typ_zdroje=typ, id_zdroje=id_zdroje, datum_cas=s, obsazeno=0) for s in chybi
+                )
+            return True
+        except IntegrityError:
+            # některý slot mezitím založil jiný request → načíst znovu
+            continue
+    return True
+
+
+def _zabrat(typ, id_zdroje, sloty, persons, vyhradne):
+    stmt = (
+        db.update(Obsazenost)
+          .where(_sloty(typ, id_zdroje, sloty))
+          .where(Obsazenost.obsazeno + persons <= _kapacita(typ, id_zdroje))
+          .execution_options(synchronize_session=False)
+    )
+    if vyhradne:
+        stmt = stmt.where(Obsazenost.obsazeno == 0).values(obsazeno=persons, vyhradne=True)
+    else:
+        stmt = stmt.where(Obsazenost.vyhradne.is_(False)).values(obsazeno=Obsazenost.obsazeno + persons)
+    savepoint = db.session.begin_nested()
+    zabrano = db.session.execute(stmt).rowcount
+    if zabrano == len(sloty):
+        savepoint.commit()
+        return True
+    # některý slot je plný nebo ještě neexistuje → vrátit i ty, které se zabrat stihly
+    savepoint.rollback()
+    return False
+
+
+def reserve(typ, id_zdroje, dt, persons, delka_minut, vyhradne=False):
+    """
+    Atomicky přičte `persons` ke všem slotům intervalu, pokud se v každém vejdou do kapacity
+    a žádný z nich nedrží výhradně přidělený stůl (vyhradne=True: jen pokud je zdroj po celý
+    interval prázdný, sloty se pak označí jako výhradní – přidělený stůl se nesdílí).
+    Běžná cesta = jeden podmíněný UPDATE; první rezervace slotů chybějící řádky založí.
+    Vrací True/False podle toho, zda se místo podařilo zabrat, abort(404) pro neexistující zdroj.
+    """
+    sloty = casove_sloty(dt, delka_minut)
+    if _zabrat(typ, id_zdroje, sloty, persons, vyhradne):
+        return True
+
+    model, _, _, not_found = ZDROJE[typ]
+    zdroj = db.session.get(model, id_zdroje)
+    if not zdroj:
+        abort(404, message=not_found)
+    if persons > zdroj.kapacita or not _zalozit_sloty(typ, id_zdroje, sloty):
+        return False
+    return _zabrat(typ, id_zdroje, sloty, persons, vyhradne)
+
+
+def release(typ, id_zdroje, dt, persons, delka_minut):
+    db.session.execute(
+        db.update(Obsazenost)
+          .where(_sloty(typ, id_zdroje, casove_sloty(dt, delka_minut)))
+          .values(obsazeno=Obsazenost.obsazeno - persons, vyhradne=False)
+          .execution_options(synchronize_session=False)
+    )
+
+
+def volne_zdroje(dt, persons, typy=None, delka_minut=None):
+    """
+    Všechny zdroje, kam se v intervalu [dt, dt + delka) vejde `persons` osob – jeden dotaz
+    (UNION ALL přes typy zdrojů, LEFT JOIN na nejvyšší obsazenost slotů intervalu);
+    stoly s výhradně drženým slotem se vynechají.
+    """
+    sloty  = casove_sloty(dt, delka_minut or vychozi_delka())
+    dotazy = []
+    for typ, (model, pk, _, _) in ZDROJE.items():
+        if typy and typ not in typy:
+            continue
+        spicka = (
+            db.select(Obsazenost.id_zdroje,
+                      func.max(Obsazenost.obsazeno).label("obsazeno"),
+                      func.max(db.cast(Obsazenost.vyhradne, db.Integer)).label("vyhradne"))
+              .where(Obsazenost.typ_zdroje == typ,
+                     Obsazenost.datum_cas >= sloty[0], Obsazenost.datum_cas <= sloty[-1])
+              .group_by(Obsazenost.id_zdroje)
+              .subquery()
+        )
+        obs = func.coalesce(spicka.c.obsazeno, 0)
+        dotazy.append(
+            db.select(
+                literal(typ).label("typ"),
+                pk.label("id"),
+                model.kapacita.label("kapacita"),
+                (model.kapacita - obs).label("volno"),
+            )
+            .select_from(model)
+            .outerjoin(spicka, spicka.c.id_zdroje == pk)
+            .where(model.kapacita - obs >= persons, func.coalesce(spicka.c.vyhradne, 0) == 0)
+        )
+    if not dotazy:
+        return []
+    return db.session.execute(union_all(*dotazy)).all()
+
+
+def rebuild_occupancy():
+    """Přepočítá celou tabulku obsazenost z rezervací (po importu dat / migraci)."""
+    db.session.query(Obsazenost).delete()
+    soucty   = Counter()
+    vyhradni = set()
+    for typ, (_, _, fk, _) in ZDROJE.items():
+        rows = db.session.execute(
+            db.select(fk, Rezervace.datum_cas, Rezervace.pocet_osob, Rezervace.delka_minut,
+                      Rezervace.stul_prirazen)
+              .where(fk.is_not(None))
+              .order_by(fk, Rezervace.datum_cas)
+        )
+        for id_zdroje, dt, osob, delka, prirazen in rows:
+            for slot in casove_sloty(dt, delka):
+                soucty[typ, id_zdroje, slot] += osob
+                if prirazen:
+                    vyhradni.add((typ, id_zdroje, slot))
+    if soucty:
+        db.session.execute(db.insert(Obsazenost), [
+            {"typ_zdroje": typ, "id_zdroje": id_zdroje, "datum_cas": slot, "obsazeno": n,
+             "vyhradne": (typ, id_zdroje, slot) in vyhradni}
+            for (typ, id_zdroje, slot), n in soucty.items()
+        ])
+    db.session.commit()
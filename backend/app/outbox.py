@@ -0,0 +1,183 @@
+# app/outbox.py
+
+"""
+Transakční outbox pro notifikace.
+
+Request zapíše událost do tabulky outbox ve stejné transakci jako objednávku,
+rezervaci, platbu… (žádný druhý commit jen kvůli notifikaci) a po commitu
+jen probudí dispečera. Dispečer (vlákno obslužného procesu, app/background.py;
+OUTBOX_DISPATCHER = "thread") po dávkách:
+  1. vybere čekající události (FOR UPDATE SKIP LOCKED na PostgreSQL)
+  2. zabere je UPDATE … SET zpracovano WHERE zpracovano IS NULL RETURNING
+     → souběžný dispečer v jiném workeru tutéž událost nedostane
+  3. vloží řádky Notifikace, přičte je k počítadlům nepřečtených (app/inbox.py)
+     a commitne – zabrání i vložení v jedné transakci,
+     takže pád workeru uprostřed nic nezdvojí ani neztratí (událost zůstane čekat)
+  4. pošle notifikace živým SSE odběratelům (ostatní workery je dočtou z DB)
+Událost, která opakovaně selže, se po OUTBOX_MAX_ATTEMPTS odloží s textem chyby.
+V testech (OUTBOX_DISPATCHER = "inline") se doručuje hned po commitu requestu.
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from . import background, inbox
+from .db import db
+from .events import notifikace_event, publish_events
+from .models import Notifikace, OutboxUdalost
+
+NOTIFIKACE = "notifikace"
+
+
+def notifikace(id_zakaznika, typ, text, id_rezervace=None, id_objednavky=None):
+    """Zařadí notifikaci do outboxu v rámci rozpracované transakce (commit dělá volající)."""
+    db.session.add(OutboxUdalost(typ=NOTIFIKACE, data={
+        "typ":           typ,
+        "text":          text,
+        "datum_cas":     datetime.utcnow().isoformat(),
+        "id_zakaznika":  id_zakaznika,
+        "id_rezervace":  id_rezervace,
+        "id_objednavky": id_objednavky,
+    }))
+
+
+def _to_notifikace(data):
+    return Notifikace(**{**data, "datum_cas": datetime.fromisoformat(data["datum_cas"])})
+
+
+class OutboxDispatcher:
+    def __init__(self, app, inline=False, batch_size=200, poll_seconds=2.0,
+                 max_attempts=5, retention=timedelta(hours=24)):
+        self.app          = app
+        self.inline       = inline
+        self.batch_size   = batch_size
+        self.poll_seconds = poll_seconds
+        self.max_attempts = max_attempts
+        self.retention    = retention
+        self._wake        = threading.Event()
+        self._purged_at   = 0.0
+
+    # ── řízení ────────────────────────────────────────────────────────
+    def wake(self):
+        """
+        Volá se po commitu, který zapsal do outboxu. Vlákno dispečera sám nespouští
+        (app/background.py) – v CLI příkazu událost počká na dispečera serveru.
+        """
+        if self.inline:
+            try:
+                self.dispatch()
+            except Exception:
+                db.session.rollback()
+                self.app.logger.exception("Doručení outboxu selhalo, zkusí se znovu.")
+            return
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.poll_seconds)
+            self._wake.clear()
+            with self.app.app_context():
+                try:
+                    self.dispatch()
+                    self._purge()
+                except Exception:
+                    db.session.rollback()
+                    self.app.logger.exception("Doručení outboxu selhalo, zkusí se znovu.")
+                finally:
+                    db.session.remove()
+
+    # ── doručení ──────────────────────────────────────────────────────
+    def dispatch(self):
+        """Doručí všechny čekající události; vrací počet vytvořených notifikací."""
+        total = 0
+        while True:
+            ids = db.session.scalars(
+                db.select(OutboxUdalost.id_udalosti)
+                  .where(OutboxUdalost.zpracovano.is_(None))
+                  .order_by(OutboxUdalost.id_udalosti)
+                  .limit(self.batch_size)
+                  .with_for_update(skip_locked=True)
+            ).all()
+            if not ids:
+                return total
+            try:
+                total += self._deliver(ids)
+            except Exception as err:
+                db.session.rollback()
+                # dávka neprošla → po jedné, vadná událost nezdrží ostatní
+                for id_udalosti in ids:
+                    try:
+                        total += self._deliver([id_udalosti])
+                    except Exception as item_err:
+                        db.session.rollback()
+                        self._failed(id_udalosti, item_err)
+                self.app.logger.warning("Dávka outboxu selhala (%s), doručeno po jedné.", err)
+            if len(ids) < self.batch_size:
+                return total
+
+    def _deliver(self, ids):
+        claimed = db.session.execute(
+            db.update(OutboxUdalost)
+              .where(OutboxUdalost.id_udalosti.in_(ids), OutboxUdalost.zpracovano.is_(None))
+              .values(zpracovano=datetime.utcnow())
+              .returning(OutboxUdalost.id_udalosti, OutboxUdalost.typ, OutboxUdalost.data)
+              .execution_options(synchronize_session=False)
+        ).all()
+        claimed = sorted(claimed, key=lambda r: r.id_udalosti)
+        notifs  = [_to_notifikace(r.data) for r in claimed if r.typ == NOTIFIKACE]
+        db.session.add_all(notifs)
+        inbox.add_unread(notifs)
+        db.session.flush()
+        # data pro SSE ještě před commitem, dokud instance nejsou expirované
+        events = [notifikace_event(n) for n in notifs]
+        db.session.commit()
+        publish_events(events)
+        return len(notifs)
+
+    def _failed(self, id_udalosti, err):
+        udalost = db.session.get(OutboxUdalost, id_udalosti)
+        if udalost is None or udalost.zpracovano is not None:
+            db.session.rollback()
+            return
+        udalost.pokusy += 1
+        udalost.chyba   = f"{type(err).__name__}: {err}"
+        if udalost.pokusy >= self.max_attempts:
+            udalost.zpracovano = datetime.utcnow()        # odloženo, už se nezkouší
+            self.app.logger.error("Událost outboxu %s odložena po %s pokusech: %s",
+                                  id_udalosti, udalost.pokusy, udalost.chyba)
+        db.session.commit()
+
+    def _purge(self):
+        """Jednou za hodinu smaže doručené události starší než OUTBOX_RETENTION_HOURS."""
+        now = time.monotonic()
+        if now - self._purged_at < 3600:
+            return
+        self._purged_at = now
+        db.session.execute(
+            db.delete(OutboxUdalost)
+              .where(OutboxUdalost.zpracovano < datetime.utcnow() - self.retention)
+        )
+        db.session.commit()
+
+
+def init_outbox(app):
+    dispatcher = OutboxDispatcher(
+        app,
+        inline=app.config.get("OUTBOX_DISPATCHER", "thread") == "inline",
+        batch_size=app.config.get("OUTBOX_BATCH_SIZE", 200),
+        poll_seconds=app.config.get("OUTBOX_POLL_SECONDS", 2),
+        max_attempts=app.config.get("OUTBOX_MAX_ATTEMPTS", 5),
+        retention=timedelta(hours=app.config.get("OUTBOX_RETENTION_HOURS", 24)),
+    )
+    app.extensions["outbox"] = dispatcher
+    # smyčka běží od startu obslužného procesu → doručí i události, které zůstaly po pádu workeru
+    if not dispatcher.inline:
+        background.register(app, "outbox-dispatcher", dispatcher._run)
+    return dispatcher
+
+
+def wake():
+    current_app.extensions["outbox"].wake()
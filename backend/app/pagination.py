@@ -0,0 +1,140 @@
+# app/pagination.py
+
+import base64
+import json
+from datetime import datetime, date, time
+from decimal import Decimal
+
+from flask import request, current_app, after_this_request
+from flask_smorest import abort
+from sqlalchemy import and_, or_
+from urllib.parse import urlencode
+
+from .db import db
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Neprůhledný kurzor
+# ──────────────────────────────────────────────────────────────────────────────
+def _json_default(value):
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Hodnotu {value!r} nelze uložit do kurzoru.")
+
+
+def encode_cursor(value):
+    raw = json.dumps(value, separators=(",", ":"), default=_json_default).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError):
+        abort(400, message="Neplatný kurzor.")
+
+
+def _load_value(column, value):
+    """Převede hodnotu z kurzoru zpět na typ sloupce (datetime, Decimal…)."""
+    if value is None:
+        return None
+    try:
+        py_type = column.type.python_type
+    except NotImplementedError:
+        return value
+    if py_type in (datetime, date, time):
+        return py_type.fromisoformat(value)
+    if py_type is Decimal:
+        return Decimal(value)
+    return value
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Keyset stránkování
+# ──────────────────────────────────────────────────────────────────────────────
+def _page_url(**params):
+    args = request.args.to_dict(flat=False)
+    args.update({k: [v] for k, v in params.items()})
+    return f"{request.base_url}?{urlencode(args, doseq=True)}"
+
+
+def paginate(stmt, pk, sorts=None, default_sort=None):
+    """
+    Keyset (kurzorové) stránkování libovolného SELECTu přes dvojici (řadicí klíč, PK).
+    - ?limit=N           velikost stránky (PAGINATION_DEFAULT_LIMIT, max PAGINATION_MAX_LIMIT)
+    - ?sort=klic / -klic řazení podle povoleného sloupce ze `sorts` (bez něj jen podle PK)
+    - ?cursor=…          neprůhledný kurzor z odkazu next/prev
+    Odkazy na další/předchozí stránku jdou do hlavičky Link (rel="next"/"prev")
+    a pro pohodlí i do X-Next-Cursor / X-Prev-Cursor.
+    Každá stránka je WHERE (klic, pk) > (…) ORDER BY klic, pk LIMIT n → stejná cena
+    pro první i milióntou stránku, pokud na (klic, pk) existuje index.
+    """
+    sorts   = sorts or {}
+    cfg     = current_app.config
+    limit   = request.args.get("limit", cfg.get("PAGINATION_DEFAULT_LIMIT", 100), type=int)
+    limit   = max(1, min(limit, cfg.get("PAGINATION_MAX_LIMIT", 500)))
+
+    sort    = request.args.get("sort") or default_sort or ""
+    name    = sort.lstrip("-")
+    if name and name not in sorts:
+        abort(400, message=f"Nelze řadit podle '{name}'.")
+    desc    = sort.startswith("-")
+    key     = sorts.get(name)
+    columns = [key, pk] if key is not None else [pk]
+
+    backwards = False
+    raw       = request.args.get("cursor")
+    if raw:
+        cur = decode_cursor(raw)
+        if not isinstance(cur, dict) or cur.get("s") != sort or len(cur.get("v", ())) != len(columns):
+            abort(400, message="Neplatný kurzor.")
+        backwards = cur.get("d") == "p"
+        values    = [_load_value(c, v) for c, v in zip(columns, cur["v"])]
+        # směr porovnání: vpřed ve směru řazení, zpět proti němu
+        greater   = desc == backwards
+        cmp       = (lambda c, v: c > v) if greater else (lambda c, v: c < v)
+        if key is not None:
+            stmt = stmt.where(or_(cmp(key, values[0]), and_(key == values[0], cmp(pk, values[1]))))
+        else:
+            stmt = stmt.where(cmp(pk, values[0]))
+
+    order_desc = desc != backwards
+    stmt = stmt.order_by(*[c.desc() if order_desc else c.asc() for c in columns]).limit(limit + 1)
+
+    result = db.session.execute(stmt)
+    rows   = result.scalars().all() if len(result.keys()) == 1 else result.all()
+    more   = len(rows) > limit
+    rows   = rows[:limit]
+    if backwards:
+        rows.reverse()
+
+    def cursor_for(row, direction):
+        return encode_cursor({
+            "s": sort,
+            "d": direction,
+            "v": [getattr(row, c.key) for c in columns],
+        })
+
+    links = {}
+    if rows:
+        if more or backwards:
+            links["next"] = cursor_for(rows[-1], "n")
+        if raw and (more or not backwards):
+            links["prev"] = cursor_for(rows[0], "p")
+
+    @after_this_request
+    def _add_links(resp):
+        if links:
+            resp.headers["Link"] = ", ".join(
+                f'<{_page_url(cursor=c)}>; rel="{rel}"' for rel, c in links.items()
+            )
+        if "next" in links:
+            resp.headers["X-Next-Cursor"] = links["next"]
+        if "prev" in links:
+            resp.headers["X-Prev-Cursor"] = links["prev"]
+        return resp
+
+    return rows
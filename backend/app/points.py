@@ -0,0 +1,164 @@
+# app/points.py
+
+"""
+Věrnostní body nad append-only knihou pohybů (tabulka bodovy_pohyb).
+
+  - zisk (objednávka)   → jen INSERT pohybu; řádek účtu se nezamyká, souběžné
+                          objednávky jednoho zákazníka se tak neřadí za sebou
+  - uplatnění / sleva   → jeden podmíněný UPDATE vernostni_ucet … WHERE body >= n
+                          (rozhoduje rowcount, žádný SELECT … FOR UPDATE), pohyb se
+                          zapíše rovnou jako započtený
+  - kompakce            → přičte nezapočtené pohyby k VernostniUcet.body a označí je
+                          (vlákno po POINTS_COMPACT_SECONDS, `flask compact-points`,
+                          a na požádání při uplatnění, když materializovaný zůstatek nestačí)
+
+Zůstatek = VernostniUcet.body + součet nezapočtených pohybů (částečný index
+ix_bodovy_pohyb_nezapocteno); celá historie se nikdy nesčítá.
+"""
+
+import time
+from collections import defaultdict
+
+from sqlalchemy import bindparam, func
+from sqlalchemy.exc import IntegrityError
+
+from . import background
+from .db import db
+from .models import BodovyPohyb, VernostniUcet
+
+ZISK      = "ZISK"
+UPLATNENI = "UPLATNENI"
+SLEVA     = "SLEVA"
+
+
+def earn(zak_id, points, typ=ZISK, id_objednavky=None):
+    """Připíše body novým pohybem (bez zámku účtu); započte je až kompakce."""
+    db.session.execute(db.insert(BodovyPohyb).values(
+        id_zakaznika=zak_id, zmena=points, typ=typ, id_objednavky=id_objednavky, zapocteno=False
+    ))
+
+
+def _debit(zak_id, points):
+    stmt = (
+        db.update(VernostniUcet)
+          .where(VernostniUcet.id_zakaznika == zak_id, VernostniUcet.body >= points)
+          .values(body=VernostniUcet.body - points)
+          .execution_options(synchronize_session=False)
+    )
+    return db.session.execute(stmt).rowcount > 0
+
+
+def redeem(zak_id, points, typ=UPLATNENI, id_objednavky=None):
+    """
+    Odečte body, pokud na ně zůstatek stačí; vrací True/False.
+    Nestačí-li materializovaný zůstatek, zkusí se po kompakci zákazníka ještě jednou.
+    """
+    if not _debit(zak_id, points):
+        if not compact(zak_id) or not _debit(zak_id, points):
+            return False
+    db.session.execute(db.insert(BodovyPohyb).values(
+        id_zakaznika=zak_id, zmena=-points, typ=typ, id_objednavky=id_objednavky, zapocteno=True
+    ))
+    return True
+
+
+def _zalozit_ucty(zak_ids):
+    """
+    Založí chybějící účty s nulovým zůstatkem. id_zakaznika je unikátní – účet,
+    který mezitím založil jiný request, skončí IntegrityError v savepointu
+    a jen se načte znovu.
+    """
+    for pokus in range(3):
+        existuji = set(db.session.scalars(
+            db.select(VernostniUcet.id_zakaznika).where(VernostniUcet.id_zakaznika.in_(zak_ids))
+        ))
+        chybi = [z for z in zak_ids if z not in existuji]
+        if not chybi:
+            return
+        try:
+            with db.session.begin_nested():
+                db.session.execute(db.insert(VernostniUcet), [{"id_zakaznika": z, "body": 0} for z in chybi])
+            return
+        except IntegrityError:
+            if pokus == 2:
+                raise
+
+
+def compact(zak_id=None, limit=None):
+    """
+    Přičte nezapočtené pohyby k VernostniUcet.body (chybějící účet založí).
+    Pohyby se označí jedním UPDATE … RETURNING, takže souběžná kompakce
+    tentýž pohyb nezapočte dvakrát. Vrací počet započtených pohybů.
+    """
+    pending = db.select(BodovyPohyb.id_pohybu).where(BodovyPohyb.zapocteno.is_(False))
+    if zak_id is not None:
+        pending = pending.where(BodovyPohyb.id_zakaznika == zak_id)
+    if limit:
+        pending = pending.order_by(BodovyPohyb.id_pohybu).limit(limit)
+    rows = db.session.execute(
+        db.update(BodovyPohyb)
+          .where(BodovyPohyb.id_pohybu.in_(pending), BodovyPohyb.zapocteno.is_(False))
+          .values(zapocteno=True)
+          .returning(BodovyPohyb.id_zakaznika, BodovyPohyb.zmena)
+          .execution_options(synchronize_session=False)
+    ).all()
+    if not rows:
+        return 0
+
+    sums = defaultdict(int)
+    for customer, change in rows:
+        sums[customer] += change
+    _zalozit_ucty(list(sums))
+    table = VernostniUcet.__table__
+    db.session.execute(
+        table.update()
+             .where(table.c.id_zakaznika == bindparam("zak"))
+             .values(body=table.c.body + bindparam("delta")),
+        [{"zak": z, "delta": delta} for z, delta in sums.items()],
+    )
+    return len(rows)
+
+
+def balance(zak_id):
+    """
+    Stav účtu pro /api/users/me/points: materializované body + nezapočtený ocas.
+    None, pokud zákazník nemá účet ani žádný pohyb.
+    """
+    pending = (
+        db.select(func.coalesce(func.sum(BodovyPohyb.zmena), 0))
+          .where(BodovyPohyb.id_zakaznika == zak_id, BodovyPohyb.zapocteno.is_(False))
+          .scalar_subquery()
+    )
+    row = db.session.execute(
+        db.select(VernostniUcet.id_ucet, VernostniUcet.body, VernostniUcet.datum_zalozeni, pending)
+          .where(VernostniUcet.id_zakaznika == zak_id)
+    ).first()
+    if row is None:
+        tail = db.session.scalar(db.select(pending))
+        if not tail:
+            return None
+        row = (None, 0, None, tail)
+    id_ucet, body, zalozeno, tail = row
+    return {"id_ucet": id_ucet, "body": body + tail, "body_nezapoctene": tail, "datum_zalozeni": zalozeno}
+
+
+def _compact_loop(app, interval, batch):
+    while True:
+        time.sleep(interval)
+        with app.app_context():
+            try:
+                while compact(limit=batch) == batch:
+                    db.session.commit()
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                app.logger.exception("Kompakce bodových pohybů selhala.")
+            finally:
+                db.session.remove()
+
+
+def init_points_ledger(app):
+    interval = app.config.get("POINTS_COMPACT_SECONDS")
+    if interval:
+        batch = app.config.get("POINTS_COMPACT_BATCH", 5000)
+        background.register(app, "points-compact", _compact_loop, app, interval, batch)
@@ -0,0 +1,188 @@
+# app/replicas.py
+
+"""
+Směrování čtecích requestů na read-repliky.
+
+- SQLALCHEMY_REPLICA_URIS = seznam URI replik (prázdný = vše jde na primární DB)
+- read-only request = GET/HEAD/OPTIONS; pro něj se v before_request vybere
+  jedna replika (REPLICA_SELECTION: "round_robin" nebo "least_connections"
+  podle počtu půjčených spojení) a RoutingSession (app/db.py) na ni pošle SELECTy
+- uživatel, který během posledních REPLICA_STICKY_SECONDS něco zapsal
+  (úspěšný POST/PUT/PATCH/DELETE), čte dál z primární DB → vidí své změny
+- replika, ke které se nejde připojit, se na REPLICA_RETRY_SECONDS vyřadí
+  a requesty jdou na další repliku, případně na primární DB; stav replik se
+  ověřuje nejvýš jednou za REPLICA_HEALTH_CHECK_SECONDS (SELECT 1)
+
+Uživatel se pro účely směrování bere z claimu `sub` v hlavičce Authorization
+bez ověření podpisu – podvržený token nanejvýš pošle čtení na primární DB,
+samotné ověření tokenu dělá dál flask_jwt_extended.
+Záznam o posledním zápisu je v paměti workeru a zároveň v podepsané cookie
+(STICKY_COOKIE, platnost REPLICA_STICKY_SECONDS) – request, který přistane
+na jiném workeru, ji ověří v before_request a čte také z primární DB.
+"""
+
+import itertools
+import threading
+import time
+
+import jwt as pyjwt
+from flask import request
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import DBAPIError
+
+from .db import REPLICA_ENVIRON_KEY
+from .db_pool import resolve_profile, engine_options, PoolStats
+
+READ_METHODS  = {"GET", "HEAD", "OPTIONS"}
+STICKY_COOKIE = "replica_sticky"
+
+
+class Replica:
+    def __init__(self, name, engine):
+        self.name         = name
+        self.engine       = engine
+        self.down_until   = 0.0
+        self.checked_at   = 0.0
+
+    def in_use(self):
+        pool = self.engine.pool
+        return pool.checkedout() if hasattr(pool, "checkedout") else 0
+
+
+class ReplicaRouter:
+    def __init__(self, replicas, selection="round_robin", sticky_seconds=5,
+                 retry_seconds=30, health_check_seconds=10):
+        if selection not in ("round_robin", "least_connections"):
+            raise ValueError(f"Neznámý REPLICA_SELECTION '{selection}'")
+        self.replicas             = replicas
+        self.selection            = selection
+        self.sticky_seconds       = sticky_seconds
+        self.retry_seconds        = retry_seconds
+        self.health_check_seconds = health_check_seconds
+        self._counter             = itertools.count()
+        self._lock                = threading.Lock()
+        self._last_write          = {}    # user → time.monotonic() posledního zápisu
+
+        for replica in replicas:
+            event.listen(replica.engine, "handle_error", self._on_error(replica))
+
+    # ── zdraví replik ──────────────────────────────────────────────────
+    def _on_error(self, replica):
+        def handle_error(context):
+            if context.is_disconnect or context.connection is None:
+                self.mark_down(replica)
+        return handle_error
+
+    def mark_down(self, replica):
+        replica.down_until = time.monotonic() + self.retry_seconds
+
+    def _healthy(self, replica, now):
+        if replica.down_until > now:
+            return False
+        if now - replica.checked_at < self.health_check_seconds:
+            return True
+        replica.checked_at = now
+        try:
+            with replica.engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+        except DBAPIError:
+            self.mark_down(replica)
+            return False
+        return True
+
+    # ── výběr ──────────────────────────────────────────────────────────
+    def candidates(self):
+        if self.selection == "least_connections":
+            return sorted(self.replicas, key=Replica.in_use)
+        start = next(self._counter) % len(self.replicas)
+        return self.replicas[start:] + self.replicas[:start]
+
+    def choose(self):
+        """Zdravá replika, nebo None (→ primární DB)."""
+        now = time.monotonic()
+        for replica in self.candidates():
+            if self._healthy(replica, now):
+                return replica
+        return None
+
+    # ── „read your writes“ ─────────────────────────────────────────────
+    def note_write(self, user):
+        with self._lock:
+            self._last_write[user] = time.monotonic()
+            if len(self._last_write) > 10000:
+                limit = time.monotonic() - self.sticky_seconds
+                self._last_write = {u: t for u, t in self._last_write.items() if t > limit}
+
+    def sticky(self, user):
+        last = self._last_write.get(user)
+        return last is not None and time.monotonic() - last < self.sticky_seconds
+
+
+def _request_user():
+    auth = request.headers.get("Authorization", "")
+    if not auth.startswith("Bearer "):
+        return None
+    try:
+        return pyjwt.decode(auth[7:], options={"verify_signature": False}).get("sub")
+    except pyjwt.PyJWTError:
+        return None
+
+
+def init_replicas(app, pool_stats=None):
+    uris = app.config.get("SQLALCHEMY_REPLICA_URIS") or []
+    if not uris:
+        app.extensions["replica_router"] = None
+        return None
+
+    _, params = resolve_profile(app.config)
+    replicas = []
+    for i, uri in enumerate(uris):
+        replica = Replica(f"replica-{i}", create_engine(uri, **engine_options(uri, params)))
+        replicas.append(replica)
+        if pool_stats is not None:
+            pool_stats[replica.name] = PoolStats(replica.engine).attach()
+
+    router = ReplicaRouter(
+        replicas,
+        selection=app.config.get("REPLICA_SELECTION", "round_robin"),
+        sticky_seconds=app.config.get("REPLICA_STICKY_SECONDS", 5),
+        retry_seconds=app.config.get("REPLICA_RETRY_SECONDS", 30),
+        health_check_seconds=app.config.get("REPLICA_HEALTH_CHECK_SECONDS", 10),
+    )
+    app.extensions["replica_router"] = router
+    signer = URLSafeTimedSerializer(app.config["SECRET_KEY"], salt="replica-sticky")
+
+    def _sticky_cookie(user):
+        value = request.cookies.get(STICKY_COOKIE)
+        if not value or not router.sticky_seconds:
+            return False
+        try:
+            return signer.loads(value, max_age=router.sticky_seconds) == user
+        except BadSignature:
+            return False
+
+    @app.before_request
+    def _route_reads_to_replica():
+        if request.method not in READ_METHODS:
+            return
+        user = _request_user()
+        if user is not None and (router.sticky(user) or _sticky_cookie(user)):
+            return
+        replica = router.choose()
+        if replica is not None:
+            request.environ[REPLICA_ENVIRON_KEY] = replica.engine
+
+    @app.after_request
+    def _remember_write(response):
+        if request.method not in READ_METHODS and response.status_code < 400:
+            user = _request_user()
+            if user is not None:
+                router.note_write(user)
+                if router.sticky_seconds:
+                    # pro ostatní workery: zápis nese klient s sebou
+                    response.set_cookie(STICKY_COOKIE, signer.dumps(user), max_age=router.sticky_seconds,
+                                        secure=request.is_secure, httponly=True, samesite="Lax")
+        return response
+
+    return router
@@ -0,0 +1,130 @@
+# app/revocation.py
+
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import or_
+
+from . import background
+from .db import db
+from .models import TokenBlacklist
+
+
+class DbRevocationStore:
+    """Původní chování: každý dotaz na zneplatnění tokenu jde do DB."""
+
+    def __init__(self, app):
+        self.app = app
+
+    def is_revoked(self, jti):
+        return db.session.query(TokenBlacklist).filter_by(jti=jti).first() is not None
+
+    def add(self, jti, expires_at):
+        pass
+
+    def purge(self):
+        return purge_token_blacklist(self.app)
+
+
+class MemoryRevocationStore(DbRevocationStore):
+    """
+    Množina zneplatněných `jti` v paměti procesu.
+    - při prvním použití načte z DB všechny dosud platné záznamy
+    - LogoutResource přidává nové záznamy rovnou přes add()
+    - ostatní workery se dorovnávají přírůstkovým dotazem (id > poslední známé)
+      nejvýše jednou za TOKEN_REVOCATION_SYNC_SECONDS
+    - id se přidělují při INSERTu, ne při commitu – řádek s nižším id může být
+      vidět až po vyšším; proto se každý sync znovu čte i okno posledních
+      TOKEN_REVOCATION_SYNC_OVERLAP_SECONDS podle created_at
+    - záznamy s prošlým `exp` se z paměti průběžně vyhazují
+    """
+
+    def __init__(self, app):
+        super().__init__(app)
+        self._lock      = threading.Lock()
+        self._revoked   = {}        # jti -> expires_at (datetime | None)
+        self._last_id   = 0
+        self._last_sync = None
+        self._okno_od   = None      # created_at, od kterého se čte znovu (překryv)
+        self._interval  = app.config.get("TOKEN_REVOCATION_SYNC_SECONDS", 5)
+        self._overlap   = timedelta(seconds=app.config.get("TOKEN_REVOCATION_SYNC_OVERLAP_SECONDS", 60))
+
+    def is_revoked(self, jti):
+        now = time.monotonic()
+        if self._last_sync is None or now - self._last_sync >= self._interval:
+            self.sync()
+        return jti in self._revoked
+
+    def add(self, jti, expires_at):
+        with self._lock:
+            self._revoked[jti] = expires_at
+
+    def sync(self):
+        now   = datetime.utcnow()
+        novee = TokenBlacklist.id > self._last_id
+        if self._okno_od is not None:
+            novee = or_(novee, TokenBlacklist.created_at >= self._okno_od)
+        rows = db.session.execute(
+            db.select(TokenBlacklist.id, TokenBlacklist.jti, TokenBlacklist.expires_at)
+              .where(novee)
+              .order_by(TokenBlacklist.id)
+        ).all()
+        with self._lock:
+            for r in rows:
+                self._revoked[r.jti] = r.expires_at
+                self._last_id = max(self._last_id, r.id)
+            for jti, exp in list(self._revoked.items()):
+                if exp is not None and exp <= now:
+                    del self._revoked[jti]
+            self._okno_od   = now - self._overlap
+            self._last_sync = time.monotonic()
+
+
+REVOCATION_BACKENDS = {
+    "db":     DbRevocationStore,
+    "memory": MemoryRevocationStore,
+}
+
+
+def purge_token_blacklist(app):
+    """
+    Smaže záznamy, jejichž token už vypršel.
+    Starší řádky bez `expires_at` mažeme, jakmile jsou starší než nejdelší platnost tokenu.
+    """
+    now      = datetime.utcnow()
+    lifetime = max(app.config["JWT_ACCESS_TOKEN_EXPIRES"], app.config["JWT_REFRESH_TOKEN_EXPIRES"])
+    deleted  = (
+        db.session.query(TokenBlacklist)
+          .filter(or_(
+              TokenBlacklist.expires_at <= now,
+              (TokenBlacklist.expires_at.is_(None)) & (TokenBlacklist.created_at <= now - lifetime)
+          ))
+          .delete(synchronize_session=False)
+    )
+    db.session.commit()
+    return deleted
+
+
+def _purge_loop(app, interval):
+    while True:
+        time.sleep(interval)
+        with app.app_context():
+            try:
+                purge_token_blacklist(app)
+            except Exception:
+                db.session.rollback()
+                app.logger.exception("Čištění token_blacklist selhalo.")
+            finally:
+                db.session.remove()
+
+
+def init_revocation(app):
+    backend = app.config.get("TOKEN_REVOCATION_BACKEND", "memory")
+    store   = REVOCATION_BACKENDS[backend](app)
+    app.extensions["token_revocation"] = store
+
+    interval = app.config.get("TOKEN_BLACKLIST_PURGE_SECONDS")
+    if interval:
+        background.register(app, "token-blacklist-purge", _purge_loop, app, interval)
+    return store
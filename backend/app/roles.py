@@ -0,0 +1,169 @@
+# app/roles.py
+
+"""
+Cache rolí v paměti procesu.
+
+- tabulka `role` (id ↔ name) platí ROLE_CACHE_TTL sekund; chybějící název
+  (role založená jinde, prázdná tabulka při startu) ji načte znovu hned
+- role jednotlivých uživatelů: user_id → frozenset názvů, platnost ROLE_CACHE_TTL sekund
+- změna `Zakaznik.roles` (append/remove), vložení nebo smazání zákazníka zahodí záznam
+  uživatele po commitu; změna tabulky `role` zahodí celou cache
+- změny v jiném workeru / přímým SQL se projeví nejpozději po ROLE_CACHE_TTL
+
+Používají ji auth endpointy (login, refresh, /me), must_be_self_or_admin
+a vytváření zákazníka (id role "user").
+"""
+
+import threading
+import time
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session, joinedload, object_session
+
+from .db import db
+from .models import Zakaznik, Role, user_roles
+
+_listeners_installed = False
+
+
+class RoleCache:
+    def __init__(self, ttl=60):
+        self.ttl      = ttl
+        self._lock    = threading.Lock()
+        self._ids     = None      # (name -> id_role, platí do)
+        self._users   = {}        # user_id -> (frozenset názvů, platí do)
+
+    # ── tabulka role ──────────────────────────────────────────────────
+    def _role_ids(self, reload=False):
+        entry = self._ids
+        if reload or entry is None or entry[1] < time.monotonic():
+            ids   = dict(db.session.execute(db.select(Role.name, Role.id_role)).all())
+            entry = self._ids = (ids, time.monotonic() + self.ttl)
+        return entry[0]
+
+    def role_id(self, name):
+        ids = self._role_ids()
+        if name not in ids:
+            ids = self._role_ids(reload=True)
+        return ids.get(name)
+
+    # ── role uživatelů ────────────────────────────────────────────────
+    def remember(self, user_id, names):
+        names = frozenset(names)
+        with self._lock:
+            self._users[user_id] = (names, time.monotonic() + self.ttl)
+        return names
+
+    def cached(self, user_id):
+        entry = self._users.get(user_id)
+        if entry is None or entry[1] < time.monotonic():
+            return None
+        return entry[0]
+
+    def user_roles(self, user_id):
+        """Názvy rolí uživatele; None, pokud uživatel neexistuje (max. jeden dotaz)."""
+        names = self.cached(user_id)
+        if names is not None:
+            return names
+        rows = db.session.execute(
+            db.select(Zakaznik.id_zakaznika, Role.name)
+              .select_from(Zakaznik)
+              .outerjoin(user_roles, user_roles.c.zakaznik_id == Zakaznik.id_zakaznika)
+              .outerjoin(Role, Role.id_role == user_roles.c.role_id)
+              .where(Zakaznik.id_zakaznika == user_id)
+        ).all()
+        if not rows:
+            return None
+        return self.remember(user_id, (name for _, name in rows if name is not None))
+
+    def load_user(self, user_id):
+        """(zakaznik, role) jedním dotazem; bez uložených rolí se načtou JOINem spolu se zákazníkem."""
+        names = self.cached(user_id)
+        if names is not None:
+            return db.session.get(Zakaznik, user_id), names
+        user = db.session.execute(
+            db.select(Zakaznik).options(joinedload(Zakaznik.roles))
+              .where(Zakaznik.id_zakaznika == user_id)
+        ).unique().scalar_one_or_none()
+        if user is None:
+            return None, None
+        return user, self.remember(user_id, (r.name for r in user.roles))
+
+    # ── invalidace ────────────────────────────────────────────────────
+    def invalidate_user(self, user_id):
+        with self._lock:
+            self._users.pop(user_id, None)
+
+    def invalidate_roles(self):
+        with self._lock:
+            self._ids   = None
+            self._users = {}
+
+
+def get_role_cache():
+    return current_app.extensions["role_cache"]
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# ORM události → invalidace po commitu
+# ──────────────────────────────────────────────────────────────────────────────
+def _mark(session, user_id=None, roles=False):
+    stale = session.info.setdefault("role_cache_stale", {"users": set(), "roles": False})
+    if user_id is not None:
+        stale["users"].add(user_id)
+    stale["roles"] = stale["roles"] or roles
+
+
+def _user_roles_changed(target, *args):
+    session = object_session(target)
+    if session is not None and target.id_zakaznika is not None:
+        _mark(session, user_id=target.id_zakaznika)
+
+
+def _user_written(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        _mark(session, user_id=target.id_zakaznika)
+
+
+def _role_changed(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        _mark(session, roles=True)
+
+
+def _after_commit(session):
+    # po rollbacku značky v session.info zůstanou → nanejvýš zbytečná invalidace při dalším commitu
+    stale = session.info.pop("role_cache_stale", None)
+    if not stale or not has_app_context():
+        return
+    cache = current_app.extensions.get("role_cache")
+    if cache is None:
+        return
+    if stale["roles"]:
+        cache.invalidate_roles()
+    for user_id in stale["users"]:
+        cache.invalidate_user(user_id)
+
+
+def _install_listeners():
+    global _listeners_installed
+    if _listeners_installed:
+        return
+    event.listen(Zakaznik.roles, "append", _user_roles_changed)
+    event.listen(Zakaznik.roles, "remove", _user_roles_changed)
+    # nový zákazník může dostat id po smazaném (SQLite) → i insert zahodí případný záznam
+    event.listen(Zakaznik, "after_insert", _user_written)
+    event.listen(Zakaznik, "after_delete", _user_written)
+    for name in ("after_insert", "after_update", "after_delete"):
+        event.listen(Role, name, _role_changed)
+    event.listen(Session, "after_commit", _after_commit)
+    _listeners_installed = True
+
+
+def init_role_cache(app):
+    _install_listeners()
+    cache = RoleCache(ttl=app.config.get("ROLE_CACHE_TTL", 60))
+    app.extensions["role_cache"] = cache
+    return cache
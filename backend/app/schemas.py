@@ -2,8 +2,8 @@
 
 from marshmallow import Schema, fields, validate, validates_schema, ValidationError, post_dump
 from datetime import date
-from flask import url_for
 from .models import PolozkaMenu
+from .images import image_url, image_srcset
 
 # — LOGIN schéma —
 class LoginSchema(Schema):
@@ -15,6 +15,7 @@ class RezervaceSummarySchema(Schema):
     id_rezervace   = fields.Int()
     datum_cas      = fields.DateTime()
     pocet_osob     = fields.Int()
+    delka_minut    = fields.Int()
     stav_rezervace = fields.Str()
 
 class ZakaznikSummarySchema(Schema):
@@ -82,19 +83,20 @@ class ZakaznikSchema(Schema):
     rezervace    = fields.Nested("RezervaceSummarySchema", many=True, dump_only=True)
     objednavky   = fields.Nested("ObjednavkaSummarySchema", many=True, dump_only=True)
     hodnoceni    = fields.Nested("HodnoceniSummarySchema", many=True, dump_only=True)
-    roles        = fields.Method("get_roles", dump_only=True)
+    roles        = fields.Method("get_roles", dump_only=True, metadata={"requires": ["roles"]})
 
     @post_dump
     def replace_empty_relations(self, data, **kwargs):
-        if data.get("telefon") is None:
+        # jen pro pole, která se skutečně dumpují (?fields= / ?expand= je mohou vynechat)
+        if "telefon" in data and data["telefon"] is None:
             data["telefon"] = "Žádné telefonní číslo"
-        if data.get("ucet") is None:
+        if "ucet" in data and data["ucet"] is None:
             data["ucet"] = "Žádný účet"
-        if not data.get("objednavky"):
+        if "objednavky" in data and not data["objednavky"]:
             data["objednavky"] = "Žádné objednávky"
-        if not data.get("rezervace"):
+        if "rezervace" in data and not data["rezervace"]:
             data["rezervace"] = "Žádné rezervace"
-        if not data.get("hodnoceni"):
+        if "hodnoceni" in data and not data["hodnoceni"]:
             data["hodnoceni"] = "Žádná hodnocení"
         return data
 
@@ -112,10 +114,11 @@ class ZakaznikCreateSchema(Schema):
 
 # — Vernostní účet —
 class VernostniUcetSchema(Schema):
-    id_ucet        = fields.Int(dump_only=True)
-    body           = fields.Int(dump_only=True)
-    datum_zalozeni = fields.Date(dump_only=True)
-    zakaznik       = fields.Nested(ZakaznikSummarySchema, dump_only=True)
+    id_ucet          = fields.Int(dump_only=True)
+    body             = fields.Int(dump_only=True)
+    body_nezapoctene = fields.Int(dump_only=True)     # jen /users/me/points (viz app/points.py)
+    datum_zalozeni   = fields.Date(dump_only=True)
+    zakaznik         = fields.Nested(ZakaznikSummarySchema, dump_only=True)
 
 class VernostniUcetCreateSchema(Schema):
     id_zakaznika   = fields.Int(required=True)
@@ -127,6 +130,8 @@ class RezervaceSchema(Schema):
     id_rezervace   = fields.Int(dump_only=True)
     datum_cas      = fields.DateTime()
     pocet_osob     = fields.Int()
+    delka_minut    = fields.Int(validate=validate.Range(min=1, max=24 * 60))
+    stul_prirazen  = fields.Bool(dump_only=True)
     stav_rezervace = fields.Str(missing="čekající")
     sleva          = fields.Decimal(as_string=True)
     zakaznik       = fields.Nested(ZakaznikSummarySchema, dump_only=True)
@@ -138,21 +143,23 @@ class RezervaceSchema(Schema):
 
     @post_dump
     def replace_nulls(self, data, **kwargs):
-        if data.get("stul") is None:
+        # jen pro pole, která se skutečně dumpují (?fields= / ?expand= je mohou vynechat)
+        if "stul" in data and data["stul"] is None:
             data["stul"] = "Stůl je dostupný"
-        if data.get("salonek") is None:
+        if "salonek" in data and data["salonek"] is None:
             data["salonek"] = "Žádný salónek"
-        if data.get("akce") is None:
+        if "akce" in data and data["akce"] is None:
             data["akce"] = "Žádná akce"
-        if data.get("workshop") is None:
+        if "workshop" in data and data["workshop"] is None:
             data["workshop"] = "Žádný workshop"
-        if not data.get("notifikace"):
+        if "notifikace" in data and not data["notifikace"]:
             data["notifikace"] = "Žádné notifikace"
         return data
 
 class RezervaceCreateSchema(Schema):
     datum_cas      = fields.DateTime(required=True)
     pocet_osob     = fields.Int(required=True)
+    delka_minut    = fields.Int(validate=validate.Range(min=1, max=24 * 60))
     stav_rezervace = fields.Str()
     sleva          = fields.Decimal(as_string=True)
     id_zakaznika   = fields.Int(load_only=True)
@@ -160,14 +167,7 @@ class RezervaceCreateSchema(Schema):
     id_salonek     = fields.Int(allow_none=True)
     id_akce        = fields.Int(allow_none=True)
     id_workshop    = fields.Int(allow_none=True)
-
-    @validates_schema
-    def require_place(self, data, **kwargs):
-        if not any(data.get(k) for k in ("id_stul","id_salonek","id_akce","id_workshop")):
-            raise ValidationError(
-                "Musíte vyplnit buď 'id_stul', 'id_salonek', 'id_akce' nebo 'id_workshop'.",
-                field_names=["id_stul","id_salonek","id_akce","id_workshop"]
-            )
+    # bez id_stul / id_salonek / id_akce / id_workshop přidělí stůl server (best-fit)
 
 # — Stůl —
 class StulSchema(Schema):
@@ -189,15 +189,17 @@ class SalonekSchema(Schema):
     popis         = fields.Str()
     cena          = fields.Decimal(as_string=True)
     kapacita      = fields.Int()
-    obrazek_url   = fields.Method("get_image_url", dump_only=True)
+    obrazek_url   = fields.Method("get_image_url", dump_only=True, metadata={"requires": ["obrazek_filename"], "static_image": "obrazek_filename"})
+    obrazek_srcset = fields.Method("get_image_srcset", dump_only=True, metadata={"requires": ["obrazek_filename"], "static_image": "obrazek_filename", "srcset": True})
     rezervace     = fields.Nested(RezervaceSummarySchema, many=True, dump_only=True)
     akce          = fields.Nested(PodnikovaAkceSummarySchema, many=True, dump_only=True)
 
     def get_image_url(self, obj):
-        if not obj.obrazek_filename:
-            return None
-        # ← RELATIVNÍ cesta, stejná jako u položek menu
-        return url_for('static', filename=f'images/{obj.obrazek_filename}')
+        # ← RELATIVNÍ cesta, stejná jako u položek menu (medium varianta, je-li hotová)
+        return image_url(obj.obrazek_filename)
+
+    def get_image_srcset(self, obj):
+        return image_srcset(obj.obrazek_filename)
 
 class SalonekCreateSchema(Schema):
     nazev    = fields.Str(required=True)
@@ -212,16 +214,18 @@ class PodnikovaAkceSchema(Schema):
     popis       = fields.Str()
     cena        = fields.Decimal(as_string=True)
     kapacita    = fields.Int()
-    obrazek_url = fields.Method("get_image_url", dump_only=True)
+    obrazek_url = fields.Method("get_image_url", dump_only=True, metadata={"requires": ["obrazek_filename"], "static_image": "obrazek_filename"})
+    obrazek_srcset = fields.Method("get_image_srcset", dump_only=True, metadata={"requires": ["obrazek_filename"], "static_image": "obrazek_filename", "srcset": True})
     datum       = fields.Date()
     cas         = fields.Time()
     salonek     = fields.Nested(SalonekSchema, dump_only=True)
 
     def get_image_url(self, obj):
-        if not obj.obrazek_filename:
-            return None
-        # ← RELATIVNÍ cesta, stejná jako u položek menu
-        return url_for('static', filename=f'images/{obj.obrazek_filename}')
+        # ← RELATIVNÍ cesta, stejná jako u položek menu (medium varianta, je-li hotová)
+        return image_url(obj.obrazek_filename)
+
+    def get_image_srcset(self, obj):
+        return image_srcset(obj.obrazek_filename)
 
 class PodnikovaAkceCreateSchema(Schema):
     nazev     = fields.Str(required=True)
@@ -239,15 +243,17 @@ class WorkshopSchema(Schema):
     popis       = fields.Str()
     cena        = fields.Decimal(as_string=True)
     kapacita    = fields.Int()
-    obrazek_url = fields.Method("get_image_url", dump_only=True)
+    obrazek_url = fields.Method("get_image_url", dump_only=True, metadata={"requires": ["obrazek_filename"], "static_image": "obrazek_filename"})
+    obrazek_srcset = fields.Method("get_image_srcset", dump_only=True, metadata={"requires": ["obrazek_filename"], "static_image": "obrazek_filename", "srcset": True})
     cas_konani  = fields.DateTime()
     rezervace   = fields.Nested(RezervaceSummarySchema, many=True, dump_only=True)
 
     def get_image_url(self, obj):
-        if not obj.obrazek_filename:
-            return None
-        # ← RELATIVNÍ cesta, stejná jako u položek menu
-        return url_for('static', filename=f'images/{obj.obrazek_filename}')
+        # ← RELATIVNÍ cesta, stejná jako u položek menu (medium varianta, je-li hotová)
+        return image_url(obj.obrazek_filename)
+
+    def get_image_srcset(self, obj):
+        return image_srcset(obj.obrazek_filename)
 
 class WorkshopCreateSchema(Schema):
     nazev      = fields.Str(required=True)
@@ -321,16 +327,20 @@ class PolozkaMenuSchema(Schema):
     nazev           = fields.Str(required=True)
     popis           = fields.Str(load_default="", allow_none=False)
     cena            = fields.Decimal(as_string=True)
-    obrazek_url     = fields.Method("get_obrazek_url", dump_only=True)
+    obrazek_url     = fields.Method("get_obrazek_url", dump_only=True,
+                                    metadata={"requires": ["obrazek_filename"], "static_image": "obrazek_filename", "external": True})
+    obrazek_srcset  = fields.Method("get_obrazek_srcset", dump_only=True,
+                                    metadata={"requires": ["obrazek_filename"], "static_image": "obrazek_filename", "external": True, "srcset": True})
     kategorie       = fields.Str()
     den             = fields.Str(allow_none=True)
-    alergeny        = fields.Method("get_alergeny", dump_only=True)
+    alergeny        = fields.Method("get_alergeny", dump_only=True, metadata={"requires": ["alergeny.alergen"]})
 
     def get_obrazek_url(self, obj: PolozkaMenu):
-        if not obj.obrazek_filename:
-            return None
         # u položek menu _external=True zůstává, protože tam to funguje
-        return url_for('static', filename=f'images/{obj.obrazek_filename}', _external=True)
+        return image_url(obj.obrazek_filename, external=True)
+
+    def get_obrazek_srcset(self, obj: PolozkaMenu):
+        return image_srcset(obj.obrazek_filename, external=True)
 
     def get_alergeny(self, obj):
         return [
@@ -407,9 +417,19 @@ class NotifikaceSchema(Schema):
     typ           = fields.Str()
     datum_cas     = fields.DateTime()
     text          = fields.Str()
+    precteno      = fields.Bool(dump_only=True)
     rezervace     = fields.Nested(RezervaceSummarySchema, dump_only=True, allow_none=True)
     objednavka    = fields.Nested(ObjednavkaSummarySchema, dump_only=True, allow_none=True)
 
+class NotifikacePrectenoSchema(Schema):
+    ids      = fields.List(fields.Int(), validate=validate.Length(min=1, max=1000))
+    until_id = fields.Int()       # vše až po toto id včetně („označit vše jako přečtené“)
+
+    @validates_schema
+    def _jedno_z(self, data, **kwargs):
+        if ("ids" in data) == ("until_id" in data):
+            raise ValidationError("Zadejte buď 'ids', nebo 'until_id'.")
+
 class NotifikaceCreateSchema(Schema):
     typ            = fields.Str(required=True)
     datum_cas      = fields.DateTime(required=True)
@@ -428,4 +448,11 @@ class UserRoleAssignSchema(Schema):
 
 # — Pro uplatnění bodů —
 class RedeemSchema(Schema):
-    points = fields.Int(required=True)
+    points = fields.Int(required=True, validate=validate.Range(min=1))
+
+class BodovyPohybSchema(Schema):
+    id_pohybu     = fields.Int(dump_only=True)
+    zmena         = fields.Int(dump_only=True)
+    typ           = fields.Str(dump_only=True)
+    datum_cas     = fields.DateTime(dump_only=True)
+    id_objednavky = fields.Int(dump_only=True, allow_none=True)
@@ -0,0 +1,260 @@
+# app/serializers.py
+
+"""
+Zkompilované serializéry pro marshmallow schémata z app/schemas.py.
+
+Schéma (včetně only/exclude) se při prvním použití přeloží na jednu funkci
+obj → dict: pro každé pole předem připravený getter a převod hodnoty, vnořená
+schémata zkompilovaná rekurzivně, post_dump hooky volané přímo.
+Výstup je shodný se Schema.dump(); pole, která kompilátor nezná, se
+serializují původním field.serialize().
+
+Použití:  serializers.dump(SalonekSchema(many=True), objekty)
+
+Při SERIALIZER_VERIFY = True (testy) se každý výstup porovná s marshmallow
+a rozdíl skončí výjimkou SerializerMismatch.
+"""
+
+import threading
+import decimal
+from urllib.parse import quote
+
+from flask import current_app, has_app_context, has_request_context, request, url_for
+from marshmallow import Schema, fields, missing
+
+# (schéma, only, exclude) → zkompilovaná funkce pro jeden objekt
+_compiled      = {}
+_compiled_lock = threading.Lock()
+
+# (host_url, external, endpoint) → prefix URL obrázků (/static/images/, /img/)
+_static_prefixes = {}
+MAX_STATIC_PREFIXES = 64
+
+# stejná množina „bezpečných“ znaků jako ve werkzeug BaseConverter.to_url
+_URL_SAFE = "!$&'()*+,/:;=@"
+
+
+class SerializerMismatch(AssertionError):
+    """Zkompilovaný výstup se liší od Schema.dump()."""
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Převody hodnot jednotlivých typů polí
+# ──────────────────────────────────────────────────────────────────────────────
+def _int(value):
+    return None if value is None else int(value)
+
+
+def _str(value):
+    return None if value is None else str(value)
+
+
+def _decimal_str(value):
+    return None if value is None else format(decimal.Decimal(str(value)), "f")
+
+
+def _formatter(format_func):
+    return lambda value: None if value is None else format_func(value)
+
+
+def _converter(field):
+    """Převod hodnoty pro běžné typy polí, jinak None (→ field.serialize)."""
+    kind = type(field)
+    if kind is fields.Integer and not field.as_string:
+        return _int
+    if kind is fields.Decimal:
+        if field.as_string and field.places is None and not field.allow_nan:
+            return _decimal_str
+        return None
+    if kind in (fields.DateTime, fields.Date, fields.Time):
+        format_func = kind.SERIALIZATION_FUNCS.get(field.format or kind.DEFAULT_FORMAT)
+        return _formatter(format_func) if format_func else None
+    if kind in (fields.String, fields.Email):
+        return _str
+    return None
+
+
+def _getter(attr):
+    if "." in attr:
+        return None
+
+    def get(obj):
+        if isinstance(obj, dict):
+            return obj.get(attr, missing)
+        return getattr(obj, attr, missing)
+    return get
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# URL statických obrázků (Method pole s metadata["static_image"], "srcset" = mapa variant)
+# ──────────────────────────────────────────────────────────────────────────────
+_PREFIX_ARGS = {"static": {"filename": "images/"}, "image_file": {"path": ""}}
+
+
+def static_image_prefix(external=False, endpoint="static"):
+    """'/static/images/' nebo '/img/' (resp. absolutní URL) – spočítá se jednou pro každý host."""
+    key    = (request.host_url, external, endpoint)
+    prefix = _static_prefixes.get(key)
+    if prefix is None:
+        if len(_static_prefixes) >= MAX_STATIC_PREFIXES:
+            _static_prefixes.clear()
+        prefix = _static_prefixes[key] = url_for(endpoint, _external=external, **_PREFIX_ARGS[endpoint])
+    return prefix
+
+
+def _file_url(pipeline, name, external):
+    # stejné URL jako images.file_url(), jen bez url_for pro každý obrázek
+    entry = pipeline.manifest.lookup(name)
+    if entry is None:
+        return static_image_prefix(external) + quote(name, safe=_URL_SAFE)
+    return (static_image_prefix(external, "image_file") + entry["fingerprint"] + "/"
+            + quote(name, safe=_URL_SAFE))
+
+
+def _static_image(field, fallback):
+    attr     = field.metadata["static_image"]
+    external = field.metadata.get("external", False)
+    srcset   = field.metadata.get("srcset", False)
+
+    def serialize(obj):
+        if not has_request_context():
+            return fallback(obj)
+        filename = getattr(obj, attr)
+        if not filename:
+            return None
+        pipeline = current_app.extensions["image_pipeline"]
+        if srcset:
+            return {
+                variant: _file_url(pipeline, name, external)
+                for variant, name in pipeline.variant_names(filename).items()
+            }
+        return _file_url(pipeline, pipeline.display_name(filename), external)
+    return serialize
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Kompilace
+# ──────────────────────────────────────────────────────────────────────────────
+def _compile_field(schema, name, field):
+    """Vrátí funkci obj → hodnota (nebo missing = pole se nevypíše)."""
+    if isinstance(field, fields.Method):
+        method = getattr(schema, field.serialize_method_name) if field.serialize_method_name else None
+        if method is None:
+            return lambda obj: missing
+        if "static_image" in field.metadata:
+            return _static_image(field, method)
+        return method
+
+    generic = lambda obj: field.serialize(name, obj, accessor=schema.get_attribute)  # noqa: E731
+    if field.dump_default is not missing:
+        return generic
+    getter = _getter(field.attribute or name)
+    if getter is None:
+        return generic
+
+    if isinstance(field, fields.Nested):
+        nested = field.schema
+        if type(nested).dump is not Schema.dump:
+            return generic
+        dump_one = compile_schema(nested)
+        if field.many:
+            def serialize(obj):
+                value = getter(obj)
+                if value is missing or value is None:
+                    return value
+                return [dump_one(v) for v in value]
+        else:
+            def serialize(obj):
+                value = getter(obj)
+                if value is missing or value is None:
+                    return value
+                return dump_one(value)
+        return serialize
+
+    convert = _converter(field)
+    if convert is None:
+        return generic
+
+    def serialize(obj):
+        value = getter(obj)
+        if value is missing:
+            return value
+        return convert(value)
+    return serialize
+
+
+def _post_dump_hooks(schema):
+    """post_dump hooky volané pro každý objekt; None = schéma má hooky, které neumíme."""
+    if schema._hooks.get("pre_dump"):
+        return None
+    out = []
+    for attr_name, pass_many, hook_kwargs in schema._hooks.get("post_dump", ()):
+        if pass_many or hook_kwargs.get("pass_original"):
+            return None
+        out.append(getattr(schema, attr_name))
+    return out
+
+
+def _options(only, exclude):
+    return (frozenset(only) if only is not None else None, frozenset(exclude))
+
+
+def _key(schema):
+    """Klíč cache: třída + only/exclude schématu i jeho vnořených polí (?fields/?expand)."""
+    nested = tuple(
+        (name, _options(field.only, field.exclude))
+        for name, field in schema.dump_fields.items()
+        if isinstance(field, fields.Nested)
+    )
+    return (type(schema), _options(schema.only, schema.exclude), nested)
+
+
+def compile_schema(schema):
+    """Zkompilovaná funkce obj → dict pro jeden objekt (many se ignoruje)."""
+    dump_one = schema.__dict__.get("_compiled_dump")
+    if dump_one is not None:
+        return dump_one
+    key = _key(schema)
+    dump_one = _compiled.get(key)
+    if dump_one is not None:
+        schema._compiled_dump = dump_one
+        return dump_one
+
+    hooks = _post_dump_hooks(schema)
+    if hooks is None:
+        def dump_one(obj):
+            return schema.dump(obj, many=False)
+    else:
+        plan = tuple(
+            (field.data_key or name, _compile_field(schema, name, field))
+            for name, field in schema.dump_fields.items()
+        )
+
+        def dump_one(obj):
+            data = {}
+            for out_key, serialize in plan:
+                value = serialize(obj)
+                if value is not missing:
+                    data[out_key] = value
+            for hook in hooks:
+                data = hook(data, many=False)
+            return data
+
+    with _compiled_lock:
+        dump_one = _compiled.setdefault(key, dump_one)
+    schema._compiled_dump = dump_one
+    return dump_one
+
+
+def dump(schema, obj, many=None):
+    """Náhrada za schema.dump(obj) se stejným výstupem."""
+    many     = schema.many if many is None else many
+    dump_one = compile_schema(schema)
+    result   = [dump_one(o) for o in obj] if many else dump_one(obj)
+    if has_app_context() and current_app.config.get("SERIALIZER_VERIFY"):
+        expected = schema.dump(obj, many=many)
+        if result != expected:
+            raise SerializerMismatch(
+                f"{type(schema).__name__}: zkompilovaný výstup {result!r} != marshmallow {expected!r}"
+            )
+    return result
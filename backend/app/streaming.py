@@ -0,0 +1,73 @@
+# app/streaming.py
+
+"""
+Streamovaný výstup velkých seznamů (export pro administraci).
+
+Místo stránky přes paginate() se vrátí celá tabulka po řádcích:
+  - Accept: application/x-ndjson  → NDJSON (jeden JSON objekt na řádek)
+  - ?stream=1                     → JSON pole, posílané po kouscích
+Dotaz běží s yield_per (STREAM_BATCH_SIZE): na PostgreSQL přes server-side
+kurzor, řádky se serializují po dávkách a po každé dávce se vyprázdní
+identity map vlastní session → paměť workeru nezávisí na velikosti výsledku.
+
+Stream jde mimo kompresi (app/compression.py) i mimo stránkování;
+řadí se podle primárního klíče.
+"""
+
+from flask import Response, current_app, request, stream_with_context
+
+from .db import db
+
+NDJSON = "application/x-ndjson"
+
+
+def stream_format():
+    """'ndjson' / 'json' pro streamovaný výstup, None = běžná stránkovaná odpověď."""
+    best = request.accept_mimetypes.best_match(["application/json", NDJSON], default="application/json")
+    if best == NDJSON:
+        return "ndjson"
+    if request.args.get("stream", "").lower() in ("1", "true"):
+        return "json"
+    return None
+
+
+def stream_response(stmt, to_dict, fmt=None, scalars=True):
+    """
+    Streamovaná odpověď pro SELECT `stmt`; to_dict převede jeden řádek na dict.
+    scalars=False pro SELECT sloupců (řádky jsou Row, ne ORM objekty).
+    """
+    fmt        = fmt or stream_format() or "json"
+    batch_size = current_app.config.get("STREAM_BATCH_SIZE", 500)
+    dumps      = current_app.json.dumps
+
+    @stream_with_context
+    def generate():
+        # vlastní session: identity map se po každé dávce zahodí a nedotkne se db.session
+        session = db.session.session_factory()
+        try:
+            result = session.execute(stmt, execution_options={"yield_per": batch_size})
+            if scalars:
+                result = result.scalars()
+            first = True
+            if fmt == "json":
+                yield "["
+            for rows in result.partitions():
+                items = [dumps(to_dict(row)) for row in rows]
+                # expunge_all() by zneplatnil identity map, do které result ještě načítá
+                for obj in list(session.identity_map.values()):
+                    session.expunge(obj)
+                if fmt == "ndjson":
+                    yield "\n".join(items) + "\n"
+                else:
+                    yield ("" if first else ",") + ",".join(items)
+                first = False
+            if fmt == "json":
+                yield "]"
+        finally:
+            session.close()
+
+    mimetype = NDJSON if fmt == "ndjson" else "application/json"
+    resp = Response(generate(), mimetype=mimetype)
+    resp.headers["X-Accel-Buffering"] = "no"     # nginx pošle data hned, ne až po naplnění bufferu
+    resp.headers["Cache-Control"] = "no-store"
+    return resp
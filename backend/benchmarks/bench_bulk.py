@@ -0,0 +1,71 @@
+# benchmarks/bench_bulk.py
+#
+# Propustnost zápisu N stolů: N× POST /api/stul (request + commit na položku)
+# vs. POST /api/stul/bulk po dávkách (jedna validace, jeden INSERT … RETURNING,
+# jeden commit na dávku). Pro úplnost i PUT/DELETE /bulk nad vytvořenými řádky.
+#
+#   python -m benchmarks.bench_bulk [počet_položek] [velikost_dávky]
+
+import sys
+import time
+
+from flask_jwt_extended import create_access_token
+
+from app import create_app
+from app.config import TestingConfig
+from app.db import db
+from app.models import Stul
+
+
+def timed(label, n, fn):
+    t0 = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - t0
+    print(f"{label:<34} {elapsed * 1000:>9.1f} ms   {n / elapsed:>9.0f} položek/s")
+
+
+def main(n, batch):
+    class BenchConfig(TestingConfig):
+        SERIALIZER_VERIFY = False
+        BULK_MAX_ITEMS = batch
+
+    app = create_app(config_override=BenchConfig)
+    with app.app_context():
+        token   = create_access_token(identity="1", additional_claims={"roles": ["admin"]})
+        headers = {"Authorization": f"Bearer {token}"}
+        client  = app.test_client()
+        items   = [{"cislo": i + 1, "kapacita": 4, "popis": f"Stůl {i + 1}"} for i in range(n)]
+        chunks  = [items[i:i + batch] for i in range(0, n, batch)]
+
+        def reset():
+            db.session.remove()
+            db.drop_all()
+            db.create_all()
+
+        def single():
+            for item in items:
+                assert client.post("/api/stul", json=item, headers=headers).status_code == 201
+
+        def bulk(method, payloads):
+            def run():
+                for chunk in payloads:
+                    resp = client.open("/api/stul/bulk", method=method, json=chunk, headers=headers)
+                    assert resp.status_code in (200, 201), resp.get_json()
+            return run
+
+        reset()
+        timed(f"{n}× POST /api/stul", n, single)
+        reset()
+        timed(f"POST /api/stul/bulk (dávky po {batch})", n, bulk("POST", chunks))
+
+        ids     = list(db.session.scalars(db.select(Stul.id_stul).order_by(Stul.id_stul)))
+        updates = [[{"id_stul": i, "kapacita": 6} for i in ids[j:j + batch]] for j in range(0, n, batch)]
+        timed(f"PUT /api/stul/bulk (dávky po {batch})", n, bulk("PUT", updates))
+        timed(f"DELETE /api/stul/bulk (dávky po {batch})", n,
+              bulk("DELETE", [ids[j:j + batch] for j in range(0, n, batch)]))
+        db.drop_all()
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    main(*(args + [2000, 500][len(args):]))
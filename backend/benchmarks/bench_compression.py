@@ -0,0 +1,105 @@
+# benchmarks/bench_compression.py
+#
+# Velikost odpovědi a CPU serveru na request pro velké JSON seznamy
+# (GET /api/zakaznik s historií, GET /api/rezervace s vnořeným salonkem)
+# bez komprese, s gzip na různých úrovních a s brotli (je-li nainstalován).
+# Komprese se měří bez cache (COMPRESS_CACHE_BYTES = 0), řádek „cache“ ukazuje
+# opakované stažení stejného seznamu.
+#
+#   python -m benchmarks.bench_compression [počet_zákazníků] [opakování]
+
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from flask_jwt_extended import create_access_token
+
+from app import create_app, compression
+from app.config import TestingConfig
+from app.db import db
+from app.models import Zakaznik, Role, Stul, Salonek, Rezervace, Objednavka, Hodnoceni
+
+ENDPOINTS = ["/api/zakaznik?limit=500", "/api/rezervace?limit=500"]
+
+
+def seed(n):
+    role    = Role(name="user")
+    stoly   = [Stul(cislo=i + 1, kapacita=8) for i in range(10)]
+    salonky = [Salonek(nazev=f"Salonek {i}", popis="Sál s výhledem do zahrady, projektor, ozvučení",
+                       cena=Decimal("1500.00"), kapacita=40, obrazek_filename=f"salon{i}.jpg")
+               for i in range(3)]
+    db.session.add_all([role, *stoly, *salonky])
+    db.session.flush()
+    for i in range(n):
+        zak = Zakaznik(jmeno=f"Jan{i}", prijmeni=f"Novák{i}", email=f"jan{i}@example.com",
+                       _password="x", roles=[role])
+        db.session.add(zak)
+        db.session.flush()
+        for j in range(3):
+            obj = Objednavka(id_zakaznika=zak.id_zakaznika, celkova_castka=Decimal("259.00"), body_ziskane=25)
+            db.session.add(obj)
+            db.session.flush()
+            db.session.add(Hodnoceni(hodnoceni=5, komentar="Výborné jídlo, rychlá obsluha",
+                                     datum=datetime(2030, 1, 1), id_objednavky=obj.id_objednavky,
+                                     id_zakaznika=zak.id_zakaznika))
+        db.session.add_all([
+            Rezervace(datum_cas=datetime(2030, 1, 1) + timedelta(hours=i), pocet_osob=2,
+                      id_zakaznika=zak.id_zakaznika, id_stul=stoly[i % 10].id_stul),
+            Rezervace(datum_cas=datetime(2030, 2, 1) + timedelta(hours=i), pocet_osob=12,
+                      id_zakaznika=zak.id_zakaznika, id_salonek=salonky[i % 3].id_salonek),
+        ])
+    db.session.commit()
+
+
+def measure(client, url, headers, repeat):
+    client.get(url, headers=headers)                       # zahřátí
+    t0  = time.process_time()
+    for _ in range(repeat):
+        resp = client.get(url, headers=headers)
+    cpu = (time.process_time() - t0) / repeat
+    return len(resp.data), cpu
+
+
+def main(n, repeat):
+    variants = [("bez komprese", None, 6)] + [(f"gzip {lvl}", "gzip", lvl) for lvl in (1, 6, 9)]
+    if compression.brotli is not None:
+        variants += [(f"br {q}", "br", q) for q in (1, 4)]
+
+    for label, encoding, level in variants:
+        class BenchConfig(TestingConfig):
+            SERIALIZER_VERIFY = False
+            COMPRESS_LEVEL = level
+            COMPRESS_BR_QUALITY = level
+            COMPRESS_CPU_BUDGET = 0
+            COMPRESS_CACHE_BYTES = 0
+
+        app = create_app(config_override=BenchConfig)
+        with app.app_context():
+            db.drop_all()
+            db.create_all()
+            seed(n)
+            token   = create_access_token(identity="1", additional_claims={"roles": ["admin"]})
+            headers = {"Authorization": f"Bearer {token}"}
+            if encoding:
+                headers["Accept-Encoding"] = encoding
+            client = app.test_client()
+            for url in ENDPOINTS:
+                size, cpu = measure(client, url, headers, repeat)
+                print(f"{url:<28} {label:<13} {size / 1024:>9.1f} kB   CPU {cpu * 1000:>7.2f} ms/request")
+
+            if encoding == "gzip" and level == 6:
+                app.extensions["compressor"].cache = compression.CompressionCache(8 * 1024 * 1024)
+                for url in ENDPOINTS:
+                    size, cpu = measure(client, url, headers, repeat)
+                    print(f"{url:<28} {'gzip 6 cache':<13} {size / 1024:>9.1f} kB   CPU {cpu * 1000:>7.2f} ms/request")
+            stats = app.extensions["compressor"].stats
+            if stats["compressed"]:
+                print(f"{'':<28} {'':<13} komprese: {stats['cpu_seconds'] / stats['compressed'] * 1000:.2f} ms CPU, "
+                      f"poměr {stats['bytes_out'] / stats['bytes_in']:.3f}")
+            db.drop_all()
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    main(*(args + [300, 10][len(args):]))
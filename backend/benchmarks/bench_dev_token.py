@@ -0,0 +1,54 @@
+# benchmarks/bench_dev_token.py
+#
+# Čas jednoho requestu bez hlavičky Authorization ve vývojovém režimu
+# (GET /api/auth/me s automaticky vloženým tokenem vývojového uživatele):
+#   - "bez cache"  = token se počítá pro každý request (dotaz + ověření hesla + JWT),
+#                    tj. původní chování _inject_dev_token
+#   - "s cache"    = token z DevTokenCache
+#
+#   python -m benchmarks.bench_dev_token [počet_requestů]
+
+import os
+import statistics
+import sys
+import time
+
+from app import create_app
+from app.config import DevelopmentConfig
+from app.db import db
+from app.models import Zakaznik
+
+
+def main(n):
+    class BenchConfig(DevelopmentConfig):
+        SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+        SQLALCHEMY_ECHO = False
+        PASSWORD_HASH_POOL_SIZE = 0
+
+    os.environ["DEV_USER_EMAIL"] = "dev@example.com"
+    os.environ["DEV_USER_PASSWORD"] = "password1"
+    app = create_app(config_name="development", config_override=BenchConfig)
+    cache = app.extensions["dev_token"]
+
+    with app.app_context():
+        db.create_all()
+        dev = Zakaznik(jmeno="Dev", prijmeni="User", email="dev@example.com")
+        dev.password = "password1"
+        db.session.add(dev)
+        db.session.commit()
+
+        client = app.test_client()
+        for label, before in (("bez cache", cache.invalidate), ("s cache", lambda: None)):
+            client.get("/api/auth/me")
+            times = []
+            for _ in range(n):
+                before()
+                t0 = time.perf_counter()
+                assert client.get("/api/auth/me").status_code == 200
+                times.append(time.perf_counter() - t0)
+            print(f"{label:<10} průměr {statistics.mean(times) * 1000:>8.2f} ms   "
+                  f"p50 {statistics.median(times) * 1000:>8.2f} ms   {n / sum(times):>8.1f} req/s")
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:2]] or [50])
@@ -0,0 +1,108 @@
+# benchmarks/bench_login.py
+#
+# Nápor přihlášení (POST /api/auth/login) při různé velikosti poolu pro ověřování hesel.
+# Pro každou velikost: přihlášení/s, latence p50/p95, počet odmítnutí (429/503)
+# a latence levného endpointu (/hello) měřená souběžně → ukazuje, jestli hashování
+# nezdržuje ostatní requesty.
+#
+#   python -m benchmarks.bench_login [vlákna] [přihlášení_na_vlákno] [velikosti_poolu…]
+#   python -m benchmarks.bench_login 16 10 0 1 2 4
+
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+from app import create_app
+from app.config import TestingConfig
+from app.db import db
+from app.models import Zakaznik
+
+
+def percentile(values, p):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def run(pool_size, threads, per_thread, db_url):
+    class BenchConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = db_url
+        SQLALCHEMY_ENGINE_OPTIONS = {"connect_args": {"timeout": 30}} if db_url.startswith("sqlite") else {}
+        SERIALIZER_VERIFY = False
+        PASSWORD_HASH_POOL_SIZE = pool_size
+        PASSWORD_HASH_MAX_PENDING = 0 if pool_size else threads
+        #   inline = původní chování (bez limitu), jinak výchozí 4 × počet procesů
+        PASSWORD_HASH_TIMEOUT = 30
+
+    app = create_app(config_override=BenchConfig)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        zak = Zakaznik(jmeno="Bench", prijmeni="User", email="bench@example.com")
+        zak.password = "password1"
+        db.session.add(zak)
+        db.session.commit()
+
+    # zahřátí: start procesů poolu se do měření nepočítá
+    app.test_client().post("/api/auth/login", json={"email": "bench@example.com", "password": "password1"})
+
+    latencies, rejected, hello = [], [], []
+    done = threading.Event()
+
+    def worker():
+        client = app.test_client()
+        for _ in range(per_thread):
+            t0   = time.perf_counter()
+            resp = client.post("/api/auth/login", json={"email": "bench@example.com", "password": "password1"})
+            if resp.status_code == 200:
+                latencies.append(time.perf_counter() - t0)
+            else:
+                rejected.append(resp.status_code)
+
+    def prober():
+        client = app.test_client()
+        while not done.is_set():
+            t0 = time.perf_counter()
+            client.get("/hello")
+            hello.append(time.perf_counter() - t0)
+            time.sleep(0.01)
+
+    probe = threading.Thread(target=prober)
+    pool  = [threading.Thread(target=worker) for _ in range(threads)]
+    t0 = time.perf_counter()
+    probe.start()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    done.set()
+    probe.join()
+
+    app.extensions["password_hasher"].shutdown()
+    with app.app_context():
+        db.drop_all()
+
+    label = f"pool={pool_size}" if pool_size else "inline"
+    print(f"{label:<8} {len(latencies) / elapsed:>7.1f} přihl./s   "
+          f"p50 {statistics.median(latencies) * 1000 if latencies else float('nan'):>7.1f} ms   "
+          f"p95 {percentile(latencies, 0.95) * 1000:>7.1f} ms   "
+          f"odmítnuto {len(rejected):>3}   "
+          f"/hello p95 {percentile(hello, 0.95) * 1000:>6.1f} ms")
+
+
+def main(threads, per_thread, *pool_sizes):
+    tmp = tempfile.NamedTemporaryFile(suffix=".sqlite3", delete=False)
+    url = os.environ.get("BENCH_DATABASE_URL", f"sqlite:///{tmp.name}")
+    for size in pool_sizes or (0, 1, 2, 4):
+        run(size, threads, per_thread, url)
+    os.unlink(tmp.name)
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    main(*(args + [16, 10][len(args):]))
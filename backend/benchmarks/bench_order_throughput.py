@@ -0,0 +1,82 @@
+# benchmarks/bench_order_throughput.py
+#
+# Souběžné objednávky jednoho zákazníka (POST /api/objednavky) → objednávek za sekundu.
+# Výchozí DB je dočasný SQLite soubor; pro realistické měření proti PostgreSQL nastavte
+# BENCH_DATABASE_URL (pozor, benchmark tabulky vytvoří a na konci smaže).
+#
+#   python -m benchmarks.bench_order_throughput [vlákna] [objednávek_na_vlákno] [položek_v_objednávce]
+
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from flask_jwt_extended import create_access_token
+
+from app import create_app
+from app.config import TestingConfig
+from app.db import db
+from app.models import Zakaznik, VernostniUcet, PolozkaMenu
+
+
+def main(threads, per_thread, items_per_order):
+    tmp = tempfile.NamedTemporaryFile(suffix=".sqlite3", delete=False)
+    url = os.environ.get("BENCH_DATABASE_URL", f"sqlite:///{tmp.name}")
+
+    class BenchConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = url
+        SQLALCHEMY_ENGINE_OPTIONS = (
+            {"connect_args": {"timeout": 30}} if url.startswith("sqlite") else {"pool_size": threads}
+        )
+
+    app = create_app(config_override=BenchConfig)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        zak = Zakaznik(jmeno="Bench", prijmeni="User", email="bench@example.com")
+        zak.password = "password1"
+        db.session.add(zak)
+        db.session.flush()
+        db.session.add(VernostniUcet(body=0, id_zakaznika=zak.id_zakaznika))
+        menu = [
+            PolozkaMenu(nazev=f"Jídlo {i}", popis="", cena=100, kategorie="stálá nabídka", den="",
+                        preparation_time=10, points=5)
+            for i in range(items_per_order)
+        ]
+        db.session.add_all(menu)
+        db.session.commit()
+        headers = {"Authorization": f"Bearer {create_access_token(identity=str(zak.id_zakaznika))}"}
+        payload = {"items": [{"id_menu_polozka": m.id_menu_polozka, "mnozstvi": 1, "cena": "100"} for m in menu]}
+
+    errors = []
+
+    def worker():
+        client = app.test_client()
+        for _ in range(per_thread):
+            resp = client.post("/api/objednavky", json=payload, headers=headers)
+            if resp.status_code != 201:
+                errors.append(resp.status_code)
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    t0 = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - t0
+
+    total = threads * per_thread
+    print(f"{total} objednávek ({threads} vláken, {items_per_order} položek): "
+          f"{elapsed:.2f} s → {(total - len(errors)) / elapsed:.1f} obj/s, chyb: {len(errors)}")
+
+    with app.app_context():
+        body = db.session.query(VernostniUcet.body).scalar()
+        print(f"body na účtu: {body} (očekáváno {(total - len(errors)) * 5 * items_per_order})")
+        db.drop_all()
+    os.unlink(tmp.name)
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    main(*(args + [8, 25, 5][len(args):]))
@@ -0,0 +1,120 @@
+# benchmarks/bench_points.py
+#
+# Souběžné připisování/uplatňování bodů jednoho zákazníka (typicky rodina s jedním účtem):
+#   zámek  – původní postup: SELECT … FOR UPDATE na vernostni_ucet, body += n, commit
+#   kniha  – app/points.py: zisk = INSERT pohybu, uplatnění = podmíněný UPDATE
+# Každá operace drží transakci ještě WORK_MS (simulace zbytku objednávky), aby bylo
+# vidět, jak dlouho kdo čeká na zámek řádku. Na konci se ověří výsledný zůstatek.
+# Výchozí DB je dočasný SQLite soubor (zamyká celou DB, FOR UPDATE ignoruje);
+# pro realistické měření nastavte BENCH_DATABASE_URL na PostgreSQL.
+#
+#   python -m benchmarks.bench_points [vlákna] [operací_na_vlákno] [každá_n-tá_je_uplatnění]
+
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from app import create_app, points
+from app.config import TestingConfig
+from app.db import db
+from app.models import Zakaznik, VernostniUcet
+
+WORK_MS = 2
+EARN, REDEEM = 5, 3
+
+
+def locking(zak_id, redeem):
+    ucet = db.session.query(VernostniUcet).filter_by(id_zakaznika=zak_id).with_for_update().one()
+    time.sleep(WORK_MS / 1000)
+    if redeem:
+        if ucet.body < REDEEM:
+            db.session.rollback()
+            return False
+        ucet.body -= REDEEM
+    else:
+        ucet.body += EARN
+    db.session.commit()
+    return True
+
+
+def ledger(zak_id, redeem):
+    time.sleep(WORK_MS / 1000)
+    ok = points.redeem(zak_id, REDEEM) if redeem else (points.earn(zak_id, EARN) or True)
+    db.session.commit()
+    return ok
+
+
+def run(app, fn, zak_id, threads, per_thread, redeem_every):
+    done = {"earn": 0, "redeem": 0, "errors": 0}
+    lock = threading.Lock()
+
+    def worker(seed):
+        with app.app_context():
+            for i in range(per_thread):
+                redeem = redeem_every and (seed + i) % redeem_every == 0
+                try:
+                    ok = fn(zak_id, redeem)
+                except Exception:
+                    db.session.rollback()
+                    ok = None
+                with lock:
+                    if ok is None:
+                        done["errors"] += 1
+                    elif ok:
+                        done["redeem" if redeem else "earn"] += 1
+            db.session.remove()
+
+    pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    t0 = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    return time.perf_counter() - t0, done
+
+
+def main(threads, per_thread, redeem_every):
+    tmp = tempfile.NamedTemporaryFile(suffix=".sqlite3", delete=False)
+    url = os.environ.get("BENCH_DATABASE_URL", f"sqlite:///{tmp.name}")
+
+    class BenchConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = url
+        SQLALCHEMY_ENGINE_OPTIONS = (
+            {"connect_args": {"timeout": 30}} if url.startswith("sqlite") else {"pool_size": threads}
+        )
+
+    app = create_app(config_override=BenchConfig)
+    for label, fn in [("zámek (FOR UPDATE)", locking), ("kniha pohybů", ledger)]:
+        with app.app_context():
+            db.drop_all()
+            db.create_all()
+            zak = Zakaznik(jmeno="Bench", prijmeni="User", email="bench@example.com", _password="x")
+            db.session.add(zak)
+            db.session.flush()
+            db.session.add(VernostniUcet(body=100, id_zakaznika=zak.id_zakaznika))
+            db.session.commit()
+            zak_id = zak.id_zakaznika
+
+        elapsed, done = run(app, fn, zak_id, threads, per_thread, redeem_every)
+        total = threads * per_thread
+
+        with app.app_context():
+            t0 = time.perf_counter()
+            folded = points.compact()
+            db.session.commit()
+            compact_ms = (time.perf_counter() - t0) * 1000
+            body = db.session.scalar(db.select(VernostniUcet.body))
+            db.drop_all()
+
+        expected = 100 + done["earn"] * EARN - done["redeem"] * REDEEM
+        print(f"{label:<20} {total} operací ({threads} vláken): {elapsed:.2f} s → {total / elapsed:>7.1f} op/s, "
+              f"uplatnění {done['redeem']}, chyb {done['errors']}, body {body} (očekáváno {expected})"
+              + (f", kompakce {folded} pohybů za {compact_ms:.1f} ms" if folded else ""))
+    os.unlink(tmp.name)
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    main(*(args + [8, 25, 5][len(args):]))
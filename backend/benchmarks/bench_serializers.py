@@ -0,0 +1,88 @@
+# benchmarks/bench_serializers.py
+#
+# Serializace seznamů: marshmallow Schema.dump() vs. zkompilovaný serializers.dump()
+# pro menu, rezervace a zákazníky → objektů za sekundu. Objekty se načtou z DB jednou
+# (se všemi vazbami), měří se jen samotná serializace.
+#
+#   python -m benchmarks.bench_serializers [počet_objektů] [opakování]
+
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy.orm import selectinload
+
+from app import create_app
+from app.config import TestingConfig
+from app import serializers
+from app.db import db
+from app.models import Zakaznik, Role, Stul, Rezervace, PolozkaMenu, PolozkaMenuAlergen, Alergen
+from app.schemas import PolozkaMenuSchema, RezervaceSchema, ZakaznikSchema
+
+
+def seed(n):
+    role    = Role(name="user")
+    stoly   = [Stul(cislo=i + 1, kapacita=8) for i in range(n // 10 + 1)]
+    alergen = Alergen(nazev="Lepek")
+    db.session.add_all([role, alergen, *stoly])
+    db.session.flush()
+    for i in range(n):
+        zak = Zakaznik(jmeno=f"Jan{i}", prijmeni=f"Novák{i}", email=f"jan{i}@example.com",
+                       _password="x", roles=[role])
+        jidlo = PolozkaMenu(nazev=f"Jídlo {i}", cena=Decimal("99.90"), kategorie="stálá nabídka", den="",
+                            preparation_time=10, points=5, obrazek_filename=f"jidlo{i}.jpg")
+        db.session.add_all([zak, jidlo])
+        db.session.flush()
+        db.session.add_all([
+            PolozkaMenuAlergen(id_menu_polozka=jidlo.id_menu_polozka, id_alergenu=alergen.id_alergenu),
+            Rezervace(datum_cas=datetime(2030, 1, 1) + timedelta(hours=i), pocet_osob=2,
+                      sleva=Decimal("5.00"), id_zakaznika=zak.id_zakaznika, id_stul=stoly[i // 10].id_stul),
+        ])
+    db.session.commit()
+
+
+def measure(label, fn, objs, repeat):
+    fn(objs)                                   # zahřátí (kompilace, url prefix)
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn(objs)
+    elapsed = time.perf_counter() - t0
+    return len(objs) * repeat / elapsed
+
+
+def main(n, repeat):
+    class BenchConfig(TestingConfig):
+        SERIALIZER_VERIFY = False
+
+    app = create_app(config_override=BenchConfig)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        seed(n)
+        cases = [
+            ("menu", PolozkaMenuSchema, db.select(PolozkaMenu).options(
+                selectinload(PolozkaMenu.alergeny).selectinload(PolozkaMenuAlergen.alergen))),
+            ("rezervace", RezervaceSchema, db.select(Rezervace).options(
+                selectinload(Rezervace.zakaznik), selectinload(Rezervace.notifikace),
+                selectinload(Rezervace.stul).selectinload(Stul.rezervace),
+                selectinload(Rezervace.salonek), selectinload(Rezervace.akce), selectinload(Rezervace.workshop))),
+            ("zakaznik", ZakaznikSchema, db.select(Zakaznik).options(
+                selectinload(Zakaznik.ucet), selectinload(Zakaznik.rezervace), selectinload(Zakaznik.objednavky),
+                selectinload(Zakaznik.hodnoceni), selectinload(Zakaznik.roles))),
+        ]
+        with app.test_request_context("/"):
+            for label, schema_cls, stmt in cases:
+                objs   = db.session.scalars(stmt).all()
+                schema = schema_cls(many=True)
+                assert serializers.dump(schema, objs) == schema.dump(objs)
+                slow = measure(label, schema.dump, objs, repeat)
+                fast = measure(label, lambda o: serializers.dump(schema, o), objs, repeat)
+                print(f"{label:<10} marshmallow {slow:>10.0f} obj/s   zkompilováno {fast:>10.0f} obj/s"
+                      f"   ×{fast / slow:.1f}")
+        db.drop_all()
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    main(*(args + [500, 20][len(args):]))
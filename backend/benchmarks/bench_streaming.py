@@ -0,0 +1,86 @@
+# benchmarks/bench_streaming.py
+#
+# Špička paměti (tracemalloc) a čas do prvního bajtu při stažení celé tabulky zákazníků:
+# původní .all() + jsonify celého seznamu vs. stream (JSON pole / NDJSON, yield_per).
+# U streamu by špička měla zůstat stejná pro libovolný počet řádků.
+#
+#   python -m benchmarks.bench_streaming [počty_řádků…]
+#   python -m benchmarks.bench_streaming 2000 10000 50000
+
+import sys
+import time
+import tracemalloc
+
+from flask import jsonify
+from flask_jwt_extended import create_access_token
+
+from app import create_app
+from app.config import TestingConfig
+from app.db import db
+from app.fieldsets import FieldSet
+from app.models import Zakaznik
+from app.schemas import ZakaznikSchema
+
+
+def seed(n):
+    db.session.execute(db.insert(Zakaznik), [
+        {"jmeno": f"Jan{i}", "prijmeni": f"Novák{i}", "email": f"jan{i}@example.com", "_password": "x"}
+        for i in range(n)
+    ])
+    db.session.commit()
+
+
+def measure(fn):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    first, size = fn()
+    elapsed = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return first - t0 if first else elapsed, elapsed, peak, size
+
+
+def main(counts):
+    class BenchConfig(TestingConfig):
+        SERIALIZER_VERIFY = False
+
+    app = create_app(config_override=BenchConfig)
+    with app.app_context():
+        for n in counts:
+            db.drop_all()
+            db.create_all()
+            seed(n)
+            token  = create_access_token(identity="1", additional_claims={"roles": ["admin"]})
+            client = app.test_client()
+
+            def materialized():
+                with app.test_request_context("/"):
+                    fs   = FieldSet(Zakaznik, ZakaznikSchema, many=True)
+                    rows = db.session.scalars(fs.apply(db.select(Zakaznik))).all()
+                    body = jsonify(fs.dump(rows)).get_data()
+                    db.session.expunge_all()
+                    return time.perf_counter(), len(body)
+
+            def streamed(accept):
+                def run():
+                    resp = client.get("/api/zakaznik?stream=1", buffered=False,
+                                      headers={"Authorization": f"Bearer {token}", "Accept": accept})
+                    first, size = None, 0
+                    for chunk in resp.response:
+                        first = first or time.perf_counter()
+                        size += len(chunk)
+                    resp.close()
+                    return first, size
+                return run
+
+            for label, fn in [("all() + jsonify", materialized),
+                              ("stream JSON", streamed("application/json")),
+                              ("stream NDJSON", streamed("application/x-ndjson"))]:
+                ttfb, total, peak, size = measure(fn)
+                print(f"{n:>7} řádků  {label:<16} špička {peak / 1024 / 1024:>7.1f} MB   "
+                      f"první bajt {ttfb * 1000:>8.1f} ms   celkem {total * 1000:>8.1f} ms   {size / 1024:>8.0f} kB")
+        db.drop_all()
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [2000, 10000])
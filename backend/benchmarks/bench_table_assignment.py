@@ -0,0 +1,102 @@
+# benchmarks/bench_table_assignment.py
+#
+# Simulovaný plný večer: N skupin (převážně dvojice a čtveřice) si v náhodném pořadí
+# rezervuje začátek mezi 17:00 a 21:30 na 90–150 minut, restaurace má 20 stolů
+# (6× 2, 8× 4, 4× 6, 2× 8 míst, čísla stolů podle místa v sále, ne podle velikosti).
+# Stůl se skupině přiděluje výhradně (nesdílí se):
+#   zkoušení  – původní postup obsluhy: stoly podle čísla, první, který se dá zabrat
+#   best-fit  – app/availability.prirad_stul: nejmenší stačící kapacita, v ní nejkratší mezera
+# Měří se latence přidělení (výběr + zabrání + commit) a využití míst:
+#   využití = Σ osob × minut / Σ míst přidělených stolů × minut
+#
+#   python -m benchmarks.bench_table_assignment [skupin] [seed]
+
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+from app import create_app, occupancy
+from app.availability import Zmena, prirad_stul
+from app.config import TestingConfig
+from app.db import db
+from app.models import Zakaznik, Stul, Rezervace
+
+STOLY     = [2] * 6 + [4] * 8 + [6] * 4 + [8] * 2
+VELIKOSTI = {1: 4, 2: 40, 3: 12, 4: 22, 5: 8, 6: 8, 7: 3, 8: 3}
+DELKY     = [90, 105, 120, 150]
+
+
+def vecer(n, seed):
+    rnd     = random.Random(seed)
+    zacatek = (datetime.utcnow() + timedelta(days=1)).replace(hour=17, minute=0, second=0, microsecond=0)
+    return [
+        (zacatek + timedelta(minutes=15 * rnd.randint(0, 18)),
+         rnd.choices(list(VELIKOSTI), weights=list(VELIKOSTI.values()))[0],
+         rnd.choice(DELKY))
+        for _ in range(n)
+    ]
+
+
+def zkouseni(dt, persons, delka):
+    for id_stul, kapacita in db.session.execute(db.select(Stul.id_stul, Stul.kapacita).order_by(Stul.cislo)):
+        if kapacita >= persons and occupancy.reserve("stul", id_stul, dt, persons, delka, vyhradne=True):
+            return id_stul
+    return None
+
+
+def run(app, label, prirad, skupiny, stoly):
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        zak = Zakaznik(jmeno="Bench", prijmeni="User", email="bench@example.com", _password="x")
+        db.session.add(zak)
+        db.session.add_all(Stul(cislo=i + 1, kapacita=k) for i, k in enumerate(stoly))
+        db.session.commit()
+        app.extensions["availability"].invalidate()
+        kapacity = dict(db.session.execute(db.select(Stul.id_stul, Stul.kapacita)).all())
+
+        latence, usazeno, osobominuty, mistominuty = [], [], 0, 0
+        odmitnuto = {}
+        for dt, persons, delka in skupiny:
+            t0    = time.perf_counter()
+            zmena = Zmena()
+            id_stul = prirad(dt, persons, delka)
+            if id_stul is None:
+                db.session.rollback()
+                odmitnuto[persons] = odmitnuto.get(persons, 0) + 1
+            else:
+                rez = Rezervace(datum_cas=dt, pocet_osob=persons, delka_minut=delka,
+                                id_zakaznika=zak.id_zakaznika, id_stul=id_stul, stul_prirazen=True)
+                db.session.add(rez)
+                db.session.commit()
+                zmena.hotovo(rez)
+                usazeno.append(persons)
+                osobominuty += persons * delka
+                mistominuty += kapacity[id_stul] * delka
+            latence.append((time.perf_counter() - t0) * 1000)
+        db.drop_all()
+
+    latence.sort()
+    p95 = latence[int(len(latence) * 0.95) - 1]
+    print(f"{label:<10} usazeno {len(usazeno):>3}/{len(skupiny)} skupin ({sum(usazeno):>3} osob), "
+          f"využití míst {osobominuty / max(mistominuty, 1):>5.1%}, "
+          f"latence p50 {statistics.median(latence):.2f} ms / p95 {p95:.2f} ms, "
+          f"odmítnuto podle velikosti {dict(sorted(odmitnuto.items()))}")
+
+
+def main(n, seed):
+    class BenchConfig(TestingConfig):
+        SERIALIZER_VERIFY = False
+
+    app     = create_app(config_override=BenchConfig)
+    skupiny = vecer(n, seed)
+    stoly   = random.Random(seed).sample(STOLY, len(STOLY))
+    for label, prirad in [("zkoušení", zkouseni), ("best-fit", prirad_stul)]:
+        run(app, label, prirad, skupiny, stoly)
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    main(*(args + [70, 7][len(args):]))
@@ -0,0 +1,60 @@
+# benchmarks/bench_token_revocation.py
+#
+# Porovnání latence autentizovaného requestu (GET /api/auth/me)
+# s kontrolou blacklistu v DB a s paměťovou množinou zneplatněných tokenů.
+#
+#   python -m benchmarks.bench_token_revocation [počet_requestů] [počet_záznamů_v_blacklistu]
+
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from flask_jwt_extended import create_access_token
+
+from app import create_app
+from app.config import TestingConfig
+from app.db import db
+from app.models import Zakaznik, TokenBlacklist
+
+
+def run(backend, requests, blacklist_rows):
+    class BenchConfig(TestingConfig):
+        TOKEN_REVOCATION_BACKEND = backend
+
+    app = create_app(config_override=BenchConfig)
+    with app.app_context():
+        db.create_all()
+        zak = Zakaznik(jmeno="Bench", prijmeni="User", email="bench@example.com")
+        zak.password = "password1"
+        db.session.add(zak)
+        exp = datetime.utcnow() + timedelta(hours=1)
+        db.session.add_all(
+            TokenBlacklist(jti=str(uuid.uuid4()), expires_at=exp) for _ in range(blacklist_rows)
+        )
+        db.session.commit()
+        headers = {"Authorization": f"Bearer {create_access_token(identity=str(zak.id_zakaznika))}"}
+
+        client = app.test_client()
+        client.get("/api/auth/me", headers=headers)     # zahřátí
+        samples = []
+        for _ in range(requests):
+            t0 = time.perf_counter()
+            client.get("/api/auth/me", headers=headers)
+            samples.append(time.perf_counter() - t0)
+        db.drop_all()
+
+    samples.sort()
+    return {
+        "avg_ms": 1000 * sum(samples) / len(samples),
+        "p50_ms": 1000 * samples[len(samples) // 2],
+        "p99_ms": 1000 * samples[int(len(samples) * 0.99) - 1],
+    }
+
+
+if __name__ == "__main__":
+    n    = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    rows = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+    for backend in ("db", "memory"):
+        r = run(backend, n, rows)
+        print(f"{backend:>6}: avg {r['avg_ms']:.3f} ms  p50 {r['p50_ms']:.3f} ms  p99 {r['p99_ms']:.3f} ms")
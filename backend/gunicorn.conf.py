@@ -0,0 +1,32 @@
+# gunicorn.conf.py
+#
+# Produkční spuštění:  gunicorn -c gunicorn.conf.py run:app
+#
+# gevent workery: dlouhá SSE spojení (GET /api/events) čekají v greenletech,
+# ne ve vláknech – jeden worker unese tisíce nečinných odběratelů. gunicorn
+# před načtením aplikace provede gevent monkey-patching (proto ne preload_app),
+# fronty odběratelů jsou pak gevent.queue (app/events.py) a vlákna na pozadí
+# (outbox, dorovnání SSE, čištění blacklistu) běží jako greenlety.
+# DB spojení drží jen request, který se právě ptá; velikost poolu podle
+# DB_POOL_PROFILE / DB_POOL_SIZE (app/db_pool.py), ne podle počtu spojení.
+
+import multiprocessing
+import os
+
+bind               = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+workers            = int(os.environ.get("GUNICORN_WORKERS", multiprocessing.cpu_count()))
+worker_class       = "gevent"
+worker_connections = int(os.environ.get("GUNICORN_WORKER_CONNECTIONS", 1000))
+#   max. současných spojení (včetně SSE) na jeden worker
+timeout            = int(os.environ.get("GUNICORN_TIMEOUT", 30))
+#   gevent worker hlásí životnost nezávisle na délce requestu → SSE timeout nezabije
+keepalive          = 5
+preload_app        = False
+
+
+def post_worker_init(worker):
+    # smyčky na pozadí (app/background.py) hned po startu workeru, ne až s prvním
+    # requestem – outbox tak doručí i události, které zůstaly po pádu workeru
+    from app.background import start_background
+
+    start_background(worker.wsgi)
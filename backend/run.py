@@ -2,6 +2,7 @@ import os
 import click
 from datetime import datetime, date, time, timedelta
 from sqlalchemy import text
+from sqlalchemy.schema import CreateColumn
 
 from app import create_app, db
 from app.models import (
@@ -9,8 +10,10 @@ from app.models import (
     PodnikovaAkce, Workshop, Objednavka, PolozkaObjednavky,
     Platba, Hodnoceni, PolozkaMenu, PolozkaMenuAlergen,
     JidelniPlan, PolozkaJidelnihoPlanu, Alergen, Notifikace,
-    Role
+    Role, Obsazenost, BodovyPohyb, OutboxUdalost
 )
+from app.occupancy import rebuild_occupancy
+from app.inbox import rebuild_unread_counts
 
 os.environ.setdefault("DATABASE_HOST", "localhost")
 
@@ -24,6 +27,8 @@ app.config['UPLOAD_FOLDER'] = os.path.join(app.root_path, 'static', 'images')
 def _vycistit_databazi():
     db.session.query(PolozkaMenuAlergen).delete()
     db.session.query(Notifikace).delete()
+    db.session.query(BodovyPohyb).delete()
+    db.session.query(OutboxUdalost).delete()
     db.session.query(Hodnoceni).delete()
     db.session.query(Platba).delete()
     db.session.query(PolozkaObjednavky).delete()
@@ -31,6 +36,7 @@ def _vycistit_databazi():
     db.session.query(Workshop).delete()
     db.session.query(PodnikovaAkce).delete()
     db.session.query(Rezervace).delete()
+    db.session.query(Obsazenost).delete()
     db.session.query(PolozkaJidelnihoPlanu).delete()
     db.session.query(JidelniPlan).delete()
     db.session.query(Alergen).delete()
@@ -308,11 +314,157 @@ def seed_db():
     )
     db.session.add_all([n1, n2, n3])
 
+    db.session.commit()
+    rebuild_occupancy()
+    rebuild_unread_counts()
     db.session.commit()
     click.echo(
         "✅ Demo data vloženy, včetně obrázků pro workshopy, akce a salonky a opravených notifikací.")
 
 
+@app.cli.command("rebuild-occupancy")
+def rebuild_occupancy_cmd():
+    """Přepočítá tabulku obsazenost z existujících rezervací."""
+    rebuild_occupancy()
+    click.echo("✅ Obsazenost přepočítána.")
+
+
+@app.cli.command("rebuild-unread-counts")
+def rebuild_unread_counts_cmd():
+    """Přepočítá počty nepřečtených notifikací zákazníků z tabulky notifikace."""
+    rebuild_unread_counts()
+    db.session.commit()
+    click.echo("✅ Počty nepřečtených notifikací přepočítány.")
+
+
+def _vytvorit_indexy():
+    """Dovytvoří chybějící indexy z modelů; vrací jejich názvy."""
+    created = []
+    with db.engine.begin() as conn:
+        insp     = db.inspect(conn)
+        existing = {t: {i["name"]: bool(i["unique"]) for i in insp.get_indexes(t)} for t in insp.get_table_names()}
+        for table in db.metadata.sorted_tables:
+            if table.name not in existing:
+                continue
+            for index in sorted(table.indexes, key=lambda i: i.name):
+                if index.name not in existing[table.name]:
+                    index.create(conn)
+                    created.append(index.name)
+                elif index.unique and not existing[table.name][index.name]:
+                    cols = list(index.columns)
+                    if conn.execute(db.select(*cols).group_by(*cols).having(db.func.count() > 1).limit(1)).first():
+                        raise click.ClickException(f"{index.name}: v tabulce {table.name} jsou duplicity, nejdřív je slučte.")
+                    index.drop(conn)
+                    index.create(conn)
+                    created.append(f"{index.name} (unikátní)")
+    return created
+
+
+def _doplnit_sloupce():
+    """
+    ALTER TABLE … ADD COLUMN pro sloupce z modelů, které v existujících tabulkách chybí.
+    NOT NULL sloupec musí mít server_default (jinak by ho stávající řádky nesplnily).
+    """
+    added = []
+    with db.engine.begin() as conn:
+        insp     = db.inspect(conn)
+        tables   = set(insp.get_table_names())
+        quote    = conn.dialect.identifier_preparer
+        for table in db.metadata.sorted_tables:
+            if table.name not in tables:
+                continue
+            existing = {c["name"] for c in insp.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                if not column.nullable and column.server_default is None:
+                    raise click.ClickException(f"{table.name}.{column.name}: NOT NULL bez server_default, doplňte ho ručně.")
+                ddl = CreateColumn(column).compile(dialect=conn.dialect)
+                conn.execute(text(f"ALTER TABLE {quote.format_table(table)} ADD COLUMN {ddl}"))
+                added.append(f"{table.name}.{column.name}")
+    return added
+
+
+@app.cli.command("create-indexes")
+def create_indexes_cmd():
+    """
+    Dovytvoří v existující DB indexy deklarované v modelech (create_all je přidá jen do nových tabulek).
+    Index, který v modelu mezitím zpřísnil na unikátní (vernostni_ucet.id_zakaznika), se přestaví;
+    duplicitní řádky je pak nutné nejdřív sloučit.
+    """
+    created = _vytvorit_indexy()
+    click.echo(f"✅ Vytvořeno indexů: {len(created)}" + (f" ({', '.join(created)})" if created else "."))
+
+
+@app.cli.command("upgrade-db")
+def upgrade_db_cmd():
+    """
+    Převede existující DB na aktuální modely (repo nemá Alembic migrace):
+    nové tabulky, chybějící sloupce (ALTER TABLE … ADD COLUMN), indexy
+    a přepočet odvozených dat, která nové sloupce potřebují. Opakované spuštění nic nezmění.
+    """
+    pred  = set(db.inspect(db.engine).get_table_names())
+    db.create_all()
+    nove  = sorted(t.name for t in db.metadata.sorted_tables if t.name not in pred)
+    added = _doplnit_sloupce()
+    indexes = _vytvorit_indexy()
+
+    if {"zakaznik.neprectene_notifikace", "notifikace.precteno"} & set(added):
+        rebuild_unread_counts()
+        db.session.commit()
+    if "obsazenost" in nove or {"rezervace.delka_minut", "rezervace.stul_prirazen", "obsazenost.vyhradne"} & set(added):
+        rebuild_occupancy()
+
+    click.echo(f"✅ Nové tabulky: {', '.join(nove) or '–'}; sloupce: {', '.join(added) or '–'}; "
+               f"indexy: {len(indexes)}.")
+
+
+@app.cli.command("compact-points")
+def compact_points_cmd():
+    """Přičte nezapočtené bodové pohyby k věrnostním účtům."""
+    from app.points import compact
+
+    batch, total = app.config.get("POINTS_COMPACT_BATCH", 5000), 0
+    while True:
+        done = compact(limit=batch)
+        db.session.commit()
+        total += done
+        if done < batch:
+            break
+    click.echo(f"✅ Započteno bodových pohybů: {total}.")
+
+
+@app.cli.command("process-images")
+@click.option("--force", is_flag=True, help="Přegenerovat i obrázky, které už varianty mají.")
+def process_images_cmd(force):
+    """Vyrobí varianty (náhled, medium, WebP) pro obrázky v UPLOAD_FOLDER."""
+    from app.images import get_image_pipeline, manifest_path, ImageManifest
+
+    pipeline = get_image_pipeline()
+    folder   = app.config['UPLOAD_FOLDER']
+    variants = {f"-{name}." for name in pipeline.variants}
+    count    = 0
+    for filename in sorted(os.listdir(folder)):
+        if not ImageManifest.is_image(filename) or any(v in filename for v in variants):
+            continue
+        if not force and os.path.exists(manifest_path(folder, filename)):
+            continue
+        pipeline.process(filename)
+        count += 1
+    click.echo(f"✅ Zpracováno obrázků: {count}.")
+
+
+@app.cli.command("build-image-manifest")
+def build_image_manifest_cmd():
+    """Zapíše manifest.json s otisky obrázků (start aplikace pak soubory nehashuje)."""
+    from app.images import get_image_pipeline
+
+    manifest = get_image_pipeline().manifest
+    computed = manifest.load()
+    manifest.save()
+    click.echo(f"✅ Manifest obrázků: {len(manifest.entries)} souborů, přepočítáno {computed}.")
+
+
 @app.shell_context_processor
 def make_shell_context():
     return {
@@ -334,7 +486,8 @@ def make_shell_context():
         "PolozkaJidelnihoPlanu": PolozkaJidelnihoPlanu,
         "Alergen": Alergen,
         "Notifikace": Notifikace,
-        "Role": Role
+        "Role": Role,
+        "Obsazenost": Obsazenost
     }
 
 
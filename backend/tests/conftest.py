@@ -23,3 +23,32 @@ def app():
 @pytest.fixture
 def client(app):
     return app.test_client()
+
+
+@pytest.fixture
+def count_queries():
+    """
+    Vrací context manager, který počítá SQL příkazy odeslané do DB.
+    Použití:
+        with count_queries() as queries:
+            ...
+        assert len(queries) == 1
+    """
+    from contextlib import contextmanager
+    from sqlalchemy import event
+
+    @contextmanager
+    def _counter():
+        queries = []
+
+        def _before(conn, cursor, statement, parameters, context, executemany):
+            queries.append(statement)
+
+        engine = _db.engine
+        event.listen(engine, "before_cursor_execute", _before)
+        try:
+            yield queries
+        finally:
+            event.remove(engine, "before_cursor_execute", _before)
+
+    return _counter
@@ -0,0 +1,216 @@
+# tests/test_auth.py
+
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import create_app
+from app.db import db
+from app.models import Zakaznik, TokenBlacklist, Role
+from werkzeug.security import generate_password_hash
+from flask_jwt_extended import create_access_token
+
+from app.revocation import MemoryRevocationStore, purge_token_blacklist
+from app.hashing import PasswordHasher, HasherUnavailable, normalized_method
+
+
+@pytest.fixture(scope='module')
+def test_app():
+    app = create_app(config_name="testing")
+    ctx = app.app_context()
+    ctx.push()
+    yield app
+    ctx.pop()
+
+
+@pytest.fixture(scope='function')
+def seed_db(test_app):
+    db.session.remove()
+    db.drop_all()
+    db.create_all()
+
+    zak = Zakaznik(jmeno='Test', prijmeni='User', email='user@example.com')
+    zak.password = 'password1'
+    db.session.add(zak)
+    db.session.commit()
+
+    yield zak
+
+    db.session.remove()
+
+
+def _login(client):
+    resp = client.post('/api/auth/login', json={"email": "user@example.com", "password": "password1"})
+    assert resp.status_code == 200
+    return resp.get_json()["access_token"]
+
+
+def test_logout_revokes_token(test_app, seed_db):
+    client  = test_app.test_client()
+    headers = {"Authorization": f"Bearer {_login(client)}"}
+    assert client.get('/api/auth/me', headers=headers).status_code == 200
+
+    assert client.post('/api/auth/logout', headers=headers).status_code == 200
+    assert client.get('/api/auth/me', headers=headers).status_code == 401
+
+    row = db.session.query(TokenBlacklist).one()
+    assert row.expires_at is not None and row.expires_at > datetime.utcnow()
+
+
+def test_other_worker_picks_up_revocation(test_app, seed_db):
+    # druhý "worker" má vlastní paměťovou množinu a dorovná se z DB
+    other = MemoryRevocationStore(test_app)
+    other._interval = 0
+    assert not other.is_revoked("abc")
+
+    db.session.add(TokenBlacklist(jti="abc", expires_at=datetime.utcnow() + timedelta(minutes=5)))
+    db.session.commit()
+    assert other.is_revoked("abc")
+
+
+def test_revocation_sync_sees_ids_committed_out_of_order(test_app, seed_db):
+    # id 2 se commitne dřív než id 1 (souběžné transakce v PostgreSQL)
+    other = MemoryRevocationStore(test_app)
+    other._interval = 0
+    exp = datetime.utcnow() + timedelta(minutes=5)
+
+    db.session.add(TokenBlacklist(id=2, jti="later", expires_at=exp))
+    db.session.commit()
+    assert other.is_revoked("later")
+    assert other._last_id == 2
+
+    db.session.add(TokenBlacklist(id=1, jti="earlier", expires_at=exp))
+    db.session.commit()
+    assert other.is_revoked("earlier")
+
+
+def test_purge_removes_expired_rows(test_app, seed_db):
+    now = datetime.utcnow()
+    db.session.add_all([
+        TokenBlacklist(jti="old", expires_at=now - timedelta(minutes=1)),
+        TokenBlacklist(jti="new", expires_at=now + timedelta(minutes=5)),
+    ])
+    db.session.commit()
+
+    assert purge_token_blacklist(test_app) == 1
+    assert [r.jti for r in db.session.query(TokenBlacklist).all()] == ["new"]
+
+
+def test_login_rehashes_outdated_password_hash(test_app, seed_db):
+    seed_db._password = generate_password_hash('password1', 'pbkdf2:sha256:1000')
+    db.session.commit()
+
+    _login(test_app.test_client())
+    db.session.refresh(seed_db)
+    assert seed_db._password.startswith(normalized_method(test_app.config["PASSWORD_HASH_METHOD"]) + "$")
+    # nový hash funguje a podruhé se už nepřepisuje
+    stary = seed_db._password
+    _login(test_app.test_client())
+    db.session.refresh(seed_db)
+    assert seed_db._password == stary
+
+
+def test_login_rejected_when_hasher_saturated(test_app, seed_db, monkeypatch):
+    monkeypatch.setattr(test_app.extensions["password_hasher"], "max_pending", 0)
+    resp = test_app.test_client().post('/api/auth/login',
+                                       json={"email": "user@example.com", "password": "password1"})
+    assert resp.status_code == 429
+    assert resp.headers["Retry-After"] == "1"
+
+
+def test_process_pool_verifies_and_times_out():
+    stored = generate_password_hash('password1', 'pbkdf2:sha256:1000')
+    hasher = PasswordHasher(pool_size=1, max_pending=2, timeout=30)
+    try:
+        assert hasher.verify(stored, 'password1', 'pbkdf2:sha256:1000') == (True, None)
+        assert hasher.verify(stored, 'spatne', 'pbkdf2:sha256:1000') == (False, None)
+        hasher.timeout = 0
+        with pytest.raises(HasherUnavailable):
+            hasher.verify(generate_password_hash('password1'), 'password1')
+    finally:
+        hasher.shutdown()
+
+
+def _login_tokens(client):
+    resp = client.post('/api/auth/login', json={"email": "user@example.com", "password": "password1"})
+    assert resp.status_code == 200
+    return resp.get_json()
+
+
+def _warm_revocation(app):
+    # blacklist se dorovnává z DB při prvním použití a pak jednou za N s → do počtu nepatří
+    app.extensions["token_revocation"].sync()
+    app.extensions["token_revocation"]._last_sync = time.monotonic()
+
+
+def test_login_refresh_me_use_at_most_one_query(test_app, seed_db, count_queries):
+    seed_db.roles.append(Role(name='staff'))
+    db.session.commit()
+    client = test_app.test_client()
+    _warm_revocation(test_app)
+
+    with count_queries() as queries:
+        tokens = _login_tokens(client)
+    assert len(queries) == 1
+
+    with count_queries() as queries:
+        resp = client.post('/api/auth/refresh', headers={"Authorization": f"Bearer {tokens['refresh_token']}"})
+    assert resp.status_code == 200 and len(queries) == 0
+
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    with count_queries() as queries:
+        resp = client.get('/api/auth/me', headers=headers)
+    assert resp.get_json()["roles"] == ["staff"] and len(queries) <= 1
+
+    # bez cache: refresh i /me stále jedním dotazem
+    test_app.extensions["role_cache"].invalidate_user(seed_db.id_zakaznika)
+    with count_queries() as queries:
+        assert client.get('/api/auth/me', headers=headers).status_code == 200
+    assert len(queries) == 1
+    test_app.extensions["role_cache"].invalidate_user(seed_db.id_zakaznika)
+    with count_queries() as queries:
+        assert client.post('/api/auth/refresh',
+                           headers={"Authorization": f"Bearer {tokens['refresh_token']}"}).status_code == 200
+    assert len(queries) == 1
+
+
+def test_role_change_invalidates_cached_roles(test_app, seed_db):
+    client  = test_app.test_client()
+    headers = {"Authorization": f"Bearer {_login(client)}"}
+    assert client.get('/api/auth/me', headers=headers).get_json()["roles"] == []
+
+    seed_db.roles.append(Role(name='admin'))
+    db.session.commit()
+    assert client.get('/api/auth/me', headers=headers).get_json()["roles"] == ["admin"]
+
+    seed_db.roles.clear()
+    db.session.commit()
+    assert client.get('/api/auth/me', headers=headers).get_json()["roles"] == []
+
+
+def test_role_table_reloads_on_missing_name(test_app, seed_db):
+    # cache načtená nad prázdnou tabulkou role; roli pak založí jiný proces (přímé SQL)
+    cache = test_app.extensions["role_cache"]
+    cache.invalidate_roles()
+    assert cache.role_id("user") is None
+    db.session.execute(Role.__table__.insert().values(name="user"))
+    db.session.commit()
+    assert cache.role_id("user") is not None
+
+
+def test_must_be_self_or_admin_uses_current_roles(test_app, seed_db):
+    other = Zakaznik(jmeno='Jiny', prijmeni='User', email='other@example.com')
+    other.password = 'password1'
+    db.session.add(other)
+    db.session.commit()
+    # token ještě nese roli admin, ale v DB ji uživatel nemá
+    token   = create_access_token(identity=str(seed_db.id_zakaznika), additional_claims={"roles": ["admin"]})
+    headers = {"Authorization": f"Bearer {token}"}
+    url     = f'/api/zakaznik/{other.id_zakaznika}'
+    client  = test_app.test_client()
+    assert client.put(url, json={"telefon": "1"}, headers=headers).status_code == 403
+
+    seed_db.roles.append(Role(name='admin'))
+    db.session.commit()
+    assert client.put(url, json={"telefon": "1"}, headers=headers).status_code == 200
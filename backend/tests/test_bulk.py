@@ -0,0 +1,133 @@
+# tests/test_bulk.py
+
+from decimal import Decimal
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+from app import create_app
+from app.db import db
+from app.models import Stul, Alergen, PolozkaMenu, PolozkaMenuAlergen
+
+
+@pytest.fixture(scope='module')
+def test_client():
+    app = create_app(config_name="testing")
+    app.config["BULK_MAX_ITEMS"] = 50
+    client = app.test_client()
+    ctx = app.app_context()
+    ctx.push()
+    yield client
+    ctx.pop()
+
+
+@pytest.fixture(scope='function')
+def seed_db(test_client):
+    db.session.remove()
+    db.drop_all()
+    db.create_all()
+    db.session.add_all([Stul(cislo=1, kapacita=4), Stul(cislo=2, kapacita=6)])
+    db.session.commit()
+    token = create_access_token(identity="1", additional_claims={"roles": ["admin"]})
+    yield {"Authorization": f"Bearer {token}"}
+    db.session.remove()
+
+
+def stoly():
+    db.session.expire_all()
+    return {s.cislo: s.kapacita for s in db.session.scalars(db.select(Stul))}
+
+
+def test_bulk_create_returns_ids_in_order(test_client, seed_db):
+    items = [{"cislo": 10 + i, "kapacita": 2} for i in range(5)]
+    resp  = test_client.post("/api/stul/bulk", json=items, headers=seed_db)
+    assert resp.status_code == 201
+    body  = resp.get_json()
+    assert body["ok"] == 5 and body["failed"] == 0
+    ids   = [r["id"] for r in body["results"]]
+    assert [db.session.get(Stul, i).cislo for i in ids] == [10, 11, 12, 13, 14]
+
+
+def test_bulk_create_atomic_validation_error_saves_nothing(test_client, seed_db):
+    items = [{"cislo": 10, "kapacita": 2}, {"cislo": "x"}, {"cislo": 12, "kapacita": 2}]
+    resp  = test_client.post("/api/stul/bulk", json=items, headers=seed_db)
+    assert resp.status_code == 422
+    results = resp.get_json()["results"]
+    assert [r["status"] for r in results] == [424, 422, 424]
+    assert set(results[1]["errors"]) == {"cislo", "kapacita"}
+    assert stoly() == {1: 4, 2: 6}
+
+
+def test_bulk_create_conflict_is_reported_per_item(test_client, seed_db):
+    items = [{"cislo": 10, "kapacita": 2}, {"cislo": 1, "kapacita": 2}]     # číslo 1 už existuje
+    resp  = test_client.post("/api/stul/bulk", json=items, headers=seed_db)
+    assert resp.status_code == 409
+    assert [r["status"] for r in resp.get_json()["results"]] == [424, 409]
+    assert stoly() == {1: 4, 2: 6}
+
+    resp = test_client.post("/api/stul/bulk?mode=best_effort", json=items, headers=seed_db)
+    assert resp.status_code == 207
+    assert [r["status"] for r in resp.get_json()["results"]] == [201, 409]
+    assert stoly() == {1: 4, 2: 6, 10: 2}
+
+
+def test_bulk_create_conflict_inside_batch(test_client, seed_db):
+    items = [{"cislo": 10, "kapacita": 2}, {"cislo": 10, "kapacita": 3}]
+    resp  = test_client.post("/api/stul/bulk", json=items, headers=seed_db)
+    assert resp.status_code == 409
+    assert stoly() == {1: 4, 2: 6}
+
+
+def test_bulk_update_and_missing_ids(test_client, seed_db):
+    ids   = {s.cislo: s.id_stul for s in db.session.scalars(db.select(Stul))}
+    items = [{"id_stul": ids[1], "kapacita": 8}, {"id_stul": 999, "kapacita": 2}, {"kapacita": 1}]
+    resp  = test_client.put("/api/stul/bulk?mode=best_effort", json=items, headers=seed_db)
+    assert resp.status_code == 207
+    assert [r["status"] for r in resp.get_json()["results"]] == [200, 404, 422]
+    assert stoly() == {1: 8, 2: 6}
+
+    resp = test_client.put("/api/stul/bulk", json=[{"id_stul": ids[2], "kapacita": 10}], headers=seed_db)
+    assert resp.status_code == 200
+    assert stoly() == {1: 8, 2: 10}
+
+
+def test_bulk_delete(test_client, seed_db):
+    ids  = sorted(db.session.scalars(db.select(Stul.id_stul)))
+    resp = test_client.delete("/api/stul/bulk", json=[*ids, 999], headers=seed_db)
+    assert resp.status_code == 404
+    assert stoly() == {1: 4, 2: 6}
+
+    resp = test_client.delete("/api/stul/bulk", json=ids, headers=seed_db)
+    assert resp.status_code == 200 and resp.get_json()["ok"] == 2
+    assert stoly() == {}
+
+
+def test_bulk_limits_and_roles(test_client, seed_db):
+    assert test_client.post("/api/stul/bulk", json={"cislo": 1}, headers=seed_db).status_code == 400
+    too_many = [{"cislo": i, "kapacita": 2} for i in range(51)]
+    assert test_client.post("/api/stul/bulk", json=too_many, headers=seed_db).status_code == 400
+    assert test_client.post("/api/stul/bulk?mode=x", json=[{}], headers=seed_db).status_code == 400
+    user = create_access_token(identity="2", additional_claims={"roles": ["user"]})
+    resp = test_client.post("/api/stul/bulk", json=[{"cislo": 5, "kapacita": 2}],
+                            headers={"Authorization": f"Bearer {user}"})
+    assert resp.status_code == 403
+
+
+def test_bulk_menu_allergen_links(test_client, seed_db):
+    polozka = PolozkaMenu(nazev="Pizza", cena=Decimal("199.00"), kategorie="stálá nabídka", den="Pondělí",
+                          preparation_time=10, points=5)
+    alergeny = [Alergen(nazev="Lepek"), Alergen(nazev="Mléko")]
+    db.session.add_all([polozka, *alergeny])
+    db.session.commit()
+    links = [{"id_menu_polozka": polozka.id_menu_polozka, "id_alergenu": a.id_alergenu} for a in alergeny]
+
+    resp = test_client.post("/api/menu-alergeny/bulk", json=links, headers=seed_db)
+    assert resp.status_code == 201
+    assert [r["id"] for r in resp.get_json()["results"]] == [list(link.values()) for link in links]
+    assert db.session.query(PolozkaMenuAlergen).count() == 2
+    assert test_client.put("/api/menu-alergeny/bulk", json=links, headers=seed_db).status_code == 405
+
+    resp = test_client.delete("/api/menu-alergeny/bulk", json=links[:1], headers=seed_db)
+    assert resp.status_code == 200
+    db.session.expire_all()
+    assert db.session.query(PolozkaMenuAlergen).count() == 1
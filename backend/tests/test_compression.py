@@ -0,0 +1,84 @@
+# tests/test_compression.py
+
+import gzip
+import json
+from decimal import Decimal
+
+import pytest
+from flask import Response
+from flask_jwt_extended import create_access_token
+
+from app import create_app
+from app import compression
+from app.compression import Compressor
+from app.db import db
+from app.models import Salonek
+
+
+@pytest.fixture(scope='module')
+def test_client():
+    app = create_app(config_name="testing")
+    client = app.test_client()
+    ctx = app.app_context()
+    ctx.push()
+    yield client
+    ctx.pop()
+
+
+@pytest.fixture(scope='function')
+def seed_db(test_client):
+    db.session.remove()
+    db.drop_all()
+    db.create_all()
+    db.session.add_all([
+        Salonek(nazev=f"Salonek {i}", popis="Velký sál s výhledem do zahrady", cena=Decimal("1500.00"),
+                kapacita=30)
+        for i in range(40)
+    ])
+    db.session.commit()
+    token = create_access_token(identity="1", additional_claims={"roles": ["admin"]})
+    yield {"Authorization": f"Bearer {token}"}
+    db.session.remove()
+
+
+def test_large_json_is_gzipped_and_cached(test_client, seed_db):
+    compressor = test_client.application.extensions["compressor"]
+    plain = test_client.get("/api/salonek", headers=seed_db)
+    assert "Content-Encoding" not in plain.headers
+
+    headers = {**seed_db, "Accept-Encoding": "gzip, deflate"}
+    resp = test_client.get("/api/salonek", headers=headers)
+    assert resp.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in resp.headers["Vary"]
+    assert len(resp.data) < len(plain.data) / 3
+    assert json.loads(gzip.decompress(resp.data)) == plain.get_json()
+
+    hits = compressor.stats["cache_hits"]
+    again = test_client.get("/api/salonek", headers=headers)
+    assert again.data == resp.data
+    assert compressor.stats["cache_hits"] == hits + 1
+
+
+def test_small_and_non_text_responses_stay_plain(test_client, seed_db):
+    resp = test_client.get("/api/salonek/1", headers={**seed_db, "Accept-Encoding": "gzip"})
+    assert resp.status_code == 200 and len(resp.data) < 1024
+    assert "Content-Encoding" not in resp.headers
+
+    compressor = Compressor(min_size=10)
+    with test_client.application.test_request_context(headers={"Accept-Encoding": "gzip"}):
+        png = compressor.process(Response(b"\x89PNG" + b"\x00" * 5000, mimetype="image/png"))
+        assert "Content-Encoding" not in png.headers
+        text = Response("a" * 5000, mimetype="text/plain")
+        text.set_etag("abc")
+        text = compressor.process(text)
+        assert text.headers["Content-Encoding"] == "gzip"
+        assert text.get_etag() == ("abc", True)      # silný ETag se změní na slabý
+
+
+def test_cpu_budget_skips_compression(test_client, monkeypatch):
+    monkeypatch.setattr(compression.time, "monotonic", lambda: 1000.0)   # obě volání ve stejném okně
+    compressor = Compressor(cpu_budget=1e-9, cache_bytes=0)
+    body = json.dumps([{"i": i, "text": "opakovaný text"} for i in range(2000)]).encode()
+    assert compressor.compress(body, "gzip") is not None
+    assert compressor.compress(body, "gzip") is None
+    assert compressor.stats["over_budget"] == 1
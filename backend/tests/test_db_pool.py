@@ -0,0 +1,69 @@
+# tests/test_db_pool.py
+
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+
+from app import create_app
+from app.db import db
+from app.db_pool import resolve_profile, engine_options, PoolStats, POOL_PROFILES
+
+
+@pytest.fixture(scope='module')
+def test_client():
+    app = create_app(config_name="testing")
+    client = app.test_client()
+    ctx = app.app_context()
+    ctx.push()
+    db.drop_all()
+    db.create_all()
+    yield client
+    ctx.pop()
+
+
+def test_profile_options_for_postgres(monkeypatch):
+    monkeypatch.delenv("DB_POOL_PROFILE", raising=False)
+    monkeypatch.setenv("DB_POOL_SIZE", "3")
+    name, params = resolve_profile({"DB_POOL_PROFILE": "web"})
+    assert name == "web" and params["pool_size"] == 3
+
+    options = engine_options("postgresql+psycopg://u:p@db/app", params)
+    assert options["pool_size"] == 3
+    assert options["max_overflow"] == POOL_PROFILES["web"]["max_overflow"]
+    assert options["connect_args"] == {"options": "-c statement_timeout=5000", "prepare_threshold": 5}
+    # psycopg2 prepare_threshold nezná, SQLite nemá velikost poolu
+    assert "prepare_threshold" not in engine_options("postgresql://u:p@db/app", params)["connect_args"]
+    assert engine_options("sqlite:///x.db", params) == {"pool_pre_ping": True}
+
+
+def test_env_selects_profile_and_rejects_unknown(monkeypatch):
+    monkeypatch.setenv("DB_POOL_PROFILE", "pgbouncer")
+    assert resolve_profile({"DB_POOL_PROFILE": "web"})[1]["prepare_threshold"] is None
+    monkeypatch.setenv("DB_POOL_PROFILE", "obri")
+    with pytest.raises(ValueError):
+        resolve_profile({})
+
+
+def test_stats_count_overflow_and_timeouts(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", pool_size=1, max_overflow=1, pool_timeout=0.05)
+    stats  = PoolStats(engine).attach()
+    c1, c2 = engine.connect(), engine.connect()
+    with pytest.raises(PoolTimeout):
+        engine.connect()
+    snap = stats.snapshot()
+    assert snap["checked_out"] == 2 and snap["max_checked_out"] == 2
+    assert snap["overflow_events"] == 1 and snap["timeouts"] == 1
+    assert snap["wait_ms_max"] >= 50
+    c1.close(), c2.close()
+    engine.dispose()
+
+
+def test_internal_pool_endpoint(test_client):
+    admin = {"Authorization": f"Bearer {create_access_token(identity='1', additional_claims={'roles': ['admin']})}"}
+    user  = {"Authorization": f"Bearer {create_access_token(identity='2', additional_claims={'roles': ['user']})}"}
+
+    assert test_client.get('/api/_internal/pool', headers=user).status_code == 403
+    data = test_client.get('/api/_internal/pool', headers=admin).get_json()
+    assert data["profile"] is None
+    assert data["engines"]["primary"]["checkouts"] >= 1
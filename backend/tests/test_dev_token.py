@@ -0,0 +1,89 @@
+# tests/test_dev_token.py
+
+import time
+
+import pytest
+
+from app import create_app
+from app.config import DevelopmentConfig
+from app.db import db
+from app.models import Zakaznik, Role
+
+
+class DevSqliteConfig(DevelopmentConfig):
+    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    SQLALCHEMY_ECHO = False
+    PASSWORD_HASH_POOL_SIZE = 0
+
+
+@pytest.fixture(scope='module')
+def test_app():
+    mp = pytest.MonkeyPatch()
+    mp.setenv("DEV_USER_EMAIL", "dev@example.com")
+    mp.setenv("DEV_USER_PASSWORD", "password1")
+    app = create_app(config_name="development", config_override=DevSqliteConfig)
+    mp.undo()
+    ctx = app.app_context()
+    ctx.push()
+    yield app
+    ctx.pop()
+
+
+@pytest.fixture(scope='function')
+def seed_db(test_app):
+    db.session.remove()
+    db.drop_all()
+    db.create_all()
+
+    dev = Zakaznik(jmeno='Dev', prijmeni='User', email='dev@example.com')
+    dev.password = 'password1'
+    db.session.add_all([dev, Role(name='user'), Role(name='admin')])
+    db.session.commit()
+    test_app.extensions["dev_token"].invalidate()
+
+    yield dev
+
+    db.session.remove()
+
+
+def _me(app):
+    return app.test_client().get('/api/auth/me')
+
+
+def test_token_is_computed_once(test_app, seed_db, count_queries):
+    with count_queries() as queries:
+        for _ in range(3):
+            assert _me(test_app).status_code == 200
+    lookups = [q for q in queries if "zakaznik.email = ?" in q]
+    assert len(lookups) == 1
+
+
+def test_password_change_invalidates_token(test_app, seed_db):
+    assert _me(test_app).status_code == 200
+    seed_db.password = 'jine-heslo'
+    db.session.commit()
+    # heslo z DEV_USER_PASSWORD už nesedí → žádný token se nevloží
+    assert _me(test_app).status_code == 401
+
+
+def test_role_change_reissues_token(test_app, seed_db):
+    assert _me(test_app).get_json()["roles"] == []
+    stary = test_app.extensions["dev_token"].token()
+    seed_db.roles.append(db.session.query(Role).filter_by(name='admin').one())
+    db.session.commit()
+
+    assert test_app.extensions["dev_token"].token() != stary
+    assert _me(test_app).get_json()["roles"] == ["admin"]
+
+
+def test_expiring_token_is_refreshed_in_background(test_app, seed_db, monkeypatch):
+    cache = test_app.extensions["dev_token"]
+    stary = cache.token()
+    monkeypatch.setattr(cache, "margin", 10 ** 6)
+    # request dostane ještě stávající token, nový se spočítá na pozadí
+    assert cache.token() == stary
+    for _ in range(100):
+        if cache._token[0] != stary:
+            break
+        time.sleep(0.05)
+    assert cache._token[0] != stary
@@ -0,0 +1,132 @@
+# tests/test_events.py
+
+from datetime import datetime
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+from app import create_app
+from app.db import db
+from app.events import EventHub, publish_notifikace
+from app.models import Zakaznik, Notifikace
+
+
+@pytest.fixture(scope='module')
+def test_client():
+    app = create_app(config_name="testing")
+    app.config["SSE_HEARTBEAT_SECONDS"] = 0.1
+    client = app.test_client()
+    ctx = app.app_context()
+    ctx.push()
+    yield client
+    ctx.pop()
+
+
+@pytest.fixture(scope='function')
+def seed_db(test_client):
+    db.session.remove()
+    db.drop_all()
+    db.create_all()
+
+    zak = Zakaznik(jmeno='Test', prijmeni='User', email='user@example.com')
+    zak.password = 'password1'
+    db.session.add(zak)
+    db.session.commit()
+
+    yield zak
+
+    db.session.remove()
+
+
+def _notif(zak, text):
+    n = Notifikace(typ="TEST", datum_cas=datetime.utcnow(), text=text, id_zakaznika=zak.id_zakaznika)
+    db.session.add(n)
+    db.session.commit()
+    return n
+
+
+def _token(zak):
+    return create_access_token(identity=str(zak.id_zakaznika))
+
+
+def _next_event(stream):
+    for chunk in stream:
+        chunk = chunk.decode() if isinstance(chunk, bytes) else chunk
+        if chunk.startswith("id:"):
+            return chunk
+
+
+def test_resume_and_live_event(test_client, seed_db):
+    first  = _notif(seed_db, "první")
+    second = _notif(seed_db, "druhá")
+
+    resp = test_client.get('/api/events', query_string={"token": _token(seed_db)},
+                           headers={"Last-Event-ID": str(first.id_notifikace)}, buffered=False)
+    assert resp.status_code == 200
+    assert resp.mimetype == "text/event-stream"
+    stream = iter(resp.response)
+
+    chunk = _next_event(stream)
+    assert chunk.startswith(f"id: {second.id_notifikace}\nevent: notifikace\n")
+    assert "druhá" in chunk
+
+    third = _notif(seed_db, "třetí")
+    publish_notifikace(third)
+    chunk = _next_event(stream)
+    assert chunk.startswith(f"id: {third.id_notifikace}\n") and "třetí" in chunk
+    resp.close()
+
+
+def test_connection_limit(test_client, seed_db):
+    headers = {"Authorization": f"Bearer {_token(seed_db)}"}
+    limit   = test_client.application.config["SSE_MAX_CONNECTIONS_PER_USER"]
+    open_   = [test_client.get('/api/events', headers=headers, buffered=False) for _ in range(limit)]
+    assert all(r.status_code == 200 for r in open_)
+    assert test_client.get('/api/events', headers=headers, buffered=False).status_code == 429
+
+    for r in open_:
+        r.close()
+    resp = test_client.get('/api/events', headers=headers, buffered=False)
+    assert resp.status_code == 200
+    resp.close()
+
+
+def test_shared_catch_up_for_idle_subscribers(test_client, seed_db, count_queries):
+    # notifikace z jiného workeru (bez publish) dorovná jeden průchod za celý worker
+    jiny = Zakaznik(jmeno='Jiný', prijmeni='User', email='jiny@example.com', _password='x')
+    db.session.add(jiny)
+    db.session.commit()
+    hub  = EventHub()
+    subs = [hub.subscribe(seed_db.id_zakaznika) for _ in range(3)] + [hub.subscribe(jiny.id_zakaznika)]
+
+    n = _notif(seed_db, "z jiného workeru")
+    with count_queries() as queries:
+        assert hub.catch_up() == 1
+    assert len(queries) == 2
+    assert [s.queue.get_nowait()[0] for s in subs[:3]] == [n.id_notifikace] * 3
+    assert subs[3].queue.empty()
+    assert hub.catch_up() == 0
+
+
+def test_catch_up_delivers_ids_committed_out_of_order(test_client, seed_db):
+    # id N+1 se commitne dřív než id N (souběžné transakce v jiném workeru)
+    hub = EventHub()
+    sub = hub.subscribe(seed_db.id_zakaznika)
+    base = hub._last_id
+
+    db.session.add(Notifikace(id_notifikace=base + 2, typ="TEST", datum_cas=datetime.utcnow(),
+                              text="později", id_zakaznika=seed_db.id_zakaznika))
+    db.session.commit()
+    assert hub.catch_up() == 1
+
+    db.session.add(Notifikace(id_notifikace=base + 1, typ="TEST", datum_cas=datetime.utcnow(),
+                              text="dříve", id_zakaznika=seed_db.id_zakaznika))
+    db.session.commit()
+    assert hub.catch_up() == 1
+    assert hub.catch_up() == 0
+
+    delivered = [sub.queue.get_nowait()[0] for _ in range(2)]
+    assert delivered == [base + 2, base + 1]
+    # odběratel deduplikuje podle množiny, nižší id po vyšším tedy nezahodí
+    assert [sub.first_seen(i) for i in delivered] == [True, True]
+    assert not sub.first_seen(base + 1)
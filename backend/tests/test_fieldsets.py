@@ -0,0 +1,100 @@
+# tests/test_fieldsets.py
+
+from datetime import datetime, timedelta
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+from app import create_app
+from app.db import db
+from app.models import Zakaznik, Role, Stul, Rezervace
+
+
+@pytest.fixture(scope='module')
+def test_client():
+    app = create_app(config_name="testing")
+    client = app.test_client()
+    ctx = app.app_context()
+    ctx.push()
+    yield client
+    ctx.pop()
+
+
+@pytest.fixture(scope='function')
+def seed_db(test_client):
+    db.session.remove()
+    db.drop_all()
+    db.create_all()
+
+    role = Role(name='user')
+    stul = Stul(cislo=1, kapacita=4)
+    db.session.add_all([role, stul])
+    admin = Zakaznik(jmeno='Admin', prijmeni='Test', email='admin@example.com')
+    admin.password = 'password1'
+    db.session.add(admin)
+    db.session.flush()
+    for i in range(5):
+        zak = Zakaznik(jmeno=f'Jan{i}', prijmeni=f'Novak{i}', email=f'jan{i}@example.com')
+        zak.password = 'password1'
+        zak.roles.append(role)
+        db.session.add(zak)
+        db.session.flush()
+        db.session.add(Rezervace(id_zakaznika=zak.id_zakaznika, id_stul=stul.id_stul, pocet_osob=2,
+                                 datum_cas=datetime(2030, 1, 1, 18) + timedelta(hours=i)))
+    db.session.commit()
+
+    token = create_access_token(identity=str(admin.id_zakaznika), additional_claims={"roles": ["admin"]})
+    yield {"Authorization": f"Bearer {token}"}
+
+    db.session.remove()
+
+
+def _get(client, url, headers, count_queries, **qs):
+    with count_queries() as queries:
+        resp = client.get(url, query_string=qs, headers=headers)
+    assert resp.status_code == 200, resp.get_json()
+    return resp.get_json(), queries
+
+
+def test_fields_selects_only_requested_columns(test_client, seed_db, count_queries):
+    data, queries = _get(test_client, '/api/zakaznik', seed_db, count_queries, fields="id_zakaznika,email")
+    assert data[1] == {"id_zakaznika": 2, "email": "jan0@example.com"}
+    # jeden dotaz, bez hesla a dalších nepožadovaných sloupců
+    selects = [q for q in queries if "FROM zakaznik" in q]
+    assert len(selects) == 1
+    assert "password_hash" not in selects[0] and "zakaznik.jmeno" not in selects[0]
+
+
+def test_expand_query_count_does_not_grow_with_rows(test_client, seed_db, count_queries):
+    small, q_small = _get(test_client, '/api/zakaznik', seed_db, count_queries,
+                          fields="email,roles", expand="rezervace", limit=2)
+    full, q_full = _get(test_client, '/api/zakaznik', seed_db, count_queries,
+                        fields="email,roles", expand="rezervace")
+    assert len(full) == 6 and full[1]["roles"] == ["Uživatel"] and len(full[1]["rezervace"]) == 1
+    assert "rezervace" in small[0] and "jmeno" not in small[0]
+    assert len(q_small) == len(q_full)
+
+
+def test_default_output_is_unchanged_and_eager_loaded(test_client, seed_db, count_queries):
+    data, queries = _get(test_client, '/api/rezervace', seed_db, count_queries)
+    assert len(data) == 5
+    assert data[0]["stul"]["cislo"] == 1 and data[0]["zakaznik"]["jmeno"] == "Jan0"
+    assert data[0]["salonek"] == "Žádný salónek"
+    # stul → rezervace je vnořená vazba, ale počet dotazů nezávisí na počtu řádků
+    _, q_one = _get(test_client, '/api/rezervace', seed_db, count_queries, limit=1)
+    assert len(queries) == len(q_one)
+
+
+def test_expand_nested_path_on_item(test_client, seed_db):
+    resp = test_client.get('/api/rezervace/1', query_string={"fields": "id_rezervace", "expand": "stul"},
+                           headers=seed_db)
+    assert resp.get_json() == {"id_rezervace": 1, "stul": {"id_stul": 1, "cislo": 1, "kapacita": 4, "popis": None}}
+
+    resp = test_client.get('/api/rezervace/1', query_string={"fields": "id_rezervace", "expand": "stul.rezervace"},
+                           headers=seed_db)
+    assert len(resp.get_json()["stul"]["rezervace"]) == 5
+
+
+def test_unknown_field_or_expand_is_400(test_client, seed_db):
+    assert test_client.get('/api/zakaznik', query_string={"fields": "heslo"}, headers=seed_db).status_code == 400
+    assert test_client.get('/api/stul', query_string={"expand": "kapacita"}, headers=seed_db).status_code == 400
@@ -0,0 +1,212 @@
+# tests/test_images.py
+
+import hashlib
+import io
+import json
+import os
+from decimal import Decimal
+
+import pytest
+from flask import current_app
+from flask_jwt_extended import create_access_token
+
+from app import create_app, images, schemas, serializers
+from app.config import TestingConfig
+from app.db import db
+from app.images import ImageManifest, ImagePipeline, manifest_path
+from app.models import Salonek
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 100
+
+
+@pytest.fixture(scope='module')
+def test_client(tmp_path_factory):
+    folder = tmp_path_factory.mktemp("images")
+    config = type("ImagesConfig", (TestingConfig,), {
+        "UPLOAD_FOLDER": str(folder),
+        "IMAGE_MAX_UPLOAD_BYTES": 2048,
+    })
+    app = create_app(config_name="testing", config_override=config)
+    client = app.test_client()
+    ctx = app.app_context()
+    ctx.push()
+    yield client
+    ctx.pop()
+
+
+@pytest.fixture(scope='function')
+def seed_db(test_client):
+    db.session.remove()
+    db.drop_all()
+    db.create_all()
+    yield
+    db.session.remove()
+
+
+@pytest.fixture
+def admin_headers(test_client):
+    token = create_access_token(identity="1", additional_claims={"roles": ["admin"]})
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _folder():
+    return current_app.config["UPLOAD_FOLDER"]
+
+
+def _post_salonek(client, headers, data, name="fotka.png"):
+    form = {"nazev": "Malý", "cena": "100", "kapacita": "10",
+            "obrazek": (io.BytesIO(data), name)}
+    return client.post("/api/salonek", data=form, headers=headers,
+                       content_type="multipart/form-data")
+
+
+def test_upload_is_content_addressed_and_deduplicated(test_client, seed_db, admin_headers):
+    first  = _post_salonek(test_client, admin_headers, PNG, name="../../etc/passwd.jpg")
+    second = _post_salonek(test_client, admin_headers, PNG, name="jina.png")
+    assert first.status_code == 201 and second.status_code == 201
+
+    filename = db.session.get(Salonek, first.get_json()["id_salonek"]).obrazek_filename
+    assert filename == db.session.get(Salonek, second.get_json()["id_salonek"]).obrazek_filename
+    assert len(filename) == len("0" * 32 + ".png") and filename.endswith(".png")
+
+    # jeden originál + manifest (IMAGE_WORKERS = 0 → zpracováno hned), žádné dočasné soubory
+    assert sorted(os.listdir(_folder())) == sorted([filename, os.path.basename(manifest_path(_folder(), filename))])
+    body = first.get_json()
+    assert body["obrazek_url"] == f"/img/{filename[:16]}/{filename}"
+    assert body["obrazek_srcset"]["original"] == body["obrazek_url"]
+
+
+def test_rejects_non_images_and_oversized_uploads(test_client, seed_db, admin_headers):
+    before = set(os.listdir(_folder()))
+    resp = _post_salonek(test_client, admin_headers, b"<?php echo 1; ?>", name="x.png")
+    assert resp.status_code == 400
+    resp = _post_salonek(test_client, admin_headers, PNG + b"\x01" * 4096)
+    assert resp.status_code == 413
+    assert set(os.listdir(_folder())) == before
+    assert db.session.query(Salonek).count() == 0
+
+
+def test_srcset_and_medium_url_from_manifest(test_client, seed_db):
+    folder = _folder()
+    with open(manifest_path(folder, "sal.jpg"), "w") as fh:
+        json.dump({"thumb": "sal-thumb.jpg", "medium": "sal-medium.jpg", "webp": "sal-webp.webp"}, fh)
+    salonek = Salonek(nazev="Velký", cena=Decimal("1"), kapacita=5, obrazek_filename="sal.jpg")
+    db.session.add(salonek)
+    db.session.commit()
+
+    with test_client.application.test_request_context():
+        # SERIALIZER_VERIFY → výstup se zároveň porovná se Schema.dump()
+        data = serializers.dump(schemas.SalonekSchema(), salonek)
+    assert data["obrazek_url"] == "/static/images/sal-medium.jpg"
+    assert data["obrazek_srcset"] == {
+        "original": "/static/images/sal.jpg",
+        "thumb":    "/static/images/sal-thumb.jpg",
+        "medium":   "/static/images/sal-medium.jpg",
+        "webp":     "/static/images/sal-webp.webp",
+    }
+
+
+def test_background_worker_writes_manifest(tmp_path):
+    ready = []
+    (tmp_path / "a.png").write_bytes(PNG)
+    pipeline = ImagePipeline(str(tmp_path), workers=1, on_ready=ready.append)
+    pipeline.submit("a.png")
+    pipeline.join()
+    assert ready == ["a.png"]
+    assert os.path.exists(manifest_path(str(tmp_path), "a.png"))
+    assert pipeline.variant_names("a.png")["original"] == "a.png"
+
+
+def test_variants_are_resized(tmp_path):
+    Image = pytest.importorskip("PIL.Image")
+    Image.new("RGB", (2000, 1000), "red").save(tmp_path / "big.jpg")
+    made = ImagePipeline(str(tmp_path), workers=0).process("big.jpg")
+    assert set(made) == {"thumb", "medium", "webp"}
+    with Image.open(tmp_path / made["thumb"]) as thumb:
+        assert thumb.size == (320, 160)
+    with Image.open(tmp_path / made["webp"]) as webp:
+        assert webp.format == "WEBP" and webp.size == (1024, 512)
+
+
+def test_fingerprinted_url_is_immutable_and_supports_ranges(test_client, seed_db):
+    pipeline = current_app.extensions["image_pipeline"]
+    with open(os.path.join(_folder(), "logo.png"), "wb") as fh:
+        fh.write(PNG)
+    entry = pipeline.manifest.add("logo.png")
+    with test_client.application.test_request_context():
+        url = images.file_url("logo.png")
+    assert url == f"/img/{entry['fingerprint']}/logo.png"
+
+    resp = test_client.get(url)
+    assert resp.status_code == 200 and resp.data == PNG
+    assert resp.headers["Cache-Control"] == "public, max-age=31536000, immutable"
+    assert resp.headers["Content-Type"] == "image/png"
+    etag = resp.headers["ETag"]
+
+    assert test_client.get(url, headers={"If-None-Match": etag}).status_code == 304
+    part = test_client.get(url, headers={"Range": "bytes=0-7"})
+    assert part.status_code == 206 and part.data == PNG[:8]
+    assert part.headers["Content-Range"] == f"bytes 0-7/{len(PNG)}"
+
+    stale = test_client.get("/img/0000000000000000/logo.png")
+    assert stale.status_code == 302 and stale.headers["Location"].endswith(url)
+    assert test_client.get(f"/img/{entry['fingerprint']}/neni.png").status_code == 404
+
+
+def test_file_from_another_worker_is_added_on_first_request(test_client, seed_db):
+    # upload / varianta uložená jiným workerem: v manifestu tohoto procesu zatím není
+    pipeline = current_app.extensions["image_pipeline"]
+    with open(os.path.join(_folder(), "jinde-thumb.png"), "wb") as fh:
+        fh.write(PNG)
+    assert pipeline.manifest.get("jinde-thumb.png") is None
+    fingerprint = hashlib.sha256(PNG).hexdigest()[:16]
+
+    resp = test_client.get(f"/img/{fingerprint}/jinde-thumb.png")
+    assert resp.status_code == 200 and resp.data == PNG
+    with test_client.application.test_request_context():
+        assert images.file_url("jinde-thumb.png") == f"/img/{fingerprint}/jinde-thumb.png"
+    assert pipeline.manifest.lookup("../images/jinde-thumb.png") is None
+
+
+def test_compiled_serializer_adds_file_from_another_worker(test_client, seed_db):
+    # kompilovaný serializer (FieldSet) musí dát stejné URL jako images.file_url()
+    pipeline = current_app.extensions["image_pipeline"]
+    with open(os.path.join(_folder(), "jinde.png"), "wb") as fh:
+        fh.write(PNG)
+    assert pipeline.manifest.get("jinde.png") is None
+    salonek = Salonek(nazev="Jinde", cena=Decimal("1"), kapacita=5, obrazek_filename="jinde.png")
+    db.session.add(salonek)
+    db.session.commit()
+
+    with test_client.application.test_request_context():
+        data = serializers.dump(schemas.SalonekSchema(), salonek)
+    fingerprint = hashlib.sha256(PNG).hexdigest()[:16]
+    assert data["obrazek_url"] == f"/img/{fingerprint}/jinde.png"
+    assert data["obrazek_srcset"]["original"] == f"/img/{fingerprint}/jinde.png"
+
+
+def test_accel_redirect_mode_leaves_bytes_to_proxy(test_client, seed_db, monkeypatch):
+    pipeline = current_app.extensions["image_pipeline"]
+    with open(os.path.join(_folder(), "logo.png"), "wb") as fh:
+        fh.write(PNG)
+    entry = pipeline.manifest.add("logo.png")
+    monkeypatch.setitem(current_app.config, "IMAGE_SENDFILE", "x-accel")
+    resp = test_client.get(f"/img/{entry['fingerprint']}/logo.png")
+    assert resp.status_code == 200 and resp.data == b""
+    assert resp.headers["X-Accel-Redirect"] == "/_protected/images/logo.png"
+    assert resp.headers["Cache-Control"].endswith("immutable")
+
+
+def test_precomputed_manifest_is_trusted_when_stat_matches(tmp_path):
+    (tmp_path / "a.png").write_bytes(PNG)
+    (tmp_path / "b.png").write_bytes(PNG + b"b")
+    manifest = ImageManifest(str(tmp_path))
+    assert manifest.load() == 2
+    manifest.entries["a.png"] = dict(manifest.entries["a.png"], fingerprint="predpocitany")
+    manifest.save()
+
+    (tmp_path / "b.png").write_bytes(PNG + b"bb")          # změněná velikost → přepočítat
+    fresh = ImageManifest(str(tmp_path))
+    assert fresh.load() == 1
+    assert fresh.get("a.png")["fingerprint"] == "predpocitany"
+    assert "manifest.json" not in fresh.entries
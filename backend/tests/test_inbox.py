@@ -0,0 +1,110 @@
+# tests/test_inbox.py
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+from app import create_app, outbox, inbox
+from app.db import db
+from app.models import Zakaznik, Notifikace
+
+
+@pytest.fixture(scope='module')
+def test_client():
+    app = create_app(config_name="testing")
+    client = app.test_client()
+    ctx = app.app_context()
+    ctx.push()
+    yield client
+    ctx.pop()
+
+
+@pytest.fixture(scope='function')
+def seed_db(test_client):
+    db.session.remove()
+    db.drop_all()
+    db.create_all()
+    zak = Zakaznik(jmeno="Jan", prijmeni="Novák", email="jan@example.com", _password="x")
+    db.session.add(zak)
+    db.session.commit()
+    for i in range(5):
+        outbox.notifikace(zak.id_zakaznika, "TEST", f"zpráva {i}")
+    db.session.commit()
+    outbox.wake()
+    token = create_access_token(identity=str(zak.id_zakaznika))
+    yield zak.id_zakaznika, {"Authorization": f"Bearer {token}"}
+    db.session.remove()
+
+
+def ids():
+    return [n.id_notifikace for n in db.session.query(Notifikace).order_by(Notifikace.id_notifikace)]
+
+
+def test_counter_follows_delivery_and_reads(test_client, seed_db):
+    zak_id, headers = seed_db
+    assert test_client.get("/api/users/me/notifications/unread-count", headers=headers).get_json() == {"neprectene": 5}
+
+    first, second, *_ = ids()
+    resp = test_client.post("/api/users/me/notifications/read", json={"ids": [first, second]}, headers=headers)
+    assert resp.get_json() == {"oznaceno": 2, "neprectene": 3}
+    # opakované označení nic neodečte
+    resp = test_client.post("/api/users/me/notifications/read", json={"ids": [first]}, headers=headers)
+    assert resp.get_json() == {"oznaceno": 0, "neprectene": 3}
+
+    resp = test_client.post("/api/users/me/notifications/read", json={"until_id": ids()[-1]}, headers=headers)
+    assert resp.get_json() == {"oznaceno": 3, "neprectene": 0}
+    assert db.session.query(Notifikace).filter_by(precteno=False).count() == 0
+
+
+def test_mark_read_validation_and_isolation(test_client, seed_db):
+    zak_id, headers = seed_db
+    url = "/api/users/me/notifications/read"
+    assert test_client.post(url, json={}, headers=headers).status_code == 422
+    assert test_client.post(url, json={"ids": [1], "until_id": 3}, headers=headers).status_code == 422
+
+    other = Zakaznik(jmeno="Eva", prijmeni="Nová", email="eva@example.com", _password="x")
+    db.session.add(other)
+    db.session.commit()
+    token = create_access_token(identity=str(other.id_zakaznika))
+    resp  = test_client.post(url, json={"until_id": 1000}, headers={"Authorization": f"Bearer {token}"})
+    assert resp.get_json() == {"oznaceno": 0, "neprectene": 0}
+    assert inbox.unread_count(zak_id) == 5
+
+
+def test_inbox_listing_since_and_unread(test_client, seed_db):
+    zak_id, headers = seed_db
+    all_ids = ids()
+    inbox.mark_read(zak_id, ids=all_ids[:2])
+    db.session.commit()
+
+    resp = test_client.get("/api/users/me/notifications", query_string={"limit": 2}, headers=headers)
+    assert resp.headers["X-Unread-Count"] == "3"
+    assert len(resp.get_json()) == 2 and resp.headers.get("X-Next-Cursor")
+
+    data = test_client.get("/api/users/me/notifications", query_string={"since": all_ids[2]},
+                           headers=headers).get_json()
+    assert sorted(n["id_notifikace"] for n in data) == all_ids[3:]
+
+    data = test_client.get("/api/users/me/notifications", query_string={"unread": 1}, headers=headers).get_json()
+    assert sorted(n["id_notifikace"] for n in data) == all_ids[2:]
+    assert all(n["precteno"] is False for n in data)
+
+
+def test_rebuild_unread_counts(test_client, seed_db):
+    zak_id, _ = seed_db
+    db.session.execute(db.update(Zakaznik).values(neprectene_notifikace=42))
+    inbox.rebuild_unread_counts()
+    db.session.commit()
+    assert inbox.unread_count(zak_id) == 5
+
+
+def test_inbox_query_uses_index(test_client, seed_db):
+    zak_id, _ = seed_db
+    stmt = (
+        db.select(Notifikace.id_notifikace)
+          .where(Notifikace.id_zakaznika == zak_id)
+          .order_by(Notifikace.datum_cas.desc(), Notifikace.id_notifikace.desc())
+          .limit(20)
+    )
+    sql  = str(stmt.compile(db.engine, compile_kwargs={"literal_binds": True}))
+    plan = " ".join(str(r[-1]) for r in db.session.execute(db.text(f"EXPLAIN QUERY PLAN {sql}")))
+    assert "ix_notifikace_schranka" in plan and "TEMP B-TREE" not in plan
@@ -0,0 +1,117 @@
+# tests/test_menu_snapshot.py
+
+import gzip
+import json
+import re
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+from app import create_app
+from app.db import db
+from app.models import Zakaznik, Alergen, PolozkaMenu, PolozkaMenuAlergen
+
+
+@pytest.fixture(scope='module')
+def test_client():
+    app = create_app(config_name="testing")
+    client = app.test_client()
+    ctx = app.app_context()
+    ctx.push()
+    yield client
+    ctx.pop()
+
+
+@pytest.fixture(scope='function')
+def seed_db(test_client):
+    db.session.remove()
+    db.drop_all()
+    db.create_all()
+    test_client.application.extensions["menu_snapshot"].invalidate()
+
+    admin = Zakaznik(jmeno='Admin', prijmeni='Test', email='admin@example.com')
+    admin.password = 'password1'
+    al = Alergen(nazev="Mléko", popis="Testovací alergen")
+    m1 = PolozkaMenu(nazev="Pizza", popis="", cena=199, kategorie="týdenní", den="Pondělí",
+                     preparation_time=10, points=5, obrazek_filename="pizza.jpg")
+    m2 = PolozkaMenu(nazev="Salát", popis="", cena=99, kategorie="stálá nabídka", den="",
+                     preparation_time=5, points=2)
+    db.session.add_all([admin, al, m1, m2])
+    db.session.flush()
+    db.session.add(PolozkaMenuAlergen(id_menu_polozka=m1.id_menu_polozka, id_alergenu=al.id_alergenu))
+    db.session.commit()
+
+    token = create_access_token(identity=str(admin.id_zakaznika), additional_claims={"roles": ["admin"]})
+    yield {"Authorization": f"Bearer {token}"}
+
+    db.session.remove()
+
+
+def test_menu_public_and_etag(test_client, seed_db):
+    resp = test_client.get('/api/menu')
+    assert resp.status_code == 200
+    data = resp.get_json()
+    assert [it["nazev"] for it in data] == ["Pizza", "Salát"]
+    assert data[0]["alergeny"][0]["nazev"] == "Mléko"
+    # pizza.jpg je ve static/images → URL s otiskem obsahu
+    assert re.search(r"/img/[0-9a-f]{16}/pizza\.jpg$", data[0]["obrazek_url"])
+
+    etag = resp.headers["ETag"]
+    resp = test_client.get('/api/menu', headers={"If-None-Match": etag})
+    assert resp.status_code == 304
+
+
+def test_menu_gzip_variant(test_client, seed_db):
+    plain = test_client.get('/api/menu')
+    resp  = test_client.get('/api/menu', headers={"Accept-Encoding": "gzip"})
+    assert resp.headers["Content-Encoding"] == "gzip"
+    assert resp.headers["ETag"] != plain.headers["ETag"]
+    assert json.loads(gzip.decompress(resp.data)) == plain.get_json()
+
+
+def test_menu_filters_served_from_snapshot(test_client, seed_db, count_queries):
+    test_client.get('/api/menu')
+    with count_queries() as queries:
+        resp = test_client.get('/api/menu', query_string={"kategorie": "týdenní", "den": "Pondělí"})
+    assert [it["nazev"] for it in resp.get_json()] == ["Pizza"]
+    assert queries == []
+
+
+def test_menu_write_bumps_version(test_client, seed_db):
+    etag = test_client.get('/api/menu').headers["ETag"]
+
+    resp = test_client.post('/api/alergen', json={"nazev": "Lepek"}, headers=seed_db)
+    assert resp.status_code == 201
+
+    pizza = db.session.query(PolozkaMenu).filter_by(nazev="Pizza").one()
+    resp = test_client.put(f'/api/menu/{pizza.id_menu_polozka}', data={"nazev": "Pizza Margherita"},
+                           headers=seed_db)
+    assert resp.status_code == 200
+
+    resp = test_client.get('/api/menu', headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert resp.get_json()[0]["nazev"] == "Pizza Margherita"
+
+
+def test_menu_snapshot_is_bounded_and_host_independent(test_client, seed_db, count_queries):
+    snapshot = test_client.application.extensions["menu_snapshot"]
+    test_client.get('/api/menu')
+    with count_queries() as queries:
+        a = test_client.get('/api/menu', base_url="http://a.example").get_json()
+        b = test_client.get('/api/menu', base_url="https://b.example").get_json()
+    assert queries == []                                  # jiný Host nenačítá položky znovu
+    assert a[0]["obrazek_url"].startswith("http://a.example/img/")
+    assert b[0]["obrazek_url"].startswith("https://b.example/img/")
+    assert all(url.startswith("https://b.example/") for url in b[0]["obrazek_srcset"].values())
+
+    # neznámé hodnoty filtrů sdílejí jednu variantu
+    pocet = len(snapshot._rendered)
+    for i in range(20):
+        resp = test_client.get('/api/menu', query_string={"kategorie": f"x{i}", "den": f"y{i}"})
+        assert resp.get_json() == []
+    assert len(snapshot._rendered) == pocet + 1
+
+    # počet variant je omezený
+    for i in range(snapshot.max_variants + 10):
+        test_client.get('/api/menu', base_url=f"http://h{i}.example")
+    assert len(snapshot._rendered) == snapshot.max_variants
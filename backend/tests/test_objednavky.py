@@ -0,0 +1,183 @@
+# tests/test_objednavky.py
+
+from datetime import datetime, timedelta
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+from app import create_app, points
+from app.db import db
+from app.models import (
+    Zakaznik, Objednavka, Platba, VernostniUcet,
+    PolozkaMenu, PolozkaObjednavky, Notifikace
+)
+
+
+@pytest.fixture(scope='module')
+def test_client():
+    app = create_app(config_name="testing")
+    client = app.test_client()
+    ctx = app.app_context()
+    ctx.push()
+    yield client
+    ctx.pop()
+
+
+@pytest.fixture(scope='function')
+def seed_db(test_client):
+    db.session.remove()
+    db.drop_all()
+    db.create_all()
+
+    zak = Zakaznik(jmeno='Admin', prijmeni='Test', email='admin@example.com')
+    zak.password = 'password1'
+    db.session.add(zak)
+    db.session.commit()
+
+    yield zak
+
+    db.session.remove()
+
+
+def _auth(zak, roles=("admin",)):
+    token = create_access_token(
+        identity=str(zak.id_zakaznika),
+        additional_claims={"roles": list(roles)}
+    )
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _add_orders(zak, count):
+    now = datetime.utcnow()
+    for i in range(count):
+        # střídáme: nezaplacená / zaplacená v přípravě / zaplacená hotová
+        o = Objednavka(
+            id_zakaznika=zak.id_zakaznika,
+            celkova_castka=100 + i,
+            cas_pripravy=now + timedelta(hours=1) if i % 3 == 1 else now - timedelta(hours=1)
+        )
+        db.session.add(o)
+        db.session.flush()
+        if i % 3:
+            db.session.add(Platba(castka=o.celkova_castka, typ_platby="kartou",
+                                  datum=now, id_objednavky=o.id_objednavky))
+    db.session.commit()
+
+
+def test_objednavky_stav(test_client, seed_db):
+    _add_orders(seed_db, 3)
+    resp = test_client.get('/api/objednavky', headers=_auth(seed_db))
+    assert resp.status_code == 200
+    stavy = [o["stav"] for o in resp.get_json()]
+    assert stavy == ["Čeká na platbu", "Ve zpracování", "Hotovo"]
+
+
+def test_objednavky_filtr_stavu(test_client, seed_db):
+    _add_orders(seed_db, 6)
+    resp = test_client.get('/api/objednavky', query_string={"stav": "Hotovo"},
+                           headers=_auth(seed_db))
+    assert resp.status_code == 200
+    data = resp.get_json()
+    assert len(data) == 2
+    assert all(o["stav"] == "Hotovo" for o in data)
+
+    resp = test_client.get('/api/objednavky', query_string={"stav": "xyz"},
+                           headers=_auth(seed_db))
+    assert resp.status_code == 400
+
+
+def test_objednavky_kurzor(test_client, seed_db):
+    _add_orders(seed_db, 5)
+    headers = _auth(seed_db)
+    seen = []
+    cursor = None
+    while True:
+        qs = {"limit": 2}
+        if cursor:
+            qs["cursor"] = cursor
+        resp = test_client.get('/api/objednavky', query_string=qs, headers=headers)
+        assert resp.status_code == 200
+        seen += [o["id_objednavky"] for o in resp.get_json()]
+        cursor = resp.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert seen == sorted(seen) and len(seen) == 5
+
+
+def test_objednavky_pocet_dotazu_nezavisi_na_poctu(test_client, seed_db, count_queries):
+    headers = _auth(seed_db)
+
+    _add_orders(seed_db, 3)
+    with count_queries() as small:
+        assert test_client.get('/api/objednavky', headers=headers).status_code == 200
+
+    _add_orders(seed_db, 60)
+    with count_queries() as large:
+        resp = test_client.get('/api/objednavky', headers=headers)
+    assert resp.status_code == 200
+    assert len(resp.get_json()) == 63
+    assert len(large) == len(small)
+
+
+def _add_menu(count):
+    items = [
+        PolozkaMenu(nazev=f"Jídlo {i}", popis="", cena=100, kategorie="stálá nabídka", den="",
+                    preparation_time=10 + i, points=5)
+        for i in range(count)
+    ]
+    db.session.add_all(items)
+    db.session.commit()
+    return [m.id_menu_polozka for m in items]
+
+
+def test_vytvoreni_objednavky_jedna_transakce(test_client, seed_db):
+    db.session.add(VernostniUcet(body=0, id_zakaznika=seed_db.id_zakaznika))
+    db.session.commit()
+    ids = _add_menu(3)
+
+    payload = {"items": [{"id_menu_polozka": i, "mnozstvi": 2, "cena": "100"} for i in ids]}
+    resp = test_client.post('/api/objednavky', json=payload, headers=_auth(seed_db, roles=("user",)))
+    assert resp.status_code == 201
+    id_obj = resp.get_json()["id_objednavky"]
+
+    db.session.expire_all()
+    assert db.session.query(PolozkaObjednavky).filter_by(id_objednavky=id_obj).count() == 3
+    assert db.session.query(Notifikace).filter_by(id_objednavky=id_obj).count() == 1
+    # body jsou v knize pohybů, do VernostniUcet.body je přičte až kompakce
+    assert points.balance(seed_db.id_zakaznika)["body"] == 30
+    points.compact()
+    db.session.commit()
+    ucet = db.session.query(VernostniUcet).filter_by(id_zakaznika=seed_db.id_zakaznika).one()
+    assert ucet.body == 30
+
+
+def test_vytvoreni_objednavky_se_slevou(test_client, seed_db):
+    db.session.add(VernostniUcet(body=450, id_zakaznika=seed_db.id_zakaznika))
+    db.session.commit()
+    ids = _add_menu(1)
+
+    payload = {"items": [{"id_menu_polozka": ids[0], "mnozstvi": 5, "cena": "100"}], "apply_discount": True}
+    resp = test_client.post('/api/objednavky', json=payload, headers=_auth(seed_db, roles=("user",)))
+    assert resp.status_code == 201
+    assert resp.get_json()["discount_amount"] == 200
+    assert resp.get_json()["celkova_castka"] == "300.00"
+
+    db.session.expire_all()
+    ucet = db.session.query(VernostniUcet).filter_by(id_zakaznika=seed_db.id_zakaznika).one()
+    assert ucet.body == 50
+
+
+def test_vytvoreni_objednavky_pocet_prikazu_nezavisi_na_polozkach(test_client, seed_db, count_queries):
+    db.session.add(VernostniUcet(body=0, id_zakaznika=seed_db.id_zakaznika))
+    db.session.commit()
+    ids     = _add_menu(20)
+    headers = _auth(seed_db, roles=("user",))
+
+    def _post(menu_ids):
+        payload = {"items": [{"id_menu_polozka": i, "mnozstvi": 1, "cena": "100"} for i in menu_ids]}
+        with count_queries() as queries:
+            resp = test_client.post('/api/objednavky', json=payload, headers=headers)
+        assert resp.status_code == 201
+        return queries
+
+    assert len(_post(ids[:1])) == len(_post(ids))
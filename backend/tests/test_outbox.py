@@ -0,0 +1,140 @@
+# tests/test_outbox.py
+
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+from flask import current_app
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+
+from app import create_app, outbox
+from app.db import db
+from app.events import get_hub
+from app.models import Zakaznik, Stul, Notifikace, OutboxUdalost
+
+
+@pytest.fixture(scope='module')
+def test_client():
+    app = create_app(config_name="testing")
+    client = app.test_client()
+    ctx = app.app_context()
+    ctx.push()
+    yield client
+    ctx.pop()
+
+
+@pytest.fixture(scope='function')
+def seed_db(test_client):
+    db.session.remove()
+    db.drop_all()
+    db.create_all()
+    zak = Zakaznik(jmeno="Jan", prijmeni="Novák", email="jan@example.com", _password="x")
+    db.session.add_all([zak, Stul(cislo=1, kapacita=4)])
+    db.session.commit()
+    yield zak.id_zakaznika
+    db.session.remove()
+
+
+@pytest.fixture
+def deferred(monkeypatch):
+    """Dispečer jako ve výrobě (ne inline), ale bez vlákna – doručení spouští test."""
+    dispatcher = current_app.extensions["outbox"]
+    monkeypatch.setattr(dispatcher, "inline", False)
+    return dispatcher
+
+
+def pending():
+    return db.session.query(OutboxUdalost).filter(OutboxUdalost.zpracovano.is_(None)).count()
+
+
+def test_reservation_writes_outbox_in_one_commit(test_client, seed_db, deferred):
+    commits = []
+    listener = lambda conn: commits.append(1)                       # noqa: E731
+    event.listen(db.engine, "commit", listener)
+    try:
+        token = create_access_token(identity=str(seed_db), additional_claims={"roles": ["user"]})
+        resp  = test_client.post("/api/rezervace", headers={"Authorization": f"Bearer {token}"}, json={
+            "datum_cas": (datetime.utcnow() + timedelta(days=1)).isoformat(), "pocet_osob": 2, "id_stul": 1,
+        })
+    finally:
+        event.remove(db.engine, "commit", listener)
+    assert resp.status_code == 201
+    assert len(commits) == 1
+    assert pending() == 1 and db.session.query(Notifikace).count() == 0
+
+    assert deferred.dispatch() == 1
+    notif = db.session.query(Notifikace).one()
+    assert notif.typ == "REZERVACE_VYTVOŘENA" and notif.id_rezervace == resp.get_json()["id_rezervace"]
+    assert pending() == 0
+
+
+def test_redelivery_does_not_duplicate(test_client, seed_db, deferred):
+    for i in range(5):
+        outbox.notifikace(seed_db, "TEST", f"zpráva {i}")
+    db.session.commit()
+
+    # jiný worker už první dvě události zabral (a doručil)
+    db.session.execute(db.update(OutboxUdalost).where(OutboxUdalost.id_udalosti <= 2)
+                         .values(zpracovano=datetime.utcnow()))
+    db.session.commit()
+
+    sub = get_hub().subscribe(seed_db)
+    try:
+        assert deferred.dispatch() == 3
+        assert deferred.dispatch() == 0
+        texts = [n.text for n in db.session.query(Notifikace).order_by(Notifikace.id_notifikace)]
+        assert texts == ["zpráva 2", "zpráva 3", "zpráva 4"]
+        assert [sub.queue.get_nowait()[2]["text"] for _ in range(3)] == texts
+    finally:
+        get_hub().unsubscribe(sub)
+
+
+def test_delivery_does_not_reload_notifications(test_client, seed_db, deferred, count_queries):
+    for i in range(5):
+        outbox.notifikace(seed_db, "TEST", f"zpráva {i}")
+    db.session.commit()
+
+    sub = get_hub().subscribe(seed_db)
+    try:
+        with count_queries() as queries:
+            assert deferred.dispatch() == 5
+        # výběr + zabrání + INSERTy + počítadlo, žádný SELECT za každou notifikaci po commitu
+        assert not [q for q in queries if "FROM notifikace" in q]
+        assert [sub.queue.get_nowait()[2]["text"] for _ in range(5)] == [f"zpráva {i}" for i in range(5)]
+    finally:
+        get_hub().unsubscribe(sub)
+
+
+def test_failing_event_is_retried_then_parked(test_client, seed_db, deferred, monkeypatch):
+    monkeypatch.setattr(deferred, "max_attempts", 2)
+    outbox.notifikace(seed_db, "TEST", "ok")
+    outbox.notifikace(None, "TEST", "bez zákazníka")                # NOT NULL id_zakaznika
+    db.session.commit()
+
+    assert deferred.dispatch() == 1
+    bad = db.session.query(OutboxUdalost).filter_by(id_udalosti=2).one()
+    assert bad.pokusy == 1 and bad.zpracovano is None and "IntegrityError" in bad.chyba
+
+    assert deferred.dispatch() == 0
+    db.session.refresh(bad)
+    assert bad.pokusy == 2 and bad.zpracovano is not None
+    assert pending() == 0
+    assert db.session.query(Notifikace).count() == 1
+
+
+def test_background_loops_start_with_first_request_not_in_cli(test_client, monkeypatch):
+    # create_app (i pro `flask seed-db`) smyčky jen zaregistruje, vlákna pustí až obsluha requestu
+    app     = test_client.application
+    started = []
+    monkeypatch.setattr(app, "testing", False)
+    monkeypatch.setitem(app.extensions, "background_jobs", [("test-job", started.append, ("ok",))])
+    monkeypatch.delitem(app.extensions, "background_pid", raising=False)
+    assert started == []
+
+    test_client.get("/api/neexistuje")
+    test_client.get("/api/neexistuje")
+    for thread in threading.enumerate():
+        if thread.name == "test-job":
+            thread.join(1)
+    assert started == ["ok"]
@@ -0,0 +1,95 @@
+# tests/test_pagination.py
+
+from datetime import datetime, timedelta
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+from app import create_app
+from app.db import db
+from app.models import Zakaznik, Stul, Notifikace
+
+
+@pytest.fixture(scope='module')
+def test_client():
+    app = create_app(config_name="testing")
+    client = app.test_client()
+    ctx = app.app_context()
+    ctx.push()
+    yield client
+    ctx.pop()
+
+
+@pytest.fixture(scope='function')
+def seed_db(test_client):
+    db.session.remove()
+    db.drop_all()
+    db.create_all()
+
+    admin = Zakaznik(jmeno='Admin', prijmeni='Test', email='admin@example.com')
+    admin.password = 'password1'
+    db.session.add(admin)
+    db.session.add_all(Stul(cislo=i, kapacita=4) for i in range(1, 8))
+    db.session.commit()
+
+    token = create_access_token(identity=str(admin.id_zakaznika), additional_claims={"roles": ["admin"]})
+    yield admin, {"Authorization": f"Bearer {token}"}
+
+    db.session.remove()
+
+
+def _walk(client, url, headers, rel="next", **qs):
+    pages, resp = [], client.get(url, query_string=qs, headers=headers)
+    while True:
+        assert resp.status_code == 200
+        pages.append(resp.get_json())
+        cursor = resp.headers.get("X-Next-Cursor" if rel == "next" else "X-Prev-Cursor")
+        if not cursor:
+            return pages, resp
+        resp = client.get(url, query_string={**qs, "cursor": cursor}, headers=headers)
+
+
+def test_register_crud_list_pages_forward_and_back(test_client, seed_db, count_queries):
+    _, headers = seed_db
+    with count_queries() as queries:
+        pages, last = _walk(test_client, '/api/stul', headers, limit=3)
+    assert [[s["cislo"] for s in p] for p in pages] == [[1, 2, 3], [4, 5, 6], [7]]
+    # každá stránka = jeden dotaz na stul, další stránky filtrují podle klíče místo OFFSET
+    page_queries = [q for q in queries if q.startswith("SELECT stul.")]
+    assert len(page_queries) == len(pages)
+    assert all("stul.id_stul >" in q for q in page_queries[1:])
+    assert 'rel="prev"' in last.headers["Link"]
+
+    resp = test_client.get('/api/stul', query_string={"limit": 3, "cursor": last.headers["X-Prev-Cursor"]},
+                           headers=headers)
+    assert [s["cislo"] for s in resp.get_json()] == [4, 5, 6]
+
+
+def test_sorted_notifications(test_client, seed_db):
+    admin, headers = seed_db
+    base = datetime(2025, 1, 1, 12, 0)
+    db.session.add_all(
+        Notifikace(typ="T", datum_cas=base + timedelta(minutes=i % 3), text=str(i), id_zakaznika=admin.id_zakaznika)
+        for i in range(6)
+    )
+    db.session.commit()
+
+    pages, _ = _walk(test_client, '/api/users/me/notifications', headers, limit=4)
+    casy = [n["datum_cas"] for p in pages for n in p]
+    assert len(casy) == 6 and casy == sorted(casy, reverse=True)
+
+
+def test_invalid_cursor_and_sort(test_client, seed_db):
+    _, headers = seed_db
+    assert test_client.get('/api/stul', query_string={"cursor": "xxx"}, headers=headers).status_code == 400
+    assert test_client.get('/api/stul', query_string={"sort": "popis"}, headers=headers).status_code == 400
+
+
+def test_limit_is_capped(test_client, seed_db):
+    _, headers = seed_db
+    test_client.application.config["PAGINATION_MAX_LIMIT"] = 2
+    try:
+        resp = test_client.get('/api/stul', query_string={"limit": 1000}, headers=headers)
+        assert len(resp.get_json()) == 2
+    finally:
+        test_client.application.config["PAGINATION_MAX_LIMIT"] = 500
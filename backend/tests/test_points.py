@@ -0,0 +1,119 @@
+# tests/test_points.py
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+from app import create_app, points
+from app.db import db
+from app.models import Zakaznik, VernostniUcet, BodovyPohyb
+
+
+@pytest.fixture(scope='module')
+def test_client():
+    app = create_app(config_name="testing")
+    client = app.test_client()
+    ctx = app.app_context()
+    ctx.push()
+    yield client
+    ctx.pop()
+
+
+@pytest.fixture(scope='function')
+def seed_db(test_client):
+    db.session.remove()
+    db.drop_all()
+    db.create_all()
+    zak = Zakaznik(jmeno="Jan", prijmeni="Novák", email="jan@example.com", _password="x")
+    db.session.add(zak)
+    db.session.flush()
+    db.session.add(VernostniUcet(body=100, id_zakaznika=zak.id_zakaznika))
+    db.session.commit()
+    token = create_access_token(identity=str(zak.id_zakaznika), additional_claims={"roles": ["user"]})
+    yield zak.id_zakaznika, {"Authorization": f"Bearer {token}"}
+    db.session.remove()
+
+
+def materialized(zak_id):
+    db.session.expire_all()
+    return db.session.scalar(db.select(VernostniUcet.body).where(VernostniUcet.id_zakaznika == zak_id))
+
+
+def test_earn_is_insert_only_until_compaction(test_client, seed_db):
+    zak_id, headers = seed_db
+    points.earn(zak_id, 30)
+    points.earn(zak_id, 20)
+    db.session.commit()
+    assert materialized(zak_id) == 100
+
+    data = test_client.get("/api/users/me/points", headers=headers).get_json()
+    assert data["body"] == 150 and data["body_nezapoctene"] == 50
+
+    assert points.compact() == 2
+    db.session.commit()
+    assert materialized(zak_id) == 150
+    assert points.compact() == 0
+    data = test_client.get("/api/users/me/points", headers=headers).get_json()
+    assert data["body"] == 150 and data["body_nezapoctene"] == 0
+
+
+def test_redeem_checks_balance_atomically(test_client, seed_db):
+    zak_id, headers = seed_db
+    resp = test_client.post("/api/users/me/redeem", json={"points": 60}, headers=headers)
+    assert resp.status_code == 200 and resp.get_json()["body"] == 40
+
+    resp = test_client.post("/api/users/me/redeem", json={"points": 60}, headers=headers)
+    assert resp.status_code == 400
+    assert test_client.post("/api/users/me/redeem", json={"points": -5}, headers=headers).status_code == 422
+    assert materialized(zak_id) == 40
+
+    history = test_client.get("/api/users/me/points/history", headers=headers).get_json()
+    assert [(h["typ"], h["zmena"]) for h in history] == [("UPLATNENI", -60)]
+
+
+def test_redeem_compacts_pending_earnings(test_client, seed_db):
+    zak_id, headers = seed_db
+    points.earn(zak_id, 50)
+    db.session.commit()
+    resp = test_client.post("/api/users/me/redeem", json={"points": 120}, headers=headers)
+    assert resp.status_code == 200
+    data = resp.get_json()
+    assert data["body"] == 30 and data["body_nezapoctene"] == 0
+    assert materialized(zak_id) == 30
+    assert db.session.query(BodovyPohyb).filter_by(zapocteno=False).count() == 0
+
+
+def test_compaction_creates_missing_account(test_client, seed_db):
+    zak = Zakaznik(jmeno="Eva", prijmeni="Nová", email="eva@example.com", _password="x")
+    db.session.add(zak)
+    db.session.commit()
+    token   = create_access_token(identity=str(zak.id_zakaznika))
+    headers = {"Authorization": f"Bearer {token}"}
+    assert test_client.get("/api/users/me/points", headers=headers).status_code == 404
+
+    points.earn(zak.id_zakaznika, 25)
+    db.session.commit()
+    assert test_client.get("/api/users/me/points", headers=headers).get_json()["body"] == 25
+    points.compact(limit=1)
+    db.session.commit()
+    assert materialized(zak.id_zakaznika) == 25
+
+
+def test_compact_never_creates_a_second_account(test_client, seed_db, monkeypatch):
+    zak_id, _ = seed_db
+    points.earn(zak_id, 5)
+    db.session.commit()
+
+    # první SELECT účtů „nevidí“ účet, který mezitím založil souběžný request
+    scalars, stale = db.session.scalars, []
+    def scalars_stale(stmt, *args, **kwargs):
+        if not stale and "vernostni_ucet" in str(stmt):
+            stale.append(stmt)
+            return iter(())
+        return scalars(stmt, *args, **kwargs)
+    monkeypatch.setattr(db.session, "scalars", scalars_stale)
+
+    assert points.compact(zak_id) == 1
+    db.session.commit()
+    assert stale
+    assert db.session.scalar(db.select(db.func.count()).select_from(VernostniUcet)) == 1
+    assert materialized(zak_id) == 105
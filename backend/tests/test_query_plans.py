@@ -0,0 +1,167 @@
+# tests/test_query_plans.py
+#
+# Regrese plánů horkých dotazů: endpointy se spustí nad naplněnou DB, zachytí se
+# jejich SQL a každý příkaz se pustí přes EXPLAIN. Sekvenční průchod velkou tabulkou
+# (chybějící index na FK / filtru) test shodí.
+#   SQLite:     EXPLAIN QUERY PLAN, zakázané je "SCAN <tabulka>" bez USING INDEX
+#   PostgreSQL: (TEST_DATABASE_URL) ANALYZE + enable_seqscan = off, zakázané je
+#               "Seq Scan on <tabulka>" – objeví se jen tam, kde žádný index nepomůže
+
+import re
+from datetime import datetime, timedelta
+
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+
+from app import create_app, occupancy
+from app.db import db
+from app.models import (
+    Zakaznik, Stul, PolozkaMenu, Rezervace, Objednavka, PolozkaObjednavky,
+    Platba, Notifikace, BodovyPohyb
+)
+
+VELKE_TABULKY = {
+    "rezervace", "objednavka", "platba", "polozka_objednavky",
+    "notifikace", "bodovy_pohyb", "hodnoceni",
+}
+ZAKAZNIKU, NA_ZAKAZNIKA = 40, 25
+
+
+@pytest.fixture(scope='module')
+def test_client():
+    app = create_app(config_name="testing")
+    client = app.test_client()
+    ctx = app.app_context()
+    ctx.push()
+    yield client
+    ctx.pop()
+
+
+@pytest.fixture(scope='module')
+def seed_db(test_client):
+    db.session.remove()
+    db.drop_all()
+    db.create_all()
+    start = datetime(2030, 1, 1, 12, 0)
+    db.session.execute(db.insert(Zakaznik), [
+        {"jmeno": "Z", "prijmeni": str(z), "email": f"z{z}@example.com", "_password": "x"}
+        for z in range(1, ZAKAZNIKU + 1)
+    ])
+    db.session.execute(db.insert(Stul), [{"cislo": s, "kapacita": 4} for s in range(1, 11)])
+    db.session.add(PolozkaMenu(nazev="Polévka", cena=50, kategorie="Polévka", den="Pondělí",
+                               preparation_time=5, points=1))
+    db.session.flush()
+
+    rezervace, objednavky, platby, polozky, notifikace, pohyby = [], [], [], [], [], []
+    for z in range(1, ZAKAZNIKU + 1):
+        for i in range(NA_ZAKAZNIKA):
+            n  = (z - 1) * NA_ZAKAZNIKA + i + 1
+            dt = start + timedelta(hours=n)
+            rezervace.append({"datum_cas": dt, "pocet_osob": 2, "id_zakaznika": z, "id_stul": n % 10 + 1})
+            objednavky.append({"id_objednavky": n, "datum_cas": dt, "id_zakaznika": z, "celkova_castka": 100})
+            polozky.append({"mnozstvi": 2, "cena": 50, "id_objednavky": n, "id_menu_polozka": 1})
+            if i % 2:
+                platby.append({"castka": 100, "typ_platby": "karta", "datum": dt, "id_objednavky": n})
+            notifikace.append({"typ": "TEST", "text": f"zpráva {n}", "datum_cas": dt, "id_zakaznika": z,
+                               "precteno": i % 3 == 0})
+            pohyby.append({"id_zakaznika": z, "zmena": 5, "typ": "ZISK", "datum_cas": dt,
+                           "id_objednavky": n, "zapocteno": i < NA_ZAKAZNIKA - 3})
+    for model, rows in [(Rezervace, rezervace), (Objednavka, objednavky), (PolozkaObjednavky, polozky),
+                        (Platba, platby), (Notifikace, notifikace), (BodovyPohyb, pohyby)]:
+        db.session.execute(db.insert(model), rows)
+    db.session.commit()
+    occupancy.rebuild_occupancy()
+
+    if db.engine.dialect.name == "postgresql":
+        with db.engine.connect() as conn:
+            conn.exec_driver_sql("ANALYZE")
+    token = create_access_token(identity="7", additional_claims={"roles": ["user"]})
+    yield {"Authorization": f"Bearer {token}"}
+    db.session.remove()
+
+
+@pytest.fixture
+def captured():
+    """Zachytí (SQL, parametry) všech příkazů odeslaných do DB."""
+    statements = []
+
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if not executemany:
+            statements.append((statement, parameters))
+
+    event.listen(db.engine, "before_cursor_execute", _before)
+    yield statements
+    event.remove(db.engine, "before_cursor_execute", _before)
+
+
+def _cte_dotaz(statement):
+    sql = statement.lstrip().upper()
+    return sql.startswith(("SELECT", "WITH", "UPDATE", "DELETE")) or (
+        sql.startswith("INSERT") and " SELECT " in sql
+    )
+
+
+def sekvencni_pruchody(statement, parameters):
+    """Vrátí velké tabulky, které plán příkazu prochází sekvenčně."""
+    with db.engine.connect() as conn:
+        if conn.dialect.name == "postgresql":
+            conn.exec_driver_sql("SET enable_seqscan = off")
+            plan = [r[0] for r in conn.exec_driver_sql(f"EXPLAIN {statement}", parameters)]
+            nalezy = (re.search(r"Seq Scan on (\w+)", line) for line in plan)
+        else:
+            plan = [r[-1] for r in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+            nalezy = (re.fullmatch(r"SCAN (\w+)(?: AS \w+)?", line) for line in plan)
+        tabulky = {m.group(1) for m in nalezy if m} & VELKE_TABULKY
+        conn.rollback()
+    return tabulky, plan
+
+
+def zkontroluj(statements):
+    dotazy = [(s, p) for s, p in statements if _cte_dotaz(s)]
+    assert dotazy, "endpoint neposlal do DB žádný dotaz"
+    for statement, parameters in dotazy:
+        tabulky, plan = sekvencni_pruchody(statement, parameters)
+        assert not tabulky, f"sekvenční průchod {sorted(tabulky)}:\n{statement}\n" + "\n".join(map(str, plan))
+
+
+@pytest.mark.parametrize("url, query", [
+    ("/api/objednavky",                   {}),
+    ("/api/objednavky",                   {"stav": "Hotovo"}),
+    ("/api/objednavky",                   {"stav": "Čeká na platbu", "sort": "datum_cas"}),
+    ("/api/rezervace",                    {}),
+    ("/api/rezervace",                    {"sort": "datum_cas"}),
+    ("/api/users/me/notifications",       {}),
+    ("/api/users/me/notifications",       {"unread": 1}),
+    ("/api/users/me/notifications",       {"since": 170}),
+    ("/api/users/me/points",              {}),
+    ("/api/users/me/points/history",      {}),
+])
+def test_customer_endpoints_use_indexes(test_client, seed_db, captured, url, query):
+    resp = test_client.get(url, query_string=query, headers=seed_db)
+    assert resp.status_code == 200, resp.get_data(as_text=True)
+    zkontroluj(captured)
+
+
+def test_occupancy_rebuild_uses_resource_indexes(test_client, seed_db, captured):
+    occupancy.rebuild_occupancy()
+    zkontroluj(captured)
+
+
+def test_order_children_by_foreign_key(test_client, seed_db, captured):
+    # dotazy podle FK, které dělá ORM (lazy load) i kaskádové mazání
+    objed = db.session.get(Objednavka, 170)
+    assert len(objed.polozky) == 1 and len(objed.platby) == 1
+    db.session.scalars(db.select(Rezervace).where(Rezervace.id_zakaznika == 7)).all()
+    db.session.scalars(db.select(Notifikace).where(Notifikace.id_objednavky == 170)).all()
+    db.session.scalars(db.select(BodovyPohyb).where(BodovyPohyb.id_objednavky == 170)).all()
+    db.session.rollback()
+    zkontroluj(captured)
+
+
+def test_checker_detects_sequential_scan(test_client, seed_db):
+    # pojistka, že kontrola sama něco zachytí: filtr na sloupci bez indexu
+    stmt = db.select(Objednavka.id_objednavky).where(Objednavka.celkova_castka > 50)
+    sql  = str(stmt.compile(db.engine, compile_kwargs={"literal_binds": True}))
+    tabulky, _ = sekvencni_pruchody(sql, ())
+    assert tabulky == {"objednavka"}
@@ -0,0 +1,119 @@
+# tests/test_replicas.py
+
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import create_engine
+
+from app import create_app
+from app.config import TestingConfig
+from app.db import db
+from app.models import Stul
+
+
+def _make_app(tmp_path, replicas, **extra):
+    class ReplicaConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'primary.db'}"
+        SQLALCHEMY_REPLICA_URIS = replicas
+        REPLICA_HEALTH_CHECK_SECONDS = 0
+    for key, value in extra.items():
+        setattr(ReplicaConfig, key, value)
+
+    app = create_app(config_override=ReplicaConfig)
+    with app.app_context():
+        db.create_all()
+        db.session.add(Stul(cislo=1, kapacita=4, popis="primary"))
+        db.session.commit()
+    # „replikace“: každá replika má vlastní obsah, aby bylo vidět, odkud se četlo
+    for i, uri in enumerate(replicas):
+        if "neexistuje" in uri:
+            continue
+        engine = create_engine(uri)
+        db.metadata.create_all(engine)
+        with engine.begin() as conn:
+            conn.execute(Stul.__table__.insert().values(cislo=1, kapacita=4, popis=f"replica-{i}"))
+        engine.dispose()
+    return app
+
+
+@pytest.fixture
+def admin_headers():
+    def make(app):
+        with app.app_context():
+            token = create_access_token(identity="1", additional_claims={"roles": ["admin"]})
+        return {"Authorization": f"Bearer {token}"}
+    return make
+
+
+def _popis(client, headers):
+    resp = client.get('/api/stul', headers=headers)
+    assert resp.status_code == 200, resp.get_json()
+    return resp.get_json()[0]["popis"]
+
+
+def test_reads_round_robin_and_stick_to_primary_after_write(tmp_path, admin_headers):
+    app = _make_app(tmp_path, [f"sqlite:///{tmp_path / 'r0.db'}", f"sqlite:///{tmp_path / 'r1.db'}"])
+    client, headers = app.test_client(), admin_headers(app)
+
+    assert [_popis(client, headers) for _ in range(4)] == ["replica-0", "replica-1", "replica-0", "replica-1"]
+
+    # zápis → stejný uživatel čte z primární DB, jiný dál z repliky
+    assert client.post('/api/stul', json={"cislo": 2, "kapacita": 2}, headers=headers).status_code == 201
+    assert _popis(client, headers) == "primary"
+    with app.app_context():
+        other = {"Authorization": f"Bearer {create_access_token(identity='2', additional_claims={'roles': ['admin']})}"}
+    assert _popis(client, other).startswith("replica-")
+
+
+def test_write_on_another_worker_sticks_via_signed_cookie(tmp_path, admin_headers):
+    # dva „workery“ se společným SECRET_KEY, každý s vlastní pamětí zápisů
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    worker_a = _make_app(tmp_path / "a", [f"sqlite:///{tmp_path / 'a' / 'r0.db'}"])
+    worker_b = _make_app(tmp_path / "b", [f"sqlite:///{tmp_path / 'b' / 'r0.db'}"])
+    headers  = admin_headers(worker_a)
+
+    resp = worker_a.test_client().post('/api/stul', json={"cislo": 2, "kapacita": 2}, headers=headers)
+    assert resp.status_code == 201
+    cookie = resp.headers["Set-Cookie"].split(";")[0].split("=", 1)[1]
+
+    client_b = worker_b.test_client()
+    assert _popis(client_b, headers) == "replica-0"
+    client_b.set_cookie("replica_sticky", cookie)
+    assert _popis(client_b, headers) == "primary"
+    # cookie jiného uživatele ani podvržená hodnota na primární DB nepošle
+    with worker_b.app_context():
+        other = {"Authorization": f"Bearer {create_access_token(identity='2', additional_claims={'roles': ['admin']})}"}
+    assert _popis(client_b, other) == "replica-0"
+    client_b.set_cookie("replica_sticky", cookie[:-2] + "xx")
+    assert _popis(client_b, headers) == "replica-0"
+
+
+def test_sticky_window_expires(tmp_path, admin_headers):
+    app = _make_app(tmp_path, [f"sqlite:///{tmp_path / 'r0.db'}"], REPLICA_STICKY_SECONDS=0)
+    client, headers = app.test_client(), admin_headers(app)
+    assert client.post('/api/stul', json={"cislo": 2, "kapacita": 2}, headers=headers).status_code == 201
+    assert _popis(client, headers) == "replica-0"
+
+
+def test_unhealthy_replica_falls_back(tmp_path, admin_headers):
+    app = _make_app(tmp_path, [f"sqlite:///{tmp_path / 'neexistuje' / 'r0.db'}", f"sqlite:///{tmp_path / 'r1.db'}"])
+    client, headers = app.test_client(), admin_headers(app)
+    assert {_popis(client, headers) for _ in range(3)} == {"replica-1"}
+
+    router = app.extensions["replica_router"]
+    router.mark_down(router.replicas[1])
+    assert _popis(client, headers) == "primary"
+    # pool statistiky zahrnují i repliky
+    stats = client.get('/api/_internal/pool', headers=headers).get_json()
+    assert set(stats["engines"]) == {"primary", "replica-0", "replica-1"}
+
+
+def test_least_connections_prefers_idle_replica(tmp_path, admin_headers):
+    app = _make_app(tmp_path, [f"sqlite:///{tmp_path / 'r0.db'}", f"sqlite:///{tmp_path / 'r1.db'}"],
+                    REPLICA_SELECTION="least_connections")
+    client, headers = app.test_client(), admin_headers(app)
+    busy = app.extensions["replica_router"].replicas[0].engine.connect()
+    try:
+        assert {_popis(client, headers) for _ in range(3)} == {"replica-1"}
+    finally:
+        busy.close()
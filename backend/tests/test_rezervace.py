@@ -0,0 +1,251 @@
+# tests/test_rezervace.py
+
+from datetime import datetime, timedelta
+
+import pytest
+from flask import current_app
+from flask_jwt_extended import create_access_token
+
+from app import create_app
+from app.db import db
+from app.models import Zakaznik, Stul, Salonek, Rezervace, Obsazenost
+from app import occupancy
+from app.occupancy import rebuild_occupancy
+
+
+@pytest.fixture(scope='module')
+def test_client():
+    app = create_app(config_name="testing")
+    client = app.test_client()
+    ctx = app.app_context()
+    ctx.push()
+    yield client
+    ctx.pop()
+
+
+@pytest.fixture(scope='function')
+def seed_db(test_client):
+    db.session.remove()
+    db.drop_all()
+    db.create_all()
+
+    zak = Zakaznik(jmeno='Test', prijmeni='User', email='user@example.com')
+    zak.password = 'password1'
+    db.session.add_all([
+        zak,
+        Stul(cislo=1, kapacita=4),
+        Stul(cislo=2, kapacita=2),
+        Salonek(nazev="Salónek A", kapacita=10),
+    ])
+    db.session.commit()
+    # index obsazenosti žije v aplikaci napříč testy → po novém seedu přestavět
+    current_app.extensions["availability"].invalidate()
+
+    token = create_access_token(identity=str(zak.id_zakaznika), additional_claims={"roles": ["user"]})
+    yield {"Authorization": f"Bearer {token}"}
+
+    db.session.remove()
+
+
+CAS = (datetime.utcnow() + timedelta(days=1)).replace(hour=19, minute=0, second=0, microsecond=0)
+
+
+def _rezervuj(client, headers, **kwargs):
+    payload = {"datum_cas": CAS.isoformat(), "pocet_osob": 2, **kwargs}
+    return client.post('/api/rezervace', json=payload, headers=headers)
+
+
+def test_kapacita_stolu(test_client, seed_db):
+    assert _rezervuj(test_client, seed_db, id_stul=1).status_code == 201
+    assert _rezervuj(test_client, seed_db, id_stul=1).status_code == 201
+    resp = _rezervuj(test_client, seed_db, id_stul=1, pocet_osob=1)
+    assert resp.status_code == 409
+    assert db.session.get(Obsazenost, ("stul", 1, CAS)).obsazeno == 4
+
+
+def test_neexistujici_zdroj(test_client, seed_db):
+    assert _rezervuj(test_client, seed_db, id_stul=99).status_code == 404
+    assert _rezervuj(test_client, seed_db, id_stul=2, pocet_osob=3).status_code == 409
+
+
+def test_smazani_a_uprava_meni_obsazenost(test_client, seed_db):
+    id_rez = _rezervuj(test_client, seed_db, id_salonek=1, pocet_osob=8).get_json()["id_rezervace"]
+    assert _rezervuj(test_client, seed_db, id_salonek=1, pocet_osob=3).status_code == 409
+
+    resp = test_client.put(f'/api/rezervace/{id_rez}', json={"pocet_osob": 6}, headers=seed_db)
+    assert resp.status_code == 200
+    assert _rezervuj(test_client, seed_db, id_salonek=1, pocet_osob=3).status_code == 201
+
+    resp = test_client.put(f'/api/rezervace/{id_rez}', json={"pocet_osob": 9}, headers=seed_db)
+    assert resp.status_code == 409
+
+    assert test_client.delete(f'/api/rezervace/{id_rez}', headers=seed_db).status_code == 204
+    db.session.expire_all()
+    assert db.session.get(Obsazenost, ("salonek", 1, CAS)).obsazeno == 3
+
+
+def test_volne_zdroje(test_client, seed_db, count_queries):
+    _rezervuj(test_client, seed_db, id_stul=1, pocet_osob=3)
+    with count_queries() as queries:
+        resp = test_client.get('/api/rezervace/volne',
+                               query_string={"datum_cas": CAS.isoformat(), "pocet_osob": 2},
+                               headers=seed_db)
+    assert resp.status_code == 200
+    volne = {(z["typ"], z["id"]): z["volno"] for z in resp.get_json()}
+    assert volne == {("stul", 2): 2, ("salonek", 1): 10}
+    assert len(queries) == 1
+
+
+def test_rebuild_occupancy(test_client, seed_db):
+    db.session.add_all([
+        Rezervace(datum_cas=CAS, pocet_osob=1, id_zakaznika=1, id_stul=1),
+        Rezervace(datum_cas=CAS, pocet_osob=2, id_zakaznika=1, id_stul=1),
+    ])
+    db.session.commit()
+    rebuild_occupancy()
+    assert db.session.get(Obsazenost, ("stul", 1, CAS)).obsazeno == 3
+
+
+def test_prekryvajici_se_intervaly(test_client, seed_db):
+    assert _rezervuj(test_client, seed_db, id_stul=2, delka_minut=120).status_code == 201
+    # 19:15 padne do rozběhlé rezervace 19:00–21:00
+    assert _rezervuj(test_client, seed_db, id_stul=2, pocet_osob=1,
+                     datum_cas=(CAS + timedelta(minutes=15)).isoformat()).status_code == 409
+    # navazující rezervace od 21:00 se nepřekrývá
+    assert _rezervuj(test_client, seed_db, id_stul=2,
+                     datum_cas=(CAS + timedelta(hours=2)).isoformat()).status_code == 201
+    assert db.session.get(Obsazenost, ("stul", 2, CAS + timedelta(minutes=105))).obsazeno == 2
+
+
+def test_neuspesne_zabrani_nic_nezmeni(test_client, seed_db):
+    pozdeji = CAS + timedelta(hours=1)
+    assert _rezervuj(test_client, seed_db, id_stul=1, pocet_osob=4, datum_cas=pozdeji.isoformat()).status_code == 201
+    # 19:00–21:00 se vejde do 19:00–19:45, ale ne do 20:00–21:00 → celé odmítnuto
+    assert _rezervuj(test_client, seed_db, id_stul=1, pocet_osob=1).status_code == 409
+    db.session.expire_all()
+    assert db.session.get(Obsazenost, ("stul", 1, CAS)) is None or \
+        db.session.get(Obsazenost, ("stul", 1, CAS)).obsazeno == 0
+    assert db.session.get(Obsazenost, ("stul", 1, pozdeji)).obsazeno == 4
+
+
+def test_zmena_delky(test_client, seed_db):
+    id_rez = _rezervuj(test_client, seed_db, id_stul=2, delka_minut=60).get_json()["id_rezervace"]
+    pozdeji = (CAS + timedelta(minutes=90)).isoformat()
+    assert _rezervuj(test_client, seed_db, id_stul=2, datum_cas=pozdeji).status_code == 201
+
+    resp = test_client.put(f'/api/rezervace/{id_rez}', json={"delka_minut": 120}, headers=seed_db)
+    assert resp.status_code == 409
+    resp = test_client.put(f'/api/rezervace/{id_rez}', json={"delka_minut": 90}, headers=seed_db)
+    assert resp.status_code == 200 and resp.get_json()["delka_minut"] == 90
+    db.session.expire_all()
+    assert db.session.get(Obsazenost, ("stul", 2, CAS + timedelta(minutes=75))).obsazeno == 2
+
+
+def _terminy(client, headers, **query):
+    resp = client.get('/api/rezervace/availability', query_string=query, headers=headers)
+    assert resp.status_code == 200, resp.get_json()
+    return [(t["typ"], t["id"], datetime.fromisoformat(t["od"])) for t in resp.get_json()]
+
+
+def test_availability(test_client, seed_db, count_queries):
+    assert _rezervuj(test_client, seed_db, id_stul=1, pocet_osob=2).status_code == 201
+
+    terminy = _terminy(test_client, seed_db, od=CAS.isoformat(), pocet_osob=3, limit=3)
+    assert terminy == [("salonek", 1, CAS),
+                       ("salonek", 1, CAS + timedelta(minutes=15)),
+                       ("salonek", 1, CAS + timedelta(minutes=30))]
+    # stůl 1 je do 21:00 obsazený napůl, 3 osoby se vejdou až pak
+    with count_queries() as queries:
+        terminy = _terminy(test_client, seed_db, od=CAS.isoformat(), pocet_osob=3, typ="stul", limit=1)
+    assert terminy == [("stul", 1, CAS + timedelta(hours=2))]
+    assert not [q for q in queries if "rezervace" in q or "obsazenost" in q]   # index je v paměti
+
+    # vlastní rezervace se do indexu promítne hned; po 21:00 se dvouhodinová
+    # rezervace do zavírací doby (23:00) nevejde → další den od otevření
+    assert _rezervuj(test_client, seed_db, id_stul=1, pocet_osob=2,
+                     datum_cas=(CAS + timedelta(hours=2)).isoformat()).status_code == 201
+    terminy = _terminy(test_client, seed_db, od=CAS.isoformat(), pocet_osob=3, typ="stul", limit=1)
+    assert terminy == [("stul", 1, (CAS + timedelta(days=1)).replace(hour=11))]
+
+
+def test_availability_zrusena_rezervace_a_validace(test_client, seed_db):
+    id_rez = _rezervuj(test_client, seed_db, id_stul=2).get_json()["id_rezervace"]
+    assert _terminy(test_client, seed_db, od=CAS.isoformat(), pocet_osob=2, typ="stul", limit=2) == [
+        ("stul", 1, CAS), ("stul", 1, CAS + timedelta(minutes=15))
+    ]
+    assert test_client.delete(f'/api/rezervace/{id_rez}', headers=seed_db).status_code == 204
+    assert _terminy(test_client, seed_db, od=CAS.isoformat(), pocet_osob=2, typ="stul", limit=2) == [
+        ("stul", 1, CAS), ("stul", 2, CAS)
+    ]
+
+    url = '/api/rezervace/availability'
+    assert test_client.get(url, headers=seed_db).status_code == 400
+    assert test_client.get(url, query_string={"pocet_osob": 2, "typ": "akce"}, headers=seed_db).status_code == 400
+    assert test_client.get(url, query_string={"pocet_osob": 2, "od": "zítra"}, headers=seed_db).status_code == 400
+
+
+def test_prirazeni_stolu_best_fit(test_client, seed_db):
+    prideleny = lambda resp: resp.get_json()["stul"]["id_stul"]      # noqa: E731
+    resp = _rezervuj(test_client, seed_db)
+    assert resp.status_code == 201 and prideleny(resp) == 2          # nejmenší stačící stůl
+    assert prideleny(_rezervuj(test_client, seed_db)) == 1           # stůl se nesdílí
+    assert _rezervuj(test_client, seed_db).status_code == 409
+    # na salonek se automaticky nepřiděluje
+    assert db.session.scalar(db.select(Obsazenost.obsazeno).where(Obsazenost.typ_zdroje == "salonek")) is None
+
+
+def test_prirazeni_stolu_nejkratsi_mezera(test_client, seed_db):
+    db.session.add_all([Stul(cislo=3, kapacita=2), Stul(cislo=4, kapacita=2)])
+    db.session.commit()
+    # stůl 4 je obsazený až do 19:00 → rezervace od 19:00 na něj navazuje bez mezery
+    assert _rezervuj(test_client, seed_db, id_stul=4, pocet_osob=1,
+                     datum_cas=(CAS - timedelta(hours=2)).isoformat()).status_code == 201
+    # stůl 2 má u sebe jednoho hosta → pro přidělení je obsazený
+    assert _rezervuj(test_client, seed_db, id_stul=2, pocet_osob=1).status_code == 201
+
+    resp = _rezervuj(test_client, seed_db, delka_minut=90)
+    assert resp.status_code == 201 and resp.get_json()["stul"]["id_stul"] == 4
+    assert resp.get_json()["delka_minut"] == 90
+    assert _rezervuj(test_client, seed_db).get_json()["stul"]["id_stul"] == 3
+
+
+def test_prideleny_stul_zustava_vyhradni(test_client, seed_db):
+    resp = _rezervuj(test_client, seed_db)
+    assert resp.get_json()["stul"]["id_stul"] == 2 and resp.get_json()["stul_prirazen"]
+    id_rez = resp.get_json()["id_rezervace"]
+    # i po zvětšení stolu na 4 místa se k přidělené rezervaci nikdo nepřidá (ani s id_stul)
+    db.session.get(Stul, 2).kapacita = 4
+    db.session.commit()
+    assert _rezervuj(test_client, seed_db, id_stul=2, pocet_osob=1).status_code == 409
+    volne = test_client.get('/api/rezervace/volne', query_string={"datum_cas": CAS.isoformat()},
+                            headers=seed_db).get_json()
+    assert ("stul", 2) not in {(z["typ"], z["id"]) for z in volne}
+
+    # přesun přidělené rezervace drží stůl výhradně i v novém čase
+    pozdeji = CAS + timedelta(hours=3)
+    resp = test_client.put(f'/api/rezervace/{id_rez}', json={"datum_cas": pozdeji.isoformat()}, headers=seed_db)
+    assert resp.status_code == 200
+    assert _rezervuj(test_client, seed_db, id_stul=2, pocet_osob=1).status_code == 201
+    assert _rezervuj(test_client, seed_db, id_stul=2, pocet_osob=1,
+                     datum_cas=pozdeji.isoformat()).status_code == 409
+
+    db.session.expire_all()
+    pred = {(o.datum_cas, o.obsazeno, o.vyhradne) for o in db.session.query(Obsazenost).filter_by(id_zdroje=2)
+            if o.obsazeno}
+    rebuild_occupancy()
+    assert {(o.datum_cas, o.obsazeno, o.vyhradne) for o in db.session.query(Obsazenost).filter_by(id_zdroje=2)} == pred
+
+
+def test_prirazeni_stolu_po_zastaralych_kandidatech(test_client, seed_db):
+    db.session.add_all([Stul(cislo=10 + i, kapacita=2) for i in range(6)])
+    db.session.commit()
+    index = current_app.extensions["availability"]
+    index.nejlepsi_stoly(CAS, 2, 120)            # postaví index
+    # jiný worker mezitím obsadí všechny dvoumístné stoly → index o tom neví
+    for id_stul in db.session.scalars(db.select(Stul.id_stul).where(Stul.kapacita == 2)).all():
+        assert occupancy.reserve("stul", id_stul, CAS, 2, 120, vyhradne=True)
+        db.session.add(Rezervace(datum_cas=CAS, pocet_osob=2, id_zakaznika=1, id_stul=id_stul, stul_prirazen=True))
+    db.session.commit()
+
+    resp = _rezervuj(test_client, seed_db)
+    assert resp.status_code == 201 and resp.get_json()["stul"]["id_stul"] == 1
@@ -0,0 +1,139 @@
+# tests/test_serializers.py
+
+from datetime import datetime, date, time
+from decimal import Decimal
+
+import pytest
+
+from app import create_app
+from app import schemas, serializers
+from app.db import db
+from app.models import (
+    Zakaznik, Role, VernostniUcet, Stul, Salonek, PodnikovaAkce, Workshop, Rezervace,
+    Objednavka, PolozkaObjednavky, Platba, Hodnoceni, PolozkaMenu, PolozkaMenuAlergen,
+    Alergen, JidelniPlan, PolozkaJidelnihoPlanu, Notifikace
+)
+
+
+@pytest.fixture(scope='module')
+def test_client():
+    app = create_app(config_name="testing")
+    client = app.test_client()
+    ctx = app.app_context()
+    ctx.push()
+    yield client
+    ctx.pop()
+
+
+@pytest.fixture(scope='function')
+def seed_db(test_client):
+    db.session.remove()
+    db.drop_all()
+    db.create_all()
+
+    role = Role(name='staff')
+    zak  = Zakaznik(jmeno='Jan', prijmeni='Novák', email='jan@example.com', roles=[role])
+    bez  = Zakaznik(jmeno='Eva', prijmeni='Bez', email='eva@example.com', telefon='123')
+    zak.password = bez.password = 'password1'
+    stul    = Stul(cislo=1, kapacita=4)
+    salonek = Salonek(nazev='Velký', cena=Decimal('1500.50'), kapacita=30, obrazek_filename='velky salonek.jpg')
+    akce    = PodnikovaAkce(nazev='Večírek', cena=Decimal('0'), kapacita=20, datum=date(2030, 5, 1),
+                            cas=time(18, 30), salonek=salonek)
+    ws      = Workshop(nazev='Pečení', cena=Decimal('250.00'), kapacita=10, cas_konani=datetime(2030, 5, 2, 9))
+    alergen = Alergen(nazev='Lepek')
+    jidlo   = PolozkaMenu(nazev='Knedlík', cena=Decimal('89.90'), kategorie='stálá nabídka', den='',
+                          preparation_time=10, points=5, obrazek_filename='knedlík.png')
+    db.session.add_all([zak, bez, stul, salonek, akce, ws, alergen, jidlo])
+    db.session.flush()
+    db.session.add_all([
+        VernostniUcet(body=10, id_zakaznika=zak.id_zakaznika),
+        PolozkaMenuAlergen(id_menu_polozka=jidlo.id_menu_polozka, id_alergenu=alergen.id_alergenu),
+        Rezervace(datum_cas=datetime(2030, 1, 1, 18), pocet_osob=2, sleva=Decimal('10.00'),
+                  id_zakaznika=zak.id_zakaznika, id_stul=stul.id_stul),
+        Rezervace(datum_cas=datetime(2030, 1, 2, 18), pocet_osob=8,
+                  id_zakaznika=zak.id_zakaznika, id_salonek=salonek.id_salonek, id_akce=akce.id_akce),
+    ])
+    obj = Objednavka(id_zakaznika=zak.id_zakaznika, celkova_castka=Decimal('179.80'), body_ziskane=10)
+    db.session.add(obj)
+    db.session.flush()
+    plan = JidelniPlan(nazev='Týden', platny_od=date(2030, 1, 1))
+    db.session.add_all([
+        PolozkaObjednavky(mnozstvi=2, cena=Decimal('89.90'), id_objednavky=obj.id_objednavky,
+                          id_menu_polozka=jidlo.id_menu_polozka),
+        Platba(castka=Decimal('179.80'), typ_platby='kartou', datum=datetime(2030, 1, 1, 12),
+               id_objednavky=obj.id_objednavky),
+        Hodnoceni(hodnoceni=5, komentar='Dobré', datum=datetime(2030, 1, 1, 13),
+                  id_objednavky=obj.id_objednavky, id_zakaznika=zak.id_zakaznika),
+        Notifikace(typ='PLATBA', datum_cas=datetime(2030, 1, 1, 12), text='ok',
+                   id_objednavky=obj.id_objednavky, id_zakaznika=zak.id_zakaznika),
+        plan,
+    ])
+    db.session.flush()
+    db.session.add(PolozkaJidelnihoPlanu(den=date(2030, 1, 1), poradi=1, id_plan=plan.id_plan,
+                                         id_menu_polozka=jidlo.id_menu_polozka))
+    db.session.commit()
+    yield
+    db.session.remove()
+
+
+DUMP_SCHEMAS = [
+    (schemas.ZakaznikSchema,               Zakaznik),
+    (schemas.ZakaznikSummarySchema,        Zakaznik),
+    (schemas.VernostniUcetSchema,          VernostniUcet),
+    (schemas.RezervaceSchema,              Rezervace),
+    (schemas.RezervaceSummarySchema,       Rezervace),
+    (schemas.StulSchema,                   Stul),
+    (schemas.SalonekSchema,                Salonek),
+    (schemas.PodnikovaAkceSchema,          PodnikovaAkce),
+    (schemas.PodnikovaAkceSummarySchema,   PodnikovaAkce),
+    (schemas.WorkshopSchema,               Workshop),
+    (schemas.WorkshopSummarySchema,        Workshop),
+    (schemas.ObjednavkaSchema,             Objednavka),
+    (schemas.PolozkaObjednavkySchema,      PolozkaObjednavky),
+    (schemas.PlatbaSchema,                 Platba),
+    (schemas.HodnoceniSchema,              Hodnoceni),
+    (schemas.PolozkaMenuSchema,            PolozkaMenu),
+    (schemas.JidelniPlanSchema,            JidelniPlan),
+    (schemas.PolozkaJidelnihoPlanuSchema,  PolozkaJidelnihoPlanu),
+    (schemas.AlergenSchema,                Alergen),
+    (schemas.NotifikaceSchema,             Notifikace),
+]
+
+
+@pytest.mark.parametrize("schema_cls,model", DUMP_SCHEMAS, ids=[s.__name__ for s, _ in DUMP_SCHEMAS])
+def test_compiled_matches_marshmallow(test_client, seed_db, schema_cls, model):
+    objs = db.session.scalars(db.select(model)).all()
+    assert objs
+    with test_client.application.test_request_context('/', base_url='http://bistro.example'):
+        schema = schema_cls(many=True)
+        assert serializers.dump(schema, objs) == schema.dump(objs)
+        for obj in objs:
+            assert serializers.dump(schema_cls(), obj) == schema_cls().dump(obj)
+
+
+def test_only_and_nested_exclude_are_compiled_separately(test_client, seed_db):
+    rez = db.session.scalars(db.select(Rezervace)).all()
+    with test_client.application.test_request_context('/'):
+        plne   = schemas.RezervaceSchema(many=True, only=("id_rezervace", "stul"))
+        ridke  = schemas.RezervaceSchema(many=True, only=("id_rezervace", "stul"), exclude=("stul.rezervace",))
+        assert serializers.dump(plne, rez) == plne.dump(rez)
+        assert serializers.dump(ridke, rez) == ridke.dump(rez)
+        assert "rezervace" not in serializers.dump(ridke, rez)[0]["stul"]
+
+
+def test_static_image_url_uses_cached_prefix(test_client, seed_db):
+    jidlo = db.session.scalars(db.select(PolozkaMenu)).one()
+    with test_client.application.test_request_context('/', base_url='http://a.example'):
+        url_a = serializers.dump(schemas.PolozkaMenuSchema(), jidlo)["obrazek_url"]
+    with test_client.application.test_request_context('/', base_url='http://b.example'):
+        url_b = serializers.dump(schemas.PolozkaMenuSchema(), jidlo)["obrazek_url"]
+    assert url_a == "http://a.example/static/images/knedl%C3%ADk.png"
+    assert url_b.startswith("http://b.example/")
+
+
+def test_verify_flag_detects_mismatch(test_client, seed_db, monkeypatch):
+    alergen = db.session.scalars(db.select(Alergen)).one()
+    schema  = schemas.AlergenSchema()
+    monkeypatch.setitem(serializers._compiled, serializers._key(schema), lambda obj: {"nazev": "jiný"})
+    with pytest.raises(serializers.SerializerMismatch):
+        serializers.dump(schema, alergen)
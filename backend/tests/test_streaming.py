@@ -0,0 +1,79 @@
+# tests/test_streaming.py
+
+import json
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+from app import create_app
+from app.db import db
+from app.models import Zakaznik, Stul, Objednavka, Platba
+
+
+@pytest.fixture(scope='module')
+def test_client():
+    app = create_app(config_name="testing")
+    app.config["STREAM_BATCH_SIZE"] = 10
+    client = app.test_client()
+    ctx = app.app_context()
+    ctx.push()
+    yield client
+    ctx.pop()
+
+
+@pytest.fixture(scope='function')
+def seed_db(test_client):
+    db.session.remove()
+    db.drop_all()
+    db.create_all()
+    for i in range(25):
+        zak = Zakaznik(jmeno=f"Jan{i}", prijmeni=f"Novák{i}", email=f"jan{i}@example.com", _password="x")
+        db.session.add_all([zak, Stul(cislo=i + 1, kapacita=4)])
+        db.session.flush()
+        obj = Objednavka(id_zakaznika=zak.id_zakaznika, celkova_castka=Decimal("100.00"), body_ziskane=1)
+        db.session.add(obj)
+        if i % 2:
+            db.session.flush()
+            db.session.add(Platba(castka=Decimal("100.00"), typ_platby="hotově",
+                                  datum=datetime(2030, 1, 1), id_objednavky=obj.id_objednavky))
+    db.session.commit()
+    token = create_access_token(identity="1", additional_claims={"roles": ["admin"]})
+    yield {"Authorization": f"Bearer {token}"}
+    db.session.remove()
+
+
+def test_json_array_stream_matches_paginated_list(test_client, seed_db):
+    paged  = test_client.get("/api/zakaznik?limit=500", headers=seed_db).get_json()
+    resp   = test_client.get("/api/zakaznik?stream=1", headers=seed_db)
+    assert resp.status_code == 200 and resp.is_streamed
+    assert resp.mimetype == "application/json"
+    assert "Link" not in resp.headers
+    assert resp.get_json() == paged and len(paged) == 25
+
+
+def test_ndjson_stream_is_sent_in_batches(test_client, seed_db):
+    headers = {**seed_db, "Accept": "application/x-ndjson", "Accept-Encoding": "gzip"}
+    resp    = test_client.get("/api/stul?fields=cislo", headers=headers, buffered=False)
+    assert resp.mimetype == "application/x-ndjson"
+    assert "Content-Encoding" not in resp.headers
+    chunks = list(resp.response)
+    resp.close()
+    assert len(chunks) == 3                            # 25 řádků po 10 (STREAM_BATCH_SIZE)
+    lines = b"".join(c if isinstance(c, bytes) else c.encode() for c in chunks).decode().splitlines()
+    assert [json.loads(line) for line in lines] == [{"cislo": i + 1} for i in range(25)]
+
+
+def test_stream_does_not_fill_request_session(test_client, seed_db):
+    db.session.expunge_all()
+    resp = test_client.get("/api/zakaznik", headers={**seed_db, "Accept": "application/x-ndjson"})
+    assert len(resp.data.splitlines()) == 25
+    assert len(db.session.identity_map) == 0
+
+
+def test_orders_stream_keeps_computed_state(test_client, seed_db):
+    resp = test_client.get("/api/objednavky?stream=1&stav=Hotovo", headers=seed_db)
+    data = resp.get_json()
+    assert len(data) == 12 and {o["stav"] for o in data} == {"Hotovo"}
+    assert [o["id_objednavky"] for o in data] == sorted(o["id_objednavky"] for o in data)